@@ -0,0 +1,16 @@
+"""
+Benchmarks and load tests for the bot, meant to run offline: python -m lobbybot.benchmarks.<name> --help.
+
+Importing this package points the paths the settings module wants at a scratch directory, unless they are already set,
+and turns off the metrics endpoint and console logging, before any benchmark gets to import settings.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+SCRATCH_DIR = Path(tempfile.mkdtemp(prefix="lobbybot-bench-")) # for anything a benchmark writes to disk
+
+for _name in ("USERS_PATH", "LOG_PATH", "RESOURCES_PATH"):
+    os.environ.setdefault(_name, str(SCRATCH_DIR))
+os.environ.setdefault("METRICS_PORT", "0")
+os.environ.setdefault("LOG_CONSOLE", "0")
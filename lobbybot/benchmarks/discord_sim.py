@@ -0,0 +1,335 @@
+"""
+An in-process stand-in for the parts of Discord the LobbyController talks to, so it can be driven without a connection.
+
+SimulatedDiscord plays the API: every call waits a configurable latency, channel message routes share a per-channel
+rate limit bucket, and everything except interaction responses shares a global one. When a bucket is empty the call
+counts as a 429 and waits for the bucket to refill, the way discord.py does. Calls are counted by the same route
+names the real trace hooks use.
+
+The objects handed to the controller (interactions, channels, messages, members, the client) have the attributes and
+coroutines the controller uses, with the same behaviour where it matters: an interaction can only be responded to
+once, deleted messages raise NotFound, and DM channels have to be opened before use.
+"""
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import discord
+
+from .fakes import FakeAvatar, FakeChannel, FakeMember, FakeVoiceState
+
+CHANNEL_BUCKET = (5, 5.0) # requests per channel, per seconds; Discord's limit for sending to one channel
+GLOBAL_BUCKET = (50, 1.0) # requests across the bot, per seconds
+
+class _Bucket:
+    __slots__ = ("limit", "per", "remaining", "reset_at")
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self, now: float) -> float:
+        """ Takes a request from the bucket, returning 0, or returns how long to wait until it refills. """
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.per
+        if self.remaining:
+            self.remaining -= 1
+            return 0.0
+        return self.reset_at - now
+
+class _FakeResponse:
+    """ What discord.HTTPException reads from an aiohttp response. """
+    def __init__(self, status: int, reason: str):
+        self.status = status
+        self.reason = reason
+
+class SimulatedDiscord:
+    """
+    The simulated API. latency and jitter are in seconds; each call takes latency plus a random amount up to jitter.
+    Buckets are (requests, per seconds). Rate limits can be turned off with rate_limits=False, to measure the controller
+    on its own.
+    """
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, rate_limits: bool = True, seed: int = 0,
+                 channel_bucket: Tuple[int, float] = CHANNEL_BUCKET, global_bucket: Tuple[int, float] = GLOBAL_BUCKET):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limits = rate_limits
+        self.channel_bucket = channel_bucket
+        self._rng = random.Random(seed)
+        self._buckets: Dict[Hashable, _Bucket] = {}
+        self._global = _Bucket(*global_bucket)
+        self._ids = itertools.count(1_100_000_000_000_000_000)
+
+        self.calls: Counter = Counter() # route -> requests
+        self.rate_limited: Counter = Counter() # route -> requests that had to wait for a bucket
+        self.rate_limit_wait = 0.0
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    async def request(self, route: str, bucket: Optional[Hashable] = None, is_global: bool = True):
+        """
+        One API call: waits out the rate limits that apply to it, then the latency. bucket names the route's own rate
+        limit bucket, if it has one; is_global=False is for interaction responses, which the global limit doesn't cover.
+        """
+        self.calls[route] += 1
+        if self.rate_limits:
+            limited = False
+            while True:
+                now = time.monotonic()
+                wait = self._global.take(now) if is_global else 0.0
+                if not wait and bucket is not None:
+                    route_bucket = self._buckets.get(bucket)
+                    if route_bucket is None:
+                        route_bucket = self._buckets[bucket] = _Bucket(*self.channel_bucket)
+                    wait = route_bucket.take(now)
+                    if wait and is_global:
+                        # the request never went out, so it doesn't count against the global bucket
+                        self._global.remaining += 1
+                if not wait:
+                    break
+                if not limited:
+                    limited = True
+                    self.rate_limited[route] += 1
+                self.rate_limit_wait += wait
+                await asyncio.sleep(wait)
+        await asyncio.sleep(self.latency + self._rng.random() * self.jitter)
+
+    def stats(self) -> dict:
+        return {
+            "calls": sum(self.calls.values()),
+            "by_route": dict(self.calls.most_common()),
+            "rate_limited": dict(self.rate_limited.most_common()),
+            "rate_limit_wait_s": self.rate_limit_wait,
+        }
+
+class SimGuild:
+    def __init__(self, id: int):
+        self.id = id
+        self.me = None
+
+class SimPermissions:
+    send_messages = True
+    view_channel = True
+    manage_messages = True
+
+class SimMessage:
+    def __init__(self, api: SimulatedDiscord, channel: "SimTextChannel", id: int, author_id: int,
+                 content: Optional[str] = None, embed: Optional[discord.Embed] = None, view: Optional[discord.ui.View] = None):
+        self._api = api
+        self.channel = channel
+        self.id = id
+        self.author_id = author_id
+        self.content = content
+        self.embed = embed
+        self.view = view
+
+    async def edit(self, *, content: Optional[str] = None, embed: Optional[discord.Embed] = None,
+                   view: Optional[discord.ui.View] = None, **kwargs) -> "SimMessage":
+        await self._api.request("PATCH /channels/{id}/messages/{id}", ("channel", self.channel.id))
+        current = self.channel.messages.get(self.id)
+        if current is None:
+            raise discord.NotFound(_FakeResponse(404, "Not Found"), {"code": 10008, "message": "Unknown Message"})
+        if content is not None:
+            current.content = content
+        if embed is not None:
+            current.embed = embed
+        if view is not None:
+            current.view = view
+        return current
+
+    async def delete(self, *, delay: Optional[float] = None):
+        await self._api.request("DELETE /channels/{id}/messages/{id}", ("channel", self.channel.id))
+        if self.channel.messages.pop(self.id, None) is None:
+            raise discord.NotFound(_FakeResponse(404, "Not Found"), {"code": 10008, "message": "Unknown Message"})
+
+class SimTextChannel:
+    """ A text channel that keeps the messages currently in it. """
+    def __init__(self, api: SimulatedDiscord, guild: SimGuild, id: int, bot_id: int):
+        self._api = api
+        self.guild = guild
+        self.id = id
+        self.bot_id = bot_id
+        self.messages: Dict[int, SimMessage] = {}
+
+    def permissions_for(self, member) -> SimPermissions:
+        return SimPermissions()
+
+    def _store(self, content=None, embed=None, view=None) -> SimMessage:
+        message = SimMessage(self._api, self, self._api.next_id(), self.bot_id, content, embed, view)
+        self.messages[message.id] = message
+        return message
+
+    async def send(self, content: Optional[str] = None, *, embed: Optional[discord.Embed] = None,
+                   view: Optional[discord.ui.View] = None, delete_after: Optional[float] = None, **kwargs) -> SimMessage:
+        await self._api.request("POST /channels/{id}/messages", ("channel", self.id))
+        return self._store(content, embed, view)
+
+    def get_partial_message(self, message_id: int) -> SimMessage:
+        return self.messages.get(message_id) or SimMessage(self._api, self, message_id, self.bot_id)
+
+class SimDMChannel:
+    def __init__(self, api: SimulatedDiscord, user_id: int):
+        self._api = api
+        self.id = api.next_id()
+        self.user_id = user_id
+        self.received: List[discord.Embed] = []
+
+    async def send(self, content: Optional[str] = None, *, embed: Optional[discord.Embed] = None, **kwargs):
+        await self._api.request("POST /channels/{id}/messages", ("channel", self.id))
+        self.received.append(embed)
+
+class SimUser:
+    def __init__(self, api: SimulatedDiscord, id: int):
+        self._api = api
+        self.id = id
+        self.name = f"user{id}"
+        self.dm_channel: Optional[SimDMChannel] = None
+
+    async def create_dm(self) -> SimDMChannel:
+        await self._api.request("POST /users/@me/channels")
+        # Discord hands back the same channel every time
+        if self.dm_channel is None:
+            self.dm_channel = SimDMChannel(self._api, self.id)
+        return self.dm_channel
+
+class SimMember(FakeMember):
+    """ A guild member whose voice state the simulation moves between channels. """
+    def __init__(self, id: int, guild: SimGuild):
+        super().__init__(id, None)
+        self.guild = guild
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def __str__(self) -> str:
+        return self.name
+
+    def move_to(self, channel: Optional[FakeChannel]):
+        """ Changes the member's voice channel, returning the (before, after) voice states discord.py would dispatch. """
+        before = self.voice
+        self.voice = FakeVoiceState(channel, f"{self.id}-{channel.id}") if channel else None
+        return before, self.voice
+
+class SimClient:
+    """ The parts of discord.Client the controller and DM dispatcher use. """
+    def __init__(self, api: SimulatedDiscord):
+        self._api = api
+        self.user = SimUser(api, api.next_id())
+        self._users: Dict[int, SimUser] = {}
+        self._channels: Dict[int, SimTextChannel] = {}
+
+    def add_channel(self, channel: SimTextChannel):
+        self._channels[channel.id] = channel
+
+    def get_channel(self, channel_id: int) -> Optional[SimTextChannel]:
+        return self._channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id: int) -> SimTextChannel:
+        await self._api.request("GET /channels/{id}")
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            raise discord.NotFound(_FakeResponse(404, "Not Found"), {"code": 10003, "message": "Unknown Channel"})
+        return channel
+
+    def get_user(self, user_id: int) -> Optional[SimUser]:
+        # with the members intent, everyone in the guild is in the cache
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = SimUser(self._api, user_id)
+        return user
+
+    async def fetch_user(self, user_id: int) -> SimUser:
+        await self._api.request("GET /users/{id}")
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = SimUser(self._api, user_id)
+        return user
+
+    def dms_received(self) -> int:
+        return sum(len(user.dm_channel.received) for user in self._users.values() if user.dm_channel)
+
+class SimInteractionResponse:
+    def __init__(self, interaction: "SimInteraction"):
+        self._interaction = interaction
+        self._api = interaction._api
+        self.responded_at: Optional[float] = None
+
+    def is_done(self) -> bool:
+        return self.responded_at is not None
+
+    def _respond(self):
+        if self.responded_at is not None:
+            raise discord.InteractionResponded(self._interaction)
+        # the response counts from when it is sent, not when Discord confirms it
+        self.responded_at = time.perf_counter()
+
+    async def defer(self, *, ephemeral: bool = False, thinking: bool = False):
+        self._respond()
+        await self._api.request("POST /interactions/{id}/{token}/callback", is_global=False)
+
+    async def send_message(self, content: Optional[str] = None, *, embed: Optional[discord.Embed] = None,
+                           view: Optional[discord.ui.View] = None, ephemeral: bool = False,
+                           delete_after: Optional[float] = None, **kwargs):
+        self._respond()
+        await self._api.request("POST /interactions/{id}/{token}/callback", is_global=False)
+        if not ephemeral:
+            self._interaction._original = self._interaction.channel._store(content, embed, view)
+
+class SimFollowup:
+    def __init__(self, interaction: "SimInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content: Optional[str] = None, *, embed: Optional[discord.Embed] = None,
+                   view: Optional[discord.ui.View] = None, ephemeral: bool = False, wait: bool = False, **kwargs):
+        interaction = self._interaction
+        if not interaction.response.is_done():
+            raise discord.NotFound(_FakeResponse(404, "Not Found"), {"code": 10015, "message": "Unknown Webhook"})
+        await interaction._api.request("POST /webhooks/{id}/{token}", is_global=False)
+        message = interaction.channel._store(content, embed, view) if not ephemeral else None
+        return message if wait else None
+
+class SimInteraction:
+    """ A slash command or component interaction from member in channel. """
+    def __init__(self, api: SimulatedDiscord, client: SimClient, user: SimMember, channel: SimTextChannel,
+                 type: discord.InteractionType, custom_id: Optional[str] = None):
+        self._api = api
+        self.id = api.next_id()
+        self.type = type
+        self.data = {"custom_id": custom_id} if custom_id is not None else {}
+        self.user = user
+        self.channel = channel
+        self.channel_id = channel.id
+        self.guild = channel.guild
+        self.guild_id = channel.guild.id
+        self.client = client
+        self.extras: dict = {}
+        self.command = None
+        self.message = None
+        self.created_at = time.perf_counter()
+        self.response = SimInteractionResponse(self)
+        self.followup = SimFollowup(self)
+        self._original: Optional[SimMessage] = None
+
+    async def original_response(self) -> SimMessage:
+        await self._api.request("GET /webhooks/{id}/{token}/messages/@original", is_global=False)
+        if self._original is None:
+            raise discord.NotFound(_FakeResponse(404, "Not Found"), {"code": 10008, "message": "Unknown Message"})
+        return self._original
+
+    @property
+    def acknowledged_after(self) -> Optional[float]:
+        """ Seconds from the interaction arriving to the bot's first response; Discord gives up after 3. """
+        if self.response.responded_at is None:
+            return None
+        return self.response.responded_at - self.created_at
+
+def member_avatar(member_id: int) -> FakeAvatar:
+    return FakeAvatar(f"https://cdn.discordapp.com/embed/avatars/{member_id % 5}.png")
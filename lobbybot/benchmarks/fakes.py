@@ -0,0 +1,77 @@
+"""
+Stand-ins for the discord objects the lobby models are built from, so benchmarks can run without a connection.
+They carry the same attributes as the real discord.py 2.3 classes, but none of their shared references.
+"""
+from array import array
+from datetime import datetime, timezone
+
+
+class FakeAvatar:
+    def __init__(self, url: str):
+        self.url = url
+
+class FakeChannel:
+    def __init__(self, id: int):
+        self.id = id
+
+class FakeVoiceState:
+    """ Same attributes as discord.VoiceState. discord.py builds a new one on every voice update. """
+    def __init__(self, channel: FakeChannel, session_id: str):
+        self.session_id = session_id
+        self.self_mute = False
+        self.self_deaf = False
+        self.self_stream = False
+        self.self_video = False
+        self.deaf = False
+        self.mute = False
+        self.afk = False
+        self.suppress = False
+        self.requested_to_speak_at = None
+        self.channel = channel
+
+class FakeUser:
+    """ Same attributes as discord.User. """
+    def __init__(self, id: int):
+        self.id = id
+        self.name = f"user{id}"
+        self.global_name = f"User {id}"
+        self.discriminator = "0"
+        self._avatar = f"{id:032x}"
+        self._banner = None
+        self._accent_colour = None
+        self._public_flags = 0
+        self.bot = False
+        self.system = False
+
+class FakeMember:
+    """ Same attributes as discord.Member, plus the VoiceState the guild cache hands out with it. """
+    def __init__(self, id: int, voice: FakeVoiceState):
+        self._user = FakeUser(id)
+        self._roles = array("Q", [id, id + 1, id + 2])
+        self.joined_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.premium_since = None
+        self.activities = ()
+        self.nick = None
+        self.pending = False
+        self.timed_out_until = None
+        self._avatar = None
+        self._flags = 0
+        self._permissions = None
+        self._client_status = {None: "online"}
+        self.voice = voice
+
+    @property
+    def id(self) -> int:
+        return self._user.id
+
+    @property
+    def name(self) -> str:
+        return self._user.name
+
+    @property
+    def display_name(self) -> str:
+        return self._user.global_name
+
+    @property
+    def display_avatar(self) -> FakeAvatar:
+        return FakeAvatar(f"https://cdn.discordapp.com/avatars/{self.id}/{self._user._avatar}.png")
@@ -0,0 +1,72 @@
+"""
+Cost of journaling lobby mutations, and how fast the journal replays.
+
+Runs a stream of joins, leaves and ready clicks against a journaling LobbyManager and reports the extra time each
+click spends appending its record, then replays the journal into an empty manager and checks it ends up identical.
+
+    python -m lobbybot.benchmarks.journal_replay --lobbies 200 --clicks 50000
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from lobbybot.lobby.models import LobbyManager, LobbyState
+from lobbybot.lobby.controllers.lobby_journal import LobbyJournal, replay
+from .fakes import FakeMember
+
+
+def run_clicks(manager: LobbyManager, num_lobbies: int, clicks: int, seed: int = 0) -> float:
+    """ Creates the lobbies and applies clicks random joins/leaves/ready clicks. Returns the seconds spent. """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    lobbies = [manager.create_lobby(FakeMember(1_000_000 + i, None), -1, 5, "Valorant") for i in range(num_lobbies)]
+    for _ in range(clicks):
+        lobby = rng.choice(lobbies)
+        user_id = rng.randrange(50)
+        roll = rng.random()
+        if lobby.state == LobbyState.READY_CHECK:
+            if roll < 0.6:
+                lobby.ready_up_by_id(user_id)
+            elif roll < 0.8:
+                lobby.unready_by_id(user_id)
+            else:
+                lobby.end_ready_check()
+        elif roll < 0.4:
+            lobby.add_player_by_id(user_id, False)
+        elif roll < 0.6:
+            lobby.add_filler_by_id(user_id, False)
+        elif roll < 0.95:
+            lobby.remove_participant_by_id(user_id)
+        elif lobby.state == LobbyState.WAITING:
+            lobby.start_ready_check()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lobbies", type=int, default=200)
+    parser.add_argument("--clicks", type=int, default=50000)
+    args = parser.parse_args()
+
+    baseline = run_clicks(LobbyManager(), args.lobbies, args.clicks)
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = LobbyJournal(directory)
+        manager = LobbyManager()
+        manager.journal = journal
+        journaled = run_clicks(manager, args.lobbies, args.clicks)
+        journal.close()
+        records = journal.records_written
+
+        replayed = LobbyManager()
+        count, replay_s = replay(replayed, LobbyJournal(directory).read())
+        assert replayed.to_dict() == manager.to_dict()
+
+    overhead_us = (journaled - baseline) / records * 1_000_000
+    print(f"{args.lobbies} lobbies, {args.clicks} clicks, {records} records in {journal.commits} group commits")
+    print(f"clicks without journal: {baseline * 1000:8.1f} ms")
+    print(f"clicks with journal:    {journaled * 1000:8.1f} ms ({overhead_us:.2f} us per record)")
+    print(f"replay:                 {replay_s * 1000:8.1f} ms ({count / replay_s:,.0f} records/s)")
+
+if __name__ == "__main__":
+    main()
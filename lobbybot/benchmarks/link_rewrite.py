@@ -0,0 +1,106 @@
+"""
+Cost of the link rewriter on the messages a busy server sends.
+
+Builds a corpus of chat messages in realistic proportions (mostly plain chat, some tenor gifs and other links, a few
+links the rewriter handles) and times, per message, the old on_message check (compiling the twitter pattern, then
+searching and substituting) against LinkRewriters.rewrite with only twitter enabled and with every site enabled.
+It also checks that both agree on every message while only twitter is enabled, and exits non-zero if they don't.
+
+    python -m lobbybot.benchmarks.link_rewrite --messages 100000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lobbybot.links import LINK_REWRITERS
+
+WORDS = ("gg", "anyone", "down", "for", "valo", "tonight", "lol", "im", "on", "in", "5", "mins", "who", "wants", "to",
+         "play", "that", "was", "insane", "bro", "nah", "fr", "ranked", "after", "dinner", "we", "need", "one", "more")
+
+LINKS = {
+    "gif": ["https://tenor.com/view/cat-dance-gif-{n}", "https://media.discordapp.net/attachments/{n}/{n}/clip.gif"],
+    "other link": ["https://www.youtube.com/watch?v=dQw4w{n}", "https://youtu.be/{n}", "https://tracker.gg/valorant/profile/riot/{n}"],
+    "twitter": ["https://x.com/ValorantEsports/status/17{n}", "https://twitter.com/PlayVALORANT/status/16{n}?s=20",
+                "https://x.com/i/web/status/18{n}", "https://twitter.com/i/status/15{n}"],
+    "instagram": ["https://www.instagram.com/reel/C{n}xYz/"],
+    "tiktok": ["https://www.tiktok.com/@clips.daily/video/72{n}", "https://vm.tiktok.com/ZM{n}/"],
+    "reddit": ["https://www.reddit.com/r/VALORANT/comments/1a{n}/this_is_so_real/"],
+}
+# out of 1000 messages
+MIX = {"chat": 820, "long chat": 40, "gif": 70, "other link": 40, "twitter": 15, "instagram": 5, "tiktok": 5, "reddit": 5}
+
+def make_corpus(count: int, seed: int) -> List[Tuple[str, str]]:
+    """ (kind, content) pairs. """
+    rng = random.Random(seed)
+    kinds = rng.choices(list(MIX), weights=list(MIX.values()), k=count)
+    corpus = []
+    for kind in kinds:
+        words = " ".join(rng.choices(WORDS, k=rng.randint(1, 60 if kind == "long chat" else 12)))
+        if kind in LINKS:
+            link = rng.choice(LINKS[kind]).format(n=rng.randrange(10 ** 8))
+            content = rng.choice((link, f"{words} {link}", f"{link} {words}"))
+        else:
+            content = words
+        corpus.append((kind, content))
+    return corpus
+
+def old_rewrite(content: str) -> Optional[str]:
+    """ What on_message did before the link rewriter. """
+    pattern = re.compile(r'https?://(twitter\.com|x\.com)/(.+)/status/(\d+)', re.IGNORECASE)
+    if pattern.search(content):
+        return re.sub(pattern, r'https://fxtwitter.com/\2/status/\3', content)
+    return None
+
+def time_by_kind(rewrite: Callable[[str], Optional[str]], corpus: List[Tuple[str, str]], repeat: int) -> Dict[str, float]:
+    """ Best ns per message for each kind of message, and for the whole corpus. """
+    by_kind: Dict[str, List[str]] = defaultdict(list)
+    for kind, content in corpus:
+        by_kind[kind].append(content)
+    by_kind["all"] = [content for _, content in corpus]
+
+    results = {}
+    for kind, messages in by_kind.items():
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for content in messages:
+                rewrite(content)
+            elapsed = (time.perf_counter() - start) / len(messages) * 1e9
+            best = elapsed if best is None else min(best, elapsed)
+        results[kind] = best
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.messages, args.seed)
+    twitter_only = frozenset({"twitter"})
+    mismatches = [content for _, content in corpus if old_rewrite(content) != LINK_REWRITERS.rewrite(content, twitter_only)]
+    rewritten = sum(LINK_REWRITERS.rewrite(content, LINK_REWRITERS.sites) is not None for _, content in corpus)
+
+    cases = {
+        "old (twitter)": old_rewrite,
+        "new (twitter)": lambda content: LINK_REWRITERS.rewrite(content, twitter_only),
+        "new (all sites)": lambda content: LINK_REWRITERS.rewrite(content, LINK_REWRITERS.sites),
+    }
+    results = {name: time_by_kind(rewrite, corpus, args.repeat) for name, rewrite in cases.items()}
+
+    kinds = ["all"] + list(MIX)
+    print(f"{args.messages} messages, {rewritten} with links to rewrite; ns per message, best of {args.repeat}")
+    print(f"{'kind':<12}" + "".join(f"{name:>18}" for name in cases))
+    for kind in kinds:
+        print(f"{kind:<12}" + "".join(f"{results[name][kind]:18.0f}" for name in cases))
+    if mismatches:
+        print(f"\n{len(mismatches)} message(s) where old and new disagree with only twitter enabled, e.g. {mismatches[0]!r}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Load test for the lobby controller against the in-process Discord simulator (discord_sim).
+
+Runs thousands of lobbies at once through their whole life: the owner runs /lobby now, players click play and fill
+(and some change their minds), everyone joins voice, the owner starts a ready check and everyone readies up, people hop
+between voice channels while the lobby is active, and then the lobby ends, either from the end button or because its
+players left voice. Bystanders who aren't in any lobby move around voice the whole time.
+
+Reports throughput, the time until each interaction was acknowledged (Discord fails any that take more than 3s) and
+until its handler finished, Discord API calls and 429s by route, and the controller's own queue stats. Needs no
+network or bot token, so it can run in CI; it exits non-zero if a handler raised, an interaction went unanswered, the
+controller still holds resources for closed lobbies, or, with --max-ack-p99-ms, interactions were answered too slowly.
+Interactions answered after Discord's 3s deadline are reported either way.
+
+    python -m lobbybot.benchmarks.load_test --lobbies 1000 --channels 500 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import traceback
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import discord
+
+from lobbybot.settings import USERS_PATH
+from lobbybot.lobby.controllers.lobby_controller import LobbyController
+from lobbybot.lobby.controllers.guild_config import GuildConfig
+from lobbybot.lobby.models import LobbyState
+from lobbybot.lobby.views.lobby_views import lobby_custom_id
+from . import SCRATCH_DIR
+from .discord_sim import SimulatedDiscord, SimClient, SimGuild, SimInteraction, SimMember, SimTextChannel
+from .fakes import FakeChannel
+
+ACK_DEADLINE = 3.0 # seconds Discord waits for an interaction response
+GUILD_ID = 900_000_000_000_000_000
+MEMBER_ID_BASE = 200_000_000_000_000_000
+
+
+def percentile(values: List[float], p: float) -> float:
+    return values[min(int(len(values) * p), len(values) - 1)] if values else 0.0
+
+class Recorder:
+    """ Latencies per event kind, plus everything that went wrong. """
+    def __init__(self):
+        self.acks: Dict[str, List[float]] = defaultdict(list)
+        self.handled: Dict[str, List[float]] = defaultdict(list)
+        self.unanswered: Counter = Counter()
+        self.late: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.first_tracebacks: List[str] = []
+
+    async def interaction(self, kind: str, interaction: SimInteraction, handler):
+        start = time.perf_counter()
+        await self._run(kind, handler)
+        self.handled[kind].append(time.perf_counter() - start)
+        acked = interaction.acknowledged_after
+        if acked is None:
+            self.unanswered[kind] += 1
+            return
+        self.acks[kind].append(acked)
+        if acked > ACK_DEADLINE:
+            self.late[kind] += 1
+
+    async def event(self, kind: str, handler):
+        start = time.perf_counter()
+        await self._run(kind, handler)
+        self.handled[kind].append(time.perf_counter() - start)
+
+    async def _run(self, kind: str, handler):
+        try:
+            await handler
+        except Exception as e:
+            self.errors[f"{kind}: {type(e).__name__}"] += 1
+            if len(self.first_tracebacks) < 3:
+                self.first_tracebacks.append(traceback.format_exc())
+
+    def latency_table(self) -> Dict[str, dict]:
+        table = {}
+        for kind in sorted(self.handled):
+            acks = sorted(self.acks.get(kind, ()))
+            handled = sorted(self.handled[kind])
+            row = {"count": len(handled)}
+            if acks:
+                row.update({f"ack_{name}_ms": percentile(acks, p) * 1000 for name, p in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))})
+                row["ack_max_ms"] = acks[-1] * 1000
+            row.update({f"done_{name}_ms": percentile(handled, p) * 1000 for name, p in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))})
+            row["done_max_ms"] = handled[-1] * 1000
+            table[kind] = row
+        return table
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.api = SimulatedDiscord(args.latency, args.jitter, not args.no_rate_limits, args.seed,
+                                    global_bucket=(args.global_rate, 1.0))
+        self.client = SimClient(self.api)
+        self.guild = SimGuild(GUILD_ID)
+        self.channels = [SimTextChannel(self.api, self.guild, self.api.next_id(), self.client.user.id) for _ in range(args.channels)]
+        for channel in self.channels:
+            self.client.add_channel(channel)
+        self.voice_channels = [FakeChannel(self.api.next_id()) for _ in range(max(args.channels, 2))]
+        self.controller = LobbyController(GUILD_ID, GuildConfig(GUILD_ID, 0),
+                                          snapshot_path=SCRATCH_DIR / "load_snapshot.json",
+                                          journal_path=SCRATCH_DIR / "load_journal")
+        self.recorder = Recorder()
+        self.lobbies_started = 0
+        self.lobbies_closed_by_voice = 0
+
+    def member(self, lobby_index: int, seat: int) -> SimMember:
+        return SimMember(MEMBER_ID_BASE + lobby_index * 64 + seat, self.guild)
+
+    async def click(self, member: SimMember, channel: SimTextChannel, action: str, lobby_id: int):
+        interaction = SimInteraction(self.api, self.client, member, channel, discord.InteractionType.component,
+                                     lobby_custom_id(action, lobby_id))
+        await self.recorder.interaction(f"button {action}", interaction, self.controller.handle_lobby_button(interaction))
+
+    async def move(self, member: SimMember, voice_channel):
+        before, after = member.move_to(voice_channel)
+        await self.recorder.event("voice", self.controller.handle_voice_state_update(member, before, after))
+
+    async def think(self):
+        """ The pause between one person's clicks. """
+        await asyncio.sleep(self.rng.uniform(0, self.args.think))
+
+    async def lobby_lifecycle(self, index: int):
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp))
+        size = self.args.size
+        channel = self.channels[index % len(self.channels)]
+        voice = self.voice_channels[index % len(self.voice_channels)]
+        owner = self.member(index, 0)
+        players = [self.member(index, seat) for seat in range(1, size)]
+        filler = self.member(index, size)
+        everyone = [owner, *players, filler]
+
+        interaction = SimInteraction(self.api, self.client, owner, channel, discord.InteractionType.application_command)
+        await self.recorder.interaction("/lobby", interaction, self.controller.create_lobby(interaction, "now", size, "Valorant"))
+        lobby = self.controller.lobby_manager.get_lobby_by_owner(owner.id)
+        if lobby is None:
+            self.recorder.errors["/lobby: no lobby created"] += 1
+            return
+
+        async def join(member: SimMember, action: str):
+            await self.think()
+            await self.click(member, channel, action, lobby.id)
+            await self.move(member, voice)
+        await asyncio.gather(self.move(owner, voice), *(join(player, "play") for player in players), join(filler, "fill"))
+
+        # someone changes their mind, which should mostly cost one coalesced edit
+        fickle = self.rng.choice(players)
+        await self.click(fickle, channel, "leave", lobby.id)
+        await self.think()
+        await self.click(fickle, channel, "play", lobby.id)
+
+        await self.click(owner, channel, "ready_check", lobby.id)
+        await asyncio.gather(*(self.think_then(self.click(member, channel, "ready", lobby.id)) for member in everyone))
+        if lobby.state != LobbyState.ACTIVE:
+            self.recorder.errors[f"ready check: lobby ended up {lobby.state.name}"] += 1
+            await self.click(owner, channel, "end", lobby.id)
+            return
+        self.lobbies_started += 1
+
+        # people wander off and come back while the game is on
+        for member in self.rng.sample(everyone, min(self.args.voice_hops, len(everyone))):
+            await self.think()
+            await self.move(member, self.rng.choice(self.voice_channels))
+            await self.move(member, voice)
+
+        if index % 2:
+            await self.click(owner, channel, "end", lobby.id)
+        else:
+            for member in everyone:
+                await self.think()
+                await self.move(member, None)
+            if lobby.state == LobbyState.COMPLETED:
+                self.lobbies_closed_by_voice += 1
+
+    async def think_then(self, awaitable):
+        await self.think()
+        await awaitable
+
+    async def bystanders(self, stop: asyncio.Event):
+        """ Voice traffic from members in no lobby, which the controller should drop almost for free. """
+        members = [SimMember(MEMBER_ID_BASE - 1 - i, self.guild) for i in range(self.args.bystanders)]
+        while not stop.is_set() and members:
+            member = self.rng.choice(members)
+            await self.move(member, None if member.voice else self.rng.choice(self.voice_channels))
+            await asyncio.sleep(1 / self.args.bystander_rate)
+
+    async def settle(self, timeout: float) -> bool:
+        """ Waits for queued edits, DMs and deletes to go out. Returns False if they didn't within timeout. """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            outbound = self.controller.outbound.stats()
+            busy = outbound["in_flight"] + sum(stats["queued"] for stats in outbound.values() if isinstance(stats, dict))
+            if not busy and not self.controller.dms.stats()["in_flight_fanouts"] and not self.controller.scheduler.pending():
+                return True
+            await asyncio.sleep(0.1)
+        return False
+
+    async def run(self) -> dict:
+        for index in range(self.args.lobbies):
+            with open(USERS_PATH / f"{self.member(index, 0).id}.txt", "w") as f:
+                f.write("US/Pacific")
+        await self.controller.restore(self.client)
+
+        stop = asyncio.Event()
+        noise = asyncio.create_task(self.bystanders(stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(self.lobby_lifecycle(index) for index in range(self.args.lobbies)))
+        lifecycles_done = time.perf_counter()
+        stop.set()
+        await noise
+        settled = await self.settle(self.args.settle_timeout)
+        elapsed = time.perf_counter() - start
+
+        counts = self.controller.resource_counts()
+        self.controller.scheduler.close()
+        if self.controller._snapshot_task:
+            self.controller._snapshot_task.cancel()
+        self.controller.journal.close()
+
+        recorder = self.recorder
+        events = sum(len(values) for values in recorder.handled.values())
+        return {
+            "lobbies": self.args.lobbies,
+            "lobbies_started": self.lobbies_started,
+            "lobbies_closed_by_voice": self.lobbies_closed_by_voice,
+            "elapsed_s": elapsed,
+            "lifecycles_s": lifecycles_done - start,
+            "events": events,
+            "events_per_s": events / (lifecycles_done - start),
+            "latency": recorder.latency_table(),
+            "unanswered": dict(recorder.unanswered),
+            "late": dict(recorder.late),
+            "errors": dict(recorder.errors),
+            "tracebacks": recorder.first_tracebacks,
+            "settled": settled,
+            "api": self.api.stats(),
+            "dms_received": self.client.dms_received(),
+            "dm_dispatcher": self.controller.dms.stats(),
+            "outbound": self.controller.outbound.stats(),
+            "mailboxes": self.controller.mailboxes.stats(),
+            "message_updates": {
+                "requested": self.controller.message_stats.updates,
+                "calls": self.controller.message_stats.calls,
+                "edits": self.controller.message_stats.edits,
+                "reposts": self.controller.message_stats.reposts,
+                "skipped": self.controller.message_stats.skips,
+            },
+            "open_lobbies": counts["lobbies"],
+            "leaked": {name: count for name, count in counts["leaked"].items() if count},
+        }
+
+def print_report(result: dict):
+    print(f"{result['lobbies']} lobbies, {result['lobbies_started']} started, {result['lobbies_closed_by_voice']} closed by leaving voice")
+    print(f"{result['events']} interactions and voice events in {result['lifecycles_s']:.1f}s "
+          f"({result['events_per_s']:.0f}/s), {result['elapsed_s']:.1f}s until the outbound queue drained")
+    print()
+    print(f"{'event':<20} {'count':>7} {'ack p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'done p50':>9} {'p99':>9} {'max':>9}")
+    for kind, row in result["latency"].items():
+        acks = "".join(f" {row[key]:9.1f}" if key in row else f" {'-':>9}" for key in ("ack_p50_ms", "ack_p95_ms", "ack_p99_ms", "ack_max_ms"))
+        print(f"{kind:<20} {row['count']:7d}{acks} {row['done_p50_ms']:9.1f} {row['done_p99_ms']:9.1f} {row['done_max_ms']:9.1f}")
+    print("(milliseconds; ack is until the first interaction response, done is until the handler returned)")
+    print()
+    api = result["api"]
+    print(f"Discord API: {api['calls']} calls, {sum(api['rate_limited'].values())} rate limited, "
+          f"{api['rate_limit_wait_s']:.1f}s spent waiting on buckets")
+    for route, count in api["by_route"].items():
+        print(f"  {count:7d}  {route}" + (f"  ({api['rate_limited'][route]} rate limited)" if route in api["rate_limited"] else ""))
+    updates = result["message_updates"]
+    print(f"Lobby messages: {updates['requested']} updates took {updates['calls']} calls "
+          f"({updates['edits']} edits, {updates['reposts']} reposts, {updates['skipped']} skipped)")
+    print(f"DMs: {result['dms_received']} delivered, dispatcher {result['dm_dispatcher']}")
+    print(f"Mailboxes: {result['mailboxes']}")
+    for problem in ("unanswered", "late", "errors", "leaked"):
+        if result[problem]:
+            print(f"{problem.upper()}: {result[problem]}")
+    for trace in result["tracebacks"]:
+        print(trace)
+    if not result["settled"]:
+        print("UNSETTLED: the outbound queue, DMs or timers were still busy at the end")
+    if result["open_lobbies"]:
+        print(f"OPEN LOBBIES: {result['open_lobbies']} were still open at the end")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lobbies", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=5, help="players per lobby; each also gets a filler")
+    parser.add_argument("--channels", type=int, default=500, help="text channels the lobbies are spread over")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per Discord API call")
+    parser.add_argument("--jitter", type=float, default=0.02, help="extra random seconds per call, up to this")
+    parser.add_argument("--global-rate", type=int, default=50, help="requests per second across the bot")
+    parser.add_argument("--no-rate-limits", action="store_true")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which the lobbies are opened")
+    parser.add_argument("--think", type=float, default=1.0, help="up to this many seconds between one person's clicks")
+    parser.add_argument("--voice-hops", type=int, default=2, help="members per lobby who hop voice channels mid-game")
+    parser.add_argument("--bystanders", type=int, default=500)
+    parser.add_argument("--bystander-rate", type=float, default=200.0, help="bystander voice events per second")
+    parser.add_argument("--settle-timeout", type=float, default=600.0)
+    parser.add_argument("--max-ack-p99-ms", type=float, default=None, help="fail if any kind's p99 ack is slower")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    result = asyncio.run(LoadTest(args).run())
+    print_report(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+    failed = bool(result["unanswered"] or result["errors"] or result["leaked"] or result["open_lobbies"] or not result["settled"])
+    if args.max_ack_p99_ms is not None:
+        slow = {kind: row["ack_p99_ms"] for kind, row in result["latency"].items() if row.get("ack_p99_ms", 0) > args.max_ack_p99_ms}
+        if slow:
+            print(f"SLOW: p99 ack over {args.max_ack_p99_ms:.0f}ms for {slow}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
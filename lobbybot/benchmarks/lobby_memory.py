@@ -0,0 +1,110 @@
+"""
+Per-lobby memory footprint of the lobby models.
+
+Builds thousands of simulated lobbies twice: once with the pre-__slots__ model shape (instance __dict__s,
+a retained Member per owner and a retained VoiceState per participant) and once with the current models,
+and reports the bytes retained per lobby for each. The LobbyManager lookup indexes are measured separately,
+since the old manager had none.
+
+The stand-ins carry the same attributes as discord.Member/User/VoiceState but none of their shared references
+(guild, connection state), so the "before" number is a lower bound on what the old models actually kept alive.
+
+    python -m lobbybot.benchmarks.lobby_memory --lobbies 5000 --participants 10
+"""
+import argparse
+import gc
+import tracemalloc
+from typing import Callable, List
+
+from lobbybot.lobby.models import Lobby, LobbyManager
+from .fakes import FakeChannel, FakeMember, FakeVoiceState
+
+
+class _LegacyPlayer:
+    """ Player as it was before __slots__: a __dict__ holding the full VoiceState. """
+    def __init__(self, id: int, force_added: bool = False, voice_state: FakeVoiceState = None):
+        self.id = id
+        self.force_added = force_added
+        self.voice_state = voice_state
+        self.joined_voice = False
+        self.ready = None
+
+class _LegacyLobby:
+    """ Lobby as it was before __slots__: a __dict__ holding the full owner Member and Player lists. """
+    def __init__(self, id: int, owner: FakeMember, time: int, max_players: int, game: str, created_at: int):
+        self.id = id
+        self.owner = owner
+        self.time = time
+        self.max_players = max_players
+        self.game = game
+        self.created_at = created_at
+        self.started_at = None
+        self._state = None
+        self._players = [_LegacyPlayer(owner.id, voice_state=owner.voice)]
+        self._fillers = []
+
+
+def _members(num_lobbies: int, participants: int) -> List[List[FakeMember]]:
+    """ Fresh member objects per lobby, so anything a model retains is attributed to it. """
+    channel = FakeChannel(1)
+    return [
+        [FakeMember(lobby * 1000 + i, FakeVoiceState(channel, f"{lobby}-{i}")) for i in range(participants)]
+        for lobby in range(num_lobbies)
+    ]
+
+def _build_legacy(members: List[List[FakeMember]]) -> list:
+    lobbies = []
+    for i, group in enumerate(members):
+        lobby = _LegacyLobby(i, group[0], -1, len(group), "Valorant", 0)
+        for member in group[1:]:
+            lobby._players.append(_LegacyPlayer(member.id, False, member.voice))
+        lobbies.append(lobby)
+    return lobbies
+
+def _build_current(members: List[List[FakeMember]]) -> list:
+    lobbies = []
+    for i, group in enumerate(members):
+        lobby = Lobby(i, group[0], -1, len(group), "Valorant", 0)
+        for member in group[1:]:
+            lobby.add_player(member, forced=False)
+        lobbies.append(lobby)
+    return lobbies
+
+def _build_managed(members: List[List[FakeMember]]) -> LobbyManager:
+    manager = LobbyManager()
+    for group in members:
+        lobby = manager.create_lobby(group[0], -1, len(group), "Valorant")
+        for member in group[1:]:
+            lobby.add_player(member, forced=False)
+    return manager
+
+def _measure(build: Callable, num_lobbies: int, participants: int) -> float:
+    """ Returns bytes retained per lobby once the members handed to build() have been released. """
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    members = _members(num_lobbies, participants)
+    result = build(members)
+    del members # only what the models kept alive is left
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return (retained - baseline) / num_lobbies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lobbies", type=int, default=5000)
+    parser.add_argument("--participants", type=int, default=10)
+    args = parser.parse_args()
+
+    before = _measure(_build_legacy, args.lobbies, args.participants)
+    after = _measure(_build_current, args.lobbies, args.participants)
+    managed = _measure(_build_managed, args.lobbies, args.participants)
+    print(f"{args.lobbies} lobbies x {args.participants} participants")
+    print(f"before:          {before:10.0f} bytes/lobby")
+    print(f"after:           {after:10.0f} bytes/lobby ({after / before:.0%} of before)")
+    print(f"manager indexes: {managed - after:10.0f} bytes/lobby")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Micro-benchmarks for the lobby model operations that button clicks and voice updates hit.
+
+For every combination of lobby count and participants per lobby, builds a LobbyManager of waiting lobbies (half the
+participants players with one seat free, the rest fillers) and times each operation against it in batches spread
+over random lobbies: create_lobby, add_player, add_filler, remove_participant, get_lobbies_by_participant (and the
+is_participant miss voice updates take for people in no lobby), all_ready, start_from_ready_check and
+edit_participant_voicestate on waiting and active lobbies. Operations that change a lobby are undone outside the
+timed part, so the manager stays the same size throughout. Combinations with more than --max-members participants
+in total are skipped.
+
+Results are nanoseconds per operation, best of --repeat batches. --json writes them out; --baseline compares against
+an earlier --json file and exits non-zero if any operation got slower than --threshold times its baseline and by more
+than --min-delta-ns. Both files also record how long a fixed reference loop took, and the baseline is scaled by how
+much faster or slower that loop ran this time, so a baseline from a busier or slower machine doesn't read as a change.
+
+    python -m lobbybot.benchmarks.lobby_ops --lobbies 10,1000,100000 --participants 5,50 --json after.json --baseline before.json
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from lobbybot.lobby.models import Lobby, LobbyManager, LobbyState
+from .fakes import FakeChannel, FakeMember, FakeVoiceState
+
+SEATS = 64 # user ids per lobby, so lobby i's participants are i * SEATS + seat
+NEW_USER_BASE = 10 ** 12 # ids for users who aren't in any lobby yet
+MAX_BATCH = 1000 # changes made per timed batch before they are undone
+
+class Bench:
+    def __init__(self, num_lobbies: int, participants: int, ops: int, repeat: int, seed: int):
+        self.num_lobbies = num_lobbies
+        self.participants = participants
+        self.ops = ops
+        self.repeat = repeat
+        self.rng = random.Random(seed)
+        self.manager = LobbyManager()
+        self.lobbies: List[Lobby] = []
+        self.voice_states = [FakeVoiceState(FakeChannel(channel), f"bench-{channel}") for channel in range(1, 5)] + [None]
+        self._next_new_user = NEW_USER_BASE
+
+    def new_user(self) -> int:
+        self._next_new_user += 1
+        return self._next_new_user
+
+    def build_lobby(self, index: int) -> Lobby:
+        """ A waiting lobby with half its participants as players, one player seat free, and the rest as fillers. """
+        num_players = max(self.participants // 2, 1)
+        owner = FakeMember(index * SEATS, None)
+        lobby = self.manager.create_lobby(owner, -1, num_players + 1, "Valorant")
+        for seat in range(1, self.participants):
+            if seat < num_players:
+                lobby.add_player_by_id(index * SEATS + seat, False)
+            else:
+                lobby.add_filler_by_id(index * SEATS + seat, False)
+        return lobby
+
+    def build(self):
+        self.lobbies = [self.build_lobby(index) for index in range(self.num_lobbies)]
+
+    def sample(self) -> List[Lobby]:
+        return self.rng.choices(self.lobbies, k=self.ops)
+
+    def batches(self, size: int) -> int:
+        """ How many batches of size make up one measurement of about self.ops operations. """
+        return max(self.ops // size, 1)
+
+    def measure(self, run: Callable[[], Tuple[float, int]]) -> float:
+        """ run() returns (seconds, operations) for one measurement. Returns the best ns per operation. """
+        best = None
+        for _ in range(self.repeat):
+            elapsed, count = run()
+            per_op = elapsed / count * 1e9
+            best = per_op if best is None else min(best, per_op)
+        return best
+
+    # -----------------------------
+    # Operations
+    # -----------------------------
+    def create_lobby(self) -> Tuple[float, int]:
+        size = min(self.ops, MAX_BATCH)
+        elapsed = 0.0
+        create = self.manager.create_lobby
+        for _ in range(self.batches(size)):
+            owners = [FakeMember(self.new_user(), None) for _ in range(size)]
+            start = time.perf_counter()
+            for owner in owners:
+                create(owner, -1, 5, "Valorant")
+            elapsed += time.perf_counter() - start
+            for owner in owners:
+                self.manager.close_lobby(owner.id)
+        return elapsed, self.batches(size) * size
+
+    def _join(self, add: str) -> Tuple[float, int]:
+        # one join per lobby per batch, since each lobby only has one player seat free
+        size = min(self.ops, self.num_lobbies, MAX_BATCH)
+        elapsed = 0.0
+        for _ in range(self.batches(size)):
+            joins = [(getattr(lobby, add), self.new_user()) for lobby in self.rng.sample(self.lobbies, size)]
+            start = time.perf_counter()
+            for join, user_id in joins:
+                join(user_id, False)
+            elapsed += time.perf_counter() - start
+            for join, user_id in joins:
+                join.__self__.remove_participant_by_id(user_id)
+        return elapsed, self.batches(size) * size
+
+    def add_player(self) -> Tuple[float, int]:
+        return self._join("add_player_by_id")
+
+    def add_filler(self) -> Tuple[float, int]:
+        return self._join("add_filler_by_id")
+
+    def remove_participant(self) -> Tuple[float, int]:
+        size = min(self.ops, self.num_lobbies, MAX_BATCH)
+        elapsed = 0.0
+        for _ in range(self.batches(size)):
+            leaves = [(lobby, self.new_user()) for lobby in self.rng.sample(self.lobbies, size)]
+            for lobby, user_id in leaves:
+                lobby.add_filler_by_id(user_id, False)
+            start = time.perf_counter()
+            for lobby, user_id in leaves:
+                lobby.remove_participant_by_id(user_id)
+            elapsed += time.perf_counter() - start
+        return elapsed, self.batches(size) * size
+
+    def get_lobbies_by_participant(self) -> Tuple[float, int]:
+        user_ids = [lobby.id * SEATS + self.rng.randrange(self.participants) for lobby in self.sample()]
+        lookup = self.manager.get_lobbies_by_participant
+        start = time.perf_counter()
+        for user_id in user_ids:
+            lookup(user_id)
+        return time.perf_counter() - start, len(user_ids)
+
+    def is_participant_miss(self) -> Tuple[float, int]:
+        user_ids = [NEW_USER_BASE - 1 - i for i in range(self.ops)]
+        check = self.manager.is_participant
+        start = time.perf_counter()
+        for user_id in user_ids:
+            check(user_id)
+        return time.perf_counter() - start, len(user_ids)
+
+    def _ready_check_lobbies(self, count: int) -> List[Lobby]:
+        """ Extra lobbies, in a ready check everyone has answered, for operations that use one up. """
+        first = self.num_lobbies + (self._next_new_user - NEW_USER_BASE)
+        self._next_new_user += count
+        lobbies = [self.build_lobby(first + i) for i in range(count)]
+        for lobby in lobbies:
+            lobby.start_ready_check()
+            for participant in lobby.get_participants():
+                participant.ready_up()
+        return lobbies
+
+    def all_ready(self) -> Tuple[float, int]:
+        lobbies = self._ready_check_lobbies(min(self.ops, MAX_BATCH))
+        calls = [lobby.all_ready for lobby in self.rng.choices(lobbies, k=self.ops)]
+        start = time.perf_counter()
+        for call in calls:
+            call()
+        elapsed = time.perf_counter() - start
+        for lobby in lobbies:
+            self.manager.close_lobby(lobby.owner.id)
+        return elapsed, len(calls)
+
+    def start_from_ready_check(self) -> Tuple[float, int]:
+        size = min(self.ops, MAX_BATCH)
+        elapsed = 0.0
+        for _ in range(self.batches(size)):
+            lobbies = self._ready_check_lobbies(size)
+            start = time.perf_counter()
+            for lobby in lobbies:
+                lobby.start_from_ready_check()
+            elapsed += time.perf_counter() - start
+            for lobby in lobbies:
+                self.manager.close_lobby(lobby.owner.id)
+        return elapsed, self.batches(size) * size
+
+    def edit_participant_voicestate(self) -> Tuple[float, int]:
+        edits = [(lobby.edit_participant_voicestate, lobby.id * SEATS + self.rng.randrange(self.participants),
+                  self.rng.choice(self.voice_states)) for lobby in self.sample()]
+        start = time.perf_counter()
+        for edit, user_id, state in edits:
+            edit(user_id, state)
+        return time.perf_counter() - start, len(edits)
+
+    def run(self) -> Dict[str, float]:
+        self.build()
+        results = {}
+        cases = [
+            ("create_lobby", self.create_lobby),
+            ("add_player", self.add_player),
+            ("add_filler", self.add_filler),
+            ("remove_participant", self.remove_participant),
+            ("get_lobbies_by_participant", self.get_lobbies_by_participant),
+            ("is_participant (miss)", self.is_participant_miss),
+            ("all_ready", self.all_ready),
+            ("start_from_ready_check", self.start_from_ready_check),
+            ("edit_participant_voicestate (waiting)", self.edit_participant_voicestate),
+        ]
+        gc.disable()
+        try:
+            for name, case in cases:
+                results[name] = self.measure(case)
+            # voice updates matter most once the lobby is going
+            for lobby in self.lobbies:
+                lobby.start(force=True)
+            results["edit_participant_voicestate (active)"] = self.measure(self.edit_participant_voicestate)
+        finally:
+            gc.enable()
+        assert all(lobby.state == LobbyState.ACTIVE for lobby in self.lobbies)
+        assert len(self.manager.get_all_lobbies()) == self.num_lobbies
+        return results
+
+def calibrate(repeat: int = 7) -> float:
+    """ ns per iteration of a fixed loop of dict lookups and attribute reads, like the ones the lobby model does. """
+    table = {i: FakeMember(i, None) for i in range(1000)}
+    keys = list(table) * 20
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for key in keys:
+            table[key].id
+        per_op = (time.perf_counter() - start) / len(keys) * 1e9
+        best = per_op if best is None else min(best, per_op)
+    return best
+
+def parse_list(text: str) -> List[int]:
+    return [int(value) for value in text.split(",") if value.strip()]
+
+def compare(results: List[dict], baseline: List[dict], threshold: float, min_delta: float, scale: float = 1.0) -> List[dict]:
+    """
+    Adds each result's baseline, scaled by this machine's speed against the baseline's, and ratio to it, where the
+    baseline has the same case. Returns the regressions.
+    """
+    previous = {(row["op"], row["lobbies"], row["participants"]): row["ns_per_op"] for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get((row["op"], row["lobbies"], row["participants"]))
+        if before is None:
+            continue
+        row["baseline_ns_per_op"] = before * scale
+        row["ratio"] = row["ns_per_op"] / row["baseline_ns_per_op"]
+        if row["ratio"] > threshold and row["ns_per_op"] - row["baseline_ns_per_op"] > min_delta:
+            regressions.append(row)
+    return regressions
+
+def print_results(results: List[dict]):
+    print(f"{'operation':<40} {'lobbies':>8} {'each':>5} {'ns/op':>10} {'baseline':>10} {'change':>8}")
+    for row in results:
+        line = f"{row['op']:<40} {row['lobbies']:8d} {row['participants']:5d} {row['ns_per_op']:10.0f}"
+        if "ratio" in row:
+            line += f" {row['baseline_ns_per_op']:10.0f} {(row['ratio'] - 1) * 100:+7.1f}%"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lobbies", type=parse_list, default=[10, 100, 1000, 10_000, 100_000], help="comma separated")
+    parser.add_argument("--participants", type=parse_list, default=[5, 10, 50], help="comma separated, at most 50")
+    parser.add_argument("--ops", type=int, default=20_000, help="operations per measurement")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-members", type=int, default=2_000_000, help="skip combinations with more participants in total")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="write the results here")
+    parser.add_argument("--baseline", type=Path, help="compare against an earlier --json file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown against the baseline that counts as a regression")
+    parser.add_argument("--min-delta-ns", type=float, default=100, help="ignore slowdowns smaller than this, which are noise")
+    args = parser.parse_args()
+    if max(args.participants) > SEATS - 1:
+        parser.error(f"--participants can be at most {SEATS - 1}")
+
+    # the first cases run would otherwise also pay for warming up the interpreter's caches
+    Bench(10, 5, 1000, 1, args.seed).run()
+    calibration = calibrate()
+
+    results = []
+    for num_lobbies in args.lobbies:
+        for participants in args.participants:
+            if num_lobbies * participants > args.max_members:
+                print(f"skipping {num_lobbies} lobbies x {participants} participants (over --max-members)")
+                continue
+            bench = Bench(num_lobbies, participants, args.ops, args.repeat, args.seed)
+            for op, ns in bench.run().items():
+                results.append({"op": op, "lobbies": num_lobbies, "participants": participants, "ns_per_op": ns})
+            del bench
+            gc.collect()
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        scale = calibration / baseline["calibration_ns"] if baseline.get("calibration_ns") else 1.0
+        regressions = compare(results, baseline["results"], args.threshold, args.min_delta_ns, scale)
+        print(f"reference loop ran at {scale:.2f}x the baseline's time, baseline scaled to match\n")
+    print_results(results)
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "ops": args.ops,
+            "repeat": args.repeat,
+            "calibration_ns": calibration,
+            "results": results,
+        }, indent=2))
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.2f}x the baseline:")
+        for row in regressions:
+            print(f"  {row['op']} at {row['lobbies']} x {row['participants']}: "
+                  f"{row['baseline_ns_per_op']:.0f} -> {row['ns_per_op']:.0f} ns ({row['ratio']:.2f}x)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Time to restore lobby state from a snapshot on startup.
+
+Builds a LobbyManager with a mix of waiting, ready check and active lobbies, writes it with the same snapshot store
+the bot uses, then times loading the file and rebuilding the manager and its indexes. Discord calls made while
+re-attaching views are not included; the bot logs those separately on startup.
+
+    python -m lobbybot.benchmarks.lobby_restore --lobbies 500 --participants 10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from lobbybot.lobby.models import LobbyManager
+from lobbybot.lobby.controllers.lobby_snapshot_store import LobbySnapshotStore
+from .fakes import FakeChannel, FakeMember, FakeVoiceState
+
+
+def build_manager(num_lobbies: int, participants: int) -> LobbyManager:
+    """ Lobbies with half players, half fillers, cycling through waiting, ready check and active. """
+    channel = FakeChannel(1)
+    manager = LobbyManager()
+    for i in range(num_lobbies):
+        members = [FakeMember(i * 1000 + j, FakeVoiceState(channel, f"{i}-{j}")) for j in range(participants)]
+        lobby = manager.create_lobby(members[0], -1, max(participants // 2, 1), "Valorant")
+        for member in members[1:]:
+            if not lobby.is_full():
+                lobby.add_player(member, forced=False)
+            else:
+                lobby.add_filler(member, forced=False)
+        if i % 3 == 1:
+            lobby.start_ready_check()
+            for player in lobby.get_players[::2]:
+                player.ready_up()
+        elif i % 3 == 2:
+            lobby.start(force=True)
+    return manager
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lobbies", type=int, default=500)
+    parser.add_argument("--participants", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = LobbySnapshotStore(os.path.join(directory, "lobby_snapshot.json"))
+
+        manager = build_manager(args.lobbies, args.participants)
+        start = time.perf_counter()
+        store.save({"manager": manager.to_dict()})
+        save_ms = (time.perf_counter() - start) * 1000
+        size_kb = os.path.getsize(store.path) / 1024
+
+        restore_ms = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            restored = LobbyManager()
+            restored.load(store.load()["manager"])
+            restore_ms.append((time.perf_counter() - start) * 1000)
+        assert len(restored.get_all_lobbies()) == args.lobbies
+
+    print(f"{args.lobbies} lobbies x {args.participants} participants, snapshot {size_kb:.0f} KB")
+    print(f"save:    {save_ms:8.1f} ms")
+    print(f"restore: {min(restore_ms):8.1f} ms best, {max(restore_ms):.1f} ms worst of {args.repeat}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Event loop time spent in logging, before and after the log pipeline.
+
+Runs the same workload on an event loop for each setup: --tasks coroutines, standing in for button and voice handlers,
+each logging lines like the controller's and yielding to the loop in between, until --records records are logged.
+Every logger call is timed on the loop, and the report gives the total and per-call percentiles for:
+
+  file (before)   a FileHandler on the logger, writing and flushing each record on the loop
+  queue text      the LogPipeline: a queue handler on the loop and a writer thread for a rotating file, with the
+                  record fields the format doesn't use skipped
+  queue json      the same with JSON records tagged with lobby/user/guild ids
+
+For the queued setups it also reports how long the writer needed to finish after the workload and how many records
+it dropped. --stall-ms makes every --stall-every'th write stall for that long, like a slow or busy disk does.
+
+    python -m lobbybot.benchmarks.logging_overhead --records 100000 --stall-ms 20 --stall-every 2000
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from lobbybot.log_pipeline import TEXT_FORMAT, JsonFormatter, LogPipeline, SizeAndTimeRotatingFileHandler, log_context
+
+class Stalls:
+    """ Makes every `every`'th write through a handler sleep for `seconds`. """
+    def __init__(self, seconds: float, every: int):
+        self.seconds = seconds
+        self.every = every
+        self.writes = 0
+
+    def wrap(self, handler: logging.Handler) -> logging.Handler:
+        if not self.seconds:
+            return handler
+        emit = handler.emit
+
+        def stalling_emit(record):
+            self.writes += 1
+            if self.writes % self.every == 0:
+                time.sleep(self.seconds)
+            emit(record)
+        handler.emit = stalling_emit
+        return handler
+
+async def workload(logger: logging.Logger, records: int, tasks: int) -> List[float]:
+    """ Runs the handlers and returns how long each logger call took on the loop, in seconds. """
+    timings: List[float] = []
+
+    async def handler(task: int):
+        lobby_id = 1000 + task
+        user_id = 10 ** 17 + task
+        with log_context(lobby_id=lobby_id, user_id=user_id, guild_id=42):
+            for i in range(records // tasks):
+                start = time.perf_counter()
+                logger.info(f"Lobby {lobby_id}: player{task}({user_id}) pressed play button.")
+                timings.append(time.perf_counter() - start)
+                await asyncio.sleep(0)
+
+    await asyncio.gather(*(handler(task) for task in range(tasks)))
+    return timings
+
+def report(name: str, timings: List[float], wall: float, extra: str = ""):
+    timings.sort()
+    def percentile(p):
+        return timings[min(int(len(timings) * p), len(timings) - 1)] * 1e6
+    print(f"{name:<14} {sum(timings) * 1000:9.1f} {percentile(0.5):8.1f} {percentile(0.99):8.1f} {timings[-1] * 1e6:10.1f} "
+          f"{wall * 1000:9.1f}  {extra}")
+
+def run_sync(directory: Path, args, stalls: Stalls):
+    logger = logging.getLogger("bench.file")
+    handler = logging.FileHandler(directory / "sync.log", encoding="utf-8", mode="w")
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    logger.addHandler(stalls.wrap(handler))
+    start = time.perf_counter()
+    timings = asyncio.run(workload(logger, args.records, args.tasks))
+    report("file (before)", timings, time.perf_counter() - start)
+    handler.close()
+
+def run_queued(name: str, directory: Path, args, stalls: Stalls, formatter: logging.Formatter):
+    logger = logging.getLogger(f"bench.{name}")
+    handler = SizeAndTimeRotatingFileHandler(directory / f"{name.replace(' ', '_')}.log", 0, 0, 1)
+    handler.setFormatter(formatter)
+    pipeline = LogPipeline([stalls.wrap(handler)], args.queue_size, skip_unused_fields=True)
+    logger.addHandler(pipeline.handler)
+    pipeline.start()
+    start = time.perf_counter()
+    timings = asyncio.run(workload(logger, args.records, args.tasks))
+    wall = time.perf_counter() - start
+    drain_start = time.perf_counter()
+    pipeline.stop()
+    drain = time.perf_counter() - drain_start
+    report(name, timings, wall, f"writer finished {drain * 1000:.0f}ms later, dropped {pipeline.dropped}")
+    handler.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--queue-size", type=int, default=10_000)
+    parser.add_argument("--stall-ms", type=float, default=0)
+    parser.add_argument("--stall-every", type=int, default=1000)
+    parser.add_argument("--dir", type=Path, help="where to write the logs (a temporary directory by default)")
+    args = parser.parse_args()
+
+    for name in ("bench.file", "bench.queue text", "bench.queue json"):
+        logger = logging.getLogger(name)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    print(f"{args.records} records from {args.tasks} handlers" + (f", a {args.stall_ms:.0f}ms stall every {args.stall_every} writes" if args.stall_ms else ""))
+    print(f"{'setup':<14} {'loop ms':>9} {'p50 us':>8} {'p99 us':>8} {'max us':>10} {'wall ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.dir or Path(tmp)
+        run_sync(directory, args, Stalls(args.stall_ms / 1000, args.stall_every))
+        run_queued("queue text", directory, args, Stalls(args.stall_ms / 1000, args.stall_every), logging.Formatter(TEXT_FORMAT))
+        run_queued("queue json", directory, args, Stalls(args.stall_ms / 1000, args.stall_every), JsonFormatter())
+
+if __name__ == "__main__":
+    main()
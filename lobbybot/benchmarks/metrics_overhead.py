@@ -0,0 +1,59 @@
+"""
+Cost of recording a metric on the hot path.
+
+Times the ways handlers record into the registry (counter increments, histogram observations, labelled lookups and
+the timing context manager) against an empty loop, and reports nanoseconds per observation, plus how long a scrape
+of the resulting page takes.
+
+    python -m lobbybot.benchmarks.metrics_overhead --iterations 1000000
+"""
+import argparse
+import time
+
+from lobbybot.metrics import MetricsRegistry
+
+def per_call_ns(fn, iterations: int) -> float:
+    """ Nanoseconds per call of fn, minus the loop itself. """
+    def loop(body):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            body()
+        return time.perf_counter() - start
+
+    empty = loop(lambda: None)
+    return (loop(fn) - empty) / iterations * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    counter = registry.counter("bench_total", "benchmark counter", ("route", "status"))
+    histogram = registry.histogram("bench_seconds", "benchmark histogram", ("action",))
+    cached_counter = counter.labels("PATCH /channels/{id}/messages/{id}", "200")
+    cached_histogram = histogram.labels("play")
+
+    def timed_block():
+        with cached_histogram.time():
+            pass
+
+    cases = {
+        "counter.inc (cached child)": cached_counter.inc,
+        "counter.labels(...).inc": lambda: counter.labels("PATCH /channels/{id}/messages/{id}", "200").inc(),
+        "histogram.observe (cached child)": lambda: cached_histogram.observe(0.0042),
+        "histogram.labels(...).observe": lambda: histogram.labels("play").observe(0.0042),
+        "with histogram.time()": timed_block,
+    }
+    print(f"{args.iterations} observations each")
+    for name, fn in cases.items():
+        print(f"  {name:<36} {per_call_ns(fn, args.iterations):8.0f} ns")
+
+    for action in ("play", "fill", "leave", "ready_check", "start", "close", "dropout", "end"):
+        histogram.labels(action).observe(0.01)
+    start = time.perf_counter()
+    page = registry.render()
+    print(f"scrape: {(time.perf_counter() - start) * 1000:.2f} ms for {len(page.splitlines())} lines")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from .link_rewriter import Rewriter, LinkRewriters, DEFAULT_REWRITERS, LINK_REWRITERS
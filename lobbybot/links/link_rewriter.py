@@ -0,0 +1,89 @@
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+class Rewriter:
+    """
+    Turns links to one site into links to a mirror that embeds properly in Discord. pattern matches the link (its
+    groups are the parts the mirror needs) and template builds the new link from them with str.format. needles are
+    lowercase substrings every matching message has to contain, for the prefilter.
+    """
+    __slots__ = ("site", "pattern", "template", "needles")
+
+    def __init__(self, site: str, pattern: str, template: str, needles: Tuple[str, ...]):
+        self.site = site
+        self.pattern = pattern
+        self.template = template
+        self.needles = needles
+
+# several rewriters can share a site; guilds turn rewriting on and off by site
+DEFAULT_REWRITERS = [
+    Rewriter("twitter", r"https?://(?:www\.|mobile\.)?(?:twitter|x)\.com/([\w/]+?)/status/(\d+)",
+             "https://fxtwitter.com/{0}/status/{1}", ("twitter.com", "x.com")),
+    Rewriter("instagram", r"https?://(?:www\.)?instagram\.com/(p|reels?|tv)/([\w-]+)",
+             "https://www.kkinstagram.com/{0}/{1}", ("instagram.com",)),
+    Rewriter("tiktok", r"https?://(?:www\.)?tiktok\.com/(@[\w.-]+/video/\d+)",
+             "https://www.vxtiktok.com/{0}", ("tiktok.com",)),
+    Rewriter("tiktok", r"https?://(vm|vt)\.tiktok\.com/(\w+)",
+             "https://{0}.vxtiktok.com/{1}", ("tiktok.com",)),
+    Rewriter("reddit", r"https?://(?:www\.|old\.|new\.)?reddit\.com/(r/\w+/(?:comments|s)/\w+)",
+             "https://www.rxddit.com/{0}", ("reddit.com",)),
+    Rewriter("bluesky", r"https?://bsky\.app/(profile/[\w.:-]+/post/\w+)",
+             "https://fxbsky.app/{0}", ("bsky.app",)),
+]
+
+class _Matcher:
+    """ The rewriters of some set of sites compiled into one pattern, and the needles that can lead to a match. """
+    __slots__ = ("needles", "pattern", "by_group")
+
+    def __init__(self, rewriters: List[Rewriter]):
+        self.needles = tuple(sorted({needle for rewriter in rewriters for needle in rewriter.needles}))
+        # each rewriter's pattern becomes a group of the combined one; that group closes after the ones inside it, so
+        # a match's lastindex says which rewriter matched and where its own groups are
+        parts = []
+        self.by_group: Dict[int, Tuple[Rewriter, int, int]] = {}
+        group = 1
+        for rewriter in rewriters:
+            inner = re.compile(rewriter.pattern).groups
+            parts.append(f"({rewriter.pattern})")
+            self.by_group[group] = (rewriter, group, group + inner)
+            group += 1 + inner
+        self.pattern = re.compile("|".join(parts), re.IGNORECASE)
+
+    def replace(self, match: re.Match) -> str:
+        rewriter, first, last = self.by_group[match.lastindex]
+        return rewriter.template.format(*match.groups()[first:last])
+
+class LinkRewriters:
+    """
+    The rewriters of the sites a guild has on, compiled into one pattern, so a message is scanned once however many
+    sites there are. Most messages have no link at all and leave at the "://" check; messages whose links go elsewhere
+    (gifs, youtube, sites the guild has off) leave at the needle check, before the regex runs. Guilds share only a few
+    sets of sites, so each set is compiled the first time it is used and kept.
+    """
+    def __init__(self, rewriters: Iterable[Rewriter]):
+        self.rewriters: List[Rewriter] = list(rewriters)
+        self.sites = frozenset(rewriter.site for rewriter in self.rewriters)
+        self._matchers: Dict[FrozenSet[str], Optional[_Matcher]] = {}
+
+    def _matcher(self, sites: FrozenSet[str]) -> Optional[_Matcher]:
+        try:
+            return self._matchers[sites]
+        except KeyError:
+            rewriters = [rewriter for rewriter in self.rewriters if rewriter.site in sites]
+            matcher = self._matchers[sites] = _Matcher(rewriters) if rewriters else None
+            return matcher
+
+    def rewrite(self, content: str, sites: FrozenSet[str]) -> Optional[str]:
+        """ content with every link to one of sites rewritten, or None if it has none. """
+        if "://" not in content:
+            return None
+        matcher = self._matcher(sites)
+        if matcher is None:
+            return None
+        lowered = content.lower()
+        if not any(needle in lowered for needle in matcher.needles):
+            return None
+        fixed, count = matcher.pattern.subn(matcher.replace, content)
+        return fixed if count else None
+
+LINK_REWRITERS = LinkRewriters(DEFAULT_REWRITERS)
@@ -1 +1,2 @@
 from .controllers.lobby_controller import LobbyController
+from .controllers.guild_lobbies import GuildLobbyControllers
@@ -1 +1,2 @@
 from .lobby_controller import LobbyController
+from .guild_lobbies import GuildLobbyControllers
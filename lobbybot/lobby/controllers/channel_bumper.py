@@ -0,0 +1,115 @@
+import asyncio
+from logging import getLogger
+from typing import Callable, Iterable, Optional, Set
+
+import discord
+
+from .outbound_queue import OutboundQueue, Priority
+
+logger = getLogger(__name__)
+
+BUMP_INTERVAL = 60 * 5
+
+BoardRenderer = Callable[[Iterable[int]], Optional[discord.Embed]] # lobby ids -> board embed, None if nothing to show
+
+class ChannelBumper:
+    """
+    Keeps one board listing a channel's open lobbies at the bottom of the channel.
+
+    There is one bumper, and at most one task, per channel however many lobbies it holds. Instead of reading the
+    channel history, it is told about every message posted in the channel (note_message), so it knows whether someone
+    has posted over the board. Every BUMP_INTERVAL it reposts the board if someone has posted since, edits it in place
+    if only the lobbies changed, and otherwise does nothing.
+    """
+    def __init__(self, channel: discord.abc.Messageable, render: BoardRenderer, outbound: OutboundQueue,
+                 interval: float = BUMP_INTERVAL):
+        self.channel = channel
+        self.render = render
+        self.outbound = outbound
+        self.interval = interval
+        self.lobby_ids: Set[int] = set()
+        self.board: Optional[discord.Message] = None
+        self._board_dict: Optional[dict] = None # what the board currently shows
+        self._buried = True # unknown until the first message is seen, so assume someone posted
+        self._task: Optional[asyncio.Task] = None
+
+        self.reposts = 0
+        self.edits = 0
+        self.skips = 0
+
+    def add(self, lobby_id: int) -> None:
+        self.lobby_ids.add(lobby_id)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def discard(self, lobby_id: int) -> None:
+        self.lobby_ids.discard(lobby_id)
+        if not self.lobby_ids:
+            self.close()
+
+    def note_message(self, message: discord.Message) -> None:
+        """ Called for every message posted in the channel. Only people bury the board; bot posts are lobby traffic. """
+        self._buried = not message.author.bot
+
+    def close(self) -> None:
+        """ Stops the task and takes the board down. """
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self.board is not None:
+            self._delete_board(self.board)
+            self.board = None
+            self._board_dict = None
+
+    async def _run(self):
+        while self.lobby_ids:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.bump()
+            except Exception as e:
+                logger.warning(f"Failed to bump lobby board in channel {self.channel.id}: {e}")
+
+    async def bump(self) -> None:
+        """ Brings the board up to date, reposting it only if it has been buried. """
+        embed = self.render(sorted(self.lobby_ids))
+        if embed is None:
+            return
+        if self.board is not None and not self._buried:
+            if embed.to_dict() == self._board_dict:
+                self.skips += 1
+                return
+            board = self.board
+            try:
+                await self.outbound.call(Priority.CHANNEL, ("channel", self.channel.id), lambda: board.edit(embed=embed))
+            except discord.NotFound:
+                # someone deleted the board, so it goes back up next time
+                self.board = None
+                self._board_dict = None
+                return
+            self.edits += 1
+        else:
+            if self.board is not None:
+                self._delete_board(self.board)
+            self.board = await self.outbound.call(Priority.CHANNEL, ("channel", self.channel.id),
+                                                  lambda: self.channel.send(embed=embed))
+            self._buried = False
+            self.reposts += 1
+        self._board_dict = embed.to_dict()
+
+    def _delete_board(self, board: discord.Message):
+        deletion = self.outbound.submit(Priority.CLEANUP, ("channel", self.channel.id), board.delete)
+        deletion.add_done_callback(_log_failed_board_delete)
+
+    def stats(self) -> dict:
+        return {
+            "lobbies": len(self.lobby_ids),
+            "reposts": self.reposts,
+            "edits": self.edits,
+            "skips": self.skips,
+        }
+
+def _log_failed_board_delete(future: asyncio.Future):
+    if future.cancelled() or future.exception() is None:
+        return
+    if not isinstance(future.exception(), discord.NotFound):
+        logger.warning(f"Failed to delete lobby board: {future.exception()}")
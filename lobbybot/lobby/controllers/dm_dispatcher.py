@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Iterable, Optional, Set
+
+import discord
+
+from lobbybot.metrics import DM_FANOUT_SECONDS, DM_MESSAGES
+from lobbybot.metrics.tracing import span
+from .outbound_queue import OutboundQueue, Priority
+
+logger = getLogger(__name__)
+
+MAX_CONCURRENT_DMS = 5 # DM sends in flight at once without an outbound queue; opening DM channels shares one global bucket
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 1.0 # seconds before the first retry, doubled after each one
+DM_CHANNEL_CACHE_SIZE = 2048
+DM_STALE_AFTER = 5 * 60 # seconds a DM can wait in the outbound queue before it isn't worth sending
+
+class DMDispatcher:
+    """
+    Sends the same embed to a group of users as DMs, concurrently, without holding up whoever asked for it.
+
+    Without an outbound queue, at most MAX_CONCURRENT_DMS sends are in flight across every fan-out. discord.py already
+    waits out 429s per route bucket, and the semaphore keeps a big lobby from queueing dozens of requests onto those
+    buckets at once. With an outbound queue, the queue's own in-flight limit does that job instead, DMs go out behind
+    lobby message updates, and they are dropped if they waited past DM_STALE_AFTER. DM channels are cached per user,
+    so a repeat DM is a single request. Server errors and rate limits are retried with exponential backoff. Users who
+    have DMs closed (Forbidden) are not retried.
+    """
+    def __init__(self, outbound: Optional[OutboundQueue] = None, max_concurrent: int = MAX_CONCURRENT_DMS):
+        self.outbound = outbound
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._dm_channels: "OrderedDict[int, discord.abc.Messageable]" = OrderedDict() # user id -> DM channel, LRU
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+        self.retries = 0
+        self.dropped = 0
+        self.fanouts = 0
+        self.total_fanout_time = 0.0
+
+    def send(self, client: discord.Client, user_ids: Iterable[int], embed: discord.Embed) -> Optional[asyncio.Task]:
+        """ Starts DMing embed to every user in user_ids and returns right away. Returns the fan-out task, if any. """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return None
+        # started here rather than in the task, which may only run once the caller's trace is over
+        fan_out_span = span("dm fan-out", recipients=len(user_ids))
+        task = asyncio.create_task(self._fan_out(client, user_ids, embed, fan_out_span))
+        # keep a reference so the task isn't garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _fan_out(self, client: discord.Client, user_ids: list, embed: discord.Embed, fan_out_span):
+        start = time.perf_counter()
+        with fan_out_span:
+            await asyncio.gather(*(self._send_one(client, user_id, embed) for user_id in user_ids))
+        elapsed = time.perf_counter() - start
+        self.fanouts += 1
+        self.total_fanout_time += elapsed
+        DM_FANOUT_SECONDS.observe(elapsed)
+
+    async def _dm_channel(self, client: discord.Client, user_id: int):
+        channel = self._dm_channels.get(user_id)
+        if channel is not None:
+            self._dm_channels.move_to_end(user_id)
+            return channel
+        user = client.get_user(user_id) or await client.fetch_user(user_id)
+        channel = user.dm_channel or await user.create_dm()
+        self._dm_channels[user_id] = channel
+        if len(self._dm_channels) > DM_CHANNEL_CACHE_SIZE:
+            self._dm_channels.popitem(last=False)
+        return channel
+
+    async def _deliver(self, client: discord.Client, user_id: int, embed: discord.Embed) -> bool:
+        channel = await self._dm_channel(client, user_id)
+        await channel.send(embed=embed)
+        return True
+
+    async def _send_one(self, client: discord.Client, user_id: int, embed: discord.Embed):
+        backoff = RETRY_BACKOFF
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                if self.outbound is None:
+                    async with self._semaphore:
+                        sent = await self._deliver(client, user_id, embed)
+                else:
+                    # no semaphore here: it would stay held while the DM waits behind other requests in the queue,
+                    # limiting DMs twice and holding them up behind unrelated channel and cleanup work
+                    sent = await self.outbound.call(Priority.DM, ("dm", user_id),
+                                                    lambda: self._deliver(client, user_id, embed),
+                                                    stale_after=DM_STALE_AFTER)
+                if sent:
+                    self.sent += 1
+                    DM_MESSAGES.labels("sent").inc()
+                else:
+                    self.dropped += 1
+                    DM_MESSAGES.labels("dropped").inc()
+                return
+            except discord.Forbidden:
+                # DMs closed, or no shared server any more
+                self.blocked += 1
+                DM_MESSAGES.labels("blocked").inc()
+                self._dm_channels.pop(user_id, None)
+                return
+            except discord.HTTPException as e:
+                if attempt == MAX_ATTEMPTS or (e.status < 500 and e.status != 429):
+                    self.failed += 1
+                    DM_MESSAGES.labels("failed").inc()
+                    logger.warning(f"Failed to DM user {user_id} after {attempt} attempt(s) -- {e}")
+                    return
+            except Exception as e:
+                self.failed += 1
+                DM_MESSAGES.labels("failed").inc()
+                logger.exception(f"Unexpected error while DMing user {user_id} -- {e}")
+                return
+            self.retries += 1
+            DM_MESSAGES.labels("retried").inc()
+            await asyncio.sleep(backoff)
+            backoff *= 2
+
+    def stats(self) -> dict:
+        """ Delivery counts, DM fan-outs still running, and average time for a fan-out to finish. """
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "in_flight_fanouts": len(self._tasks),
+            "avg_fanout_ms": self.total_fanout_time / self.fanouts * 1000 if self.fanouts else 0.0,
+            "cached_dm_channels": len(self._dm_channels),
+        }
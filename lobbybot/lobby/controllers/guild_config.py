@@ -0,0 +1,38 @@
+import json
+from logging import getLogger
+from typing import Dict, FrozenSet, Optional
+
+from lobbybot.settings import BUMP_LOBBY_CHANNEL_ID, LINK_REWRITE_SITES
+
+logger = getLogger(__name__)
+
+class GuildConfig:
+    """ Per-guild settings. Guilds missing from the config file get the defaults from the environment. """
+    __slots__ = ("guild_id", "bump_channel_id", "link_sites")
+
+    def __init__(self, guild_id: Optional[int], bump_channel_id: int = BUMP_LOBBY_CHANNEL_ID,
+                 link_sites: FrozenSet[str] = LINK_REWRITE_SITES):
+        self.guild_id = guild_id
+        self.bump_channel_id = bump_channel_id
+        self.link_sites = link_sites # sites whose links are rewritten in this guild's messages
+
+    @classmethod
+    def from_dict(cls, guild_id: int, data: dict) -> "GuildConfig":
+        link_sites = data.get("link_rewrites")
+        return cls(guild_id, int(data.get("bump_channel_id") or BUMP_LOBBY_CHANNEL_ID),
+                   frozenset(link_sites) if link_sites is not None else LINK_REWRITE_SITES)
+
+def load_guild_configs(path: str) -> Dict[int, GuildConfig]:
+    """
+    Reads {"<guild id>": {"bump_channel_id": ..., "link_rewrites": ["twitter", ...]}, ...} from path. A missing file
+    means every guild uses the defaults.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to read guild config {path}, using defaults for every guild: {e}")
+        return {}
+    return {int(guild_id): GuildConfig.from_dict(int(guild_id), entry) for guild_id, entry in data.items()}
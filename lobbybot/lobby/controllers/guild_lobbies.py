@@ -0,0 +1,100 @@
+import asyncio
+import os
+from logging import getLogger
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import discord
+
+from lobbybot.settings import GUILD_CONFIG_PATH, LOBBY_SNAPSHOT_PATH, LOBBY_JOURNAL_PATH, LOBBY_STATE_BACKEND, LOBBY_STATE_DB_PATH
+from .guild_config import GuildConfig, load_guild_configs
+from .lobby_controller import LobbyController
+from .outbound_queue import OutboundQueue
+from .dm_dispatcher import DMDispatcher
+from .lobby_state_backend import LobbyStateBackend, make_lobby_state_backend
+
+logger = getLogger(__name__)
+
+def guild_snapshot_path(guild_id: int) -> Path:
+    return LOBBY_SNAPSHOT_PATH.with_name(f"{LOBBY_SNAPSHOT_PATH.stem}.{guild_id}{LOBBY_SNAPSHOT_PATH.suffix}")
+
+def guild_journal_path(guild_id: int) -> Path:
+    return LOBBY_JOURNAL_PATH.with_name(f"{LOBBY_JOURNAL_PATH.name}.{guild_id}")
+
+class GuildLobbyControllers:
+    """
+    One LobbyController per guild, so each guild's lobbies, indexes, timers and snapshot files are separate, and a
+    guild's lobby ids only mean something within it. Everything is looked up by the guild an event came from.
+
+    The outbound queue and DM dispatcher are shared, since rate limits are per bot, not per guild. So is the lobby state
+    backend, which other processes may share too; its change notifications are routed to the guild they belong to.
+    Guild settings come from GUILD_CONFIG_PATH, falling back to the environment defaults.
+    """
+    def __init__(self, config_path: str = GUILD_CONFIG_PATH, state_backend: Optional[LobbyStateBackend] = None):
+        self.configs: Dict[int, GuildConfig] = load_guild_configs(config_path)
+        self.state_backend = state_backend or make_lobby_state_backend(LOBBY_STATE_BACKEND, LOBBY_STATE_DB_PATH)
+        self.outbound = OutboundQueue()
+        self.dms = DMDispatcher(self.outbound)
+        self._controllers: Dict[int, LobbyController] = {}
+        self._legacy_guild: Optional[int] = None # guild that took over the snapshot from before guilds were split
+
+    def get(self, guild_id: int) -> LobbyController:
+        """ Returns the guild's controller, creating it if this is the guild's first event. """
+        controller = self._controllers.get(guild_id)
+        if controller is None:
+            snapshot_path, journal_path = guild_snapshot_path(guild_id), guild_journal_path(guild_id)
+            if guild_id == self._legacy_guild:
+                snapshot_path, journal_path = LOBBY_SNAPSHOT_PATH, LOBBY_JOURNAL_PATH
+            controller = self._controllers[guild_id] = LobbyController(
+                guild_id, self.config(guild_id),
+                self.outbound, self.dms, snapshot_path, journal_path, self.state_backend)
+        return controller
+
+    def config(self, guild_id: int) -> GuildConfig:
+        """ The guild's settings, from the config file or the defaults. """
+        config = self.configs.get(guild_id)
+        if config is None:
+            config = self.configs[guild_id] = GuildConfig(guild_id)
+        return config
+
+    def find(self, guild_id: Optional[int]) -> Optional[LobbyController]:
+        """ Returns the guild's controller if it has one, without creating it. """
+        return self._controllers.get(guild_id) if guild_id is not None else None
+
+    def __iter__(self) -> Iterator[LobbyController]:
+        return iter(list(self._controllers.values()))
+
+    def __len__(self) -> int:
+        return len(self._controllers)
+
+    async def restore(self, client: discord.Client):
+        """ Restores every guild the bot is in, in parallel. Guilds restore once; later calls only pick up new guilds. """
+        guilds = client.guilds
+        if (len(guilds) == 1 and not self._controllers and os.path.exists(LOBBY_SNAPSHOT_PATH)
+                and not os.path.exists(guild_snapshot_path(guilds[0].id))):
+            # a single-guild deployment upgrading from one global snapshot keeps its lobbies
+            self._legacy_guild = guilds[0].id
+        await self.state_backend.start(self._on_stored_change)
+        await asyncio.gather(*(self.get(guild.id).restore(client) for guild in guilds))
+        logger.info(f"Lobby controllers ready for {len(guilds)} guild(s)")
+
+    def _on_stored_change(self, guild_id: int, lobby_id: int, version: int):
+        controller = self._controllers.get(guild_id)
+        if controller and controller.state_sync:
+            controller.state_sync.notify(lobby_id, version)
+
+    def resource_counts(self) -> dict:
+        """ resource_counts() of every guild, summed. """
+        totals: dict = {"guilds": len(self._controllers)}
+        leaked: dict = {}
+        for controller in self:
+            counts = controller.resource_counts()
+            for name, count in counts.pop("leaked").items():
+                leaked[name] = leaked.get(name, 0) + count
+            for name, count in counts.items():
+                totals[name] = totals.get(name, 0) + count
+        # shared by every guild, so counted once
+        totals["dm_fanouts"] = self.dms.stats()["in_flight_fanouts"]
+        totals["outbound_in_flight"] = self.outbound.stats()["in_flight"]
+        totals["leaked"] = leaked
+        return totals
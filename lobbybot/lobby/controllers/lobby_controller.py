@@ -1,9 +1,11 @@
 import discord
 import asyncio
-from collections import defaultdict
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Optional, List
 from lobbybot.lobby.models import LobbyManager, Lobby, LobbyAddResult, LobbyRemoveResult, LobbyState, ReadyResult, Player
+from lobbybot.lobby.models.player import voice_channel_id
 from lobbybot.lobby.views import (
     WaitingLobbyView, 
     ActiveLobbyView,
@@ -11,11 +13,27 @@ from lobbybot.lobby.views import (
     LobbySelectView,
     CloseConfirmationView,
     ReadyCheckLobbyView,
+    parse_lobby_custom_id,
     make_lobby_notif_embed,
-    make_lobby_invite_embed
+    make_lobby_invite_embed,
+    make_lobby_overview_embed
 )
 from lobbybot.timezones import get_time_zone, parse_time_input, ASAP_TIME
-from lobbybot.settings import BUMP_LOBBY_CHANNEL_ID
+from lobbybot.settings import LOBBY_SNAPSHOT_PATH, LOBBY_JOURNAL_PATH
+from lobbybot.metrics import BUTTON_SECONDS, LOBBY_UPDATE_SECONDS, timed, trace, traced
+from lobbybot.log_pipeline import bind_log_context
+from .lobby_snapshot_store import LobbySnapshotStore
+from .lobby_journal import LobbyJournal, replay
+from .lobby_scheduler import LobbyScheduler, TimerKind
+from .lobby_mailbox import LobbyMailboxes, serialized
+from .lobby_message_stats import MessageUpdateStats
+from .lobby_message import LobbyMessage, AnyMessage
+from .dm_dispatcher import DMDispatcher
+from .outbound_queue import OutboundQueue, Priority
+from .channel_bumper import ChannelBumper
+from .guild_config import GuildConfig
+from .lobby_state_backend import LobbyStateBackend
+from .lobby_state_sync import LobbyStateSync
 import logging
 logger = logging.getLogger(__name__)
 
@@ -23,15 +41,50 @@ logger = logging.getLogger(__name__)
 READY_CHECK_DURATION = 600 # 10 minutes
 FIVE_MINS = 60 * 5
 ONE_HOUR = 60 * 60
+EDIT_COALESCE_WINDOW = 0.5 # seconds; lobby changes within this window go out as a single edit
+SNAPSHOT_INTERVAL = 60 # seconds between snapshots; the journal covers everything in between
+
+def _log_failed_delete(future: asyncio.Future):
+    if future.cancelled() or future.exception() is None:
+        return
+    if not isinstance(future.exception(), discord.NotFound): # already gone
+        logger.warning(f"Failed to delete message: {future.exception()}")
+
 class LobbyController:
-    """Main controller for handling lobby operations"""
+    """
+    Main controller for handling lobby operations. There is one per guild (see GuildLobbyControllers), each with its
+    own lobbies, timers, mailboxes and snapshot files; only the outbound queue and DM dispatcher are shared.
+    """
     
-    def __init__(self):
+    def __init__(self, guild_id: Optional[int] = None, config: Optional[GuildConfig] = None,
+                 outbound: Optional[OutboundQueue] = None, dms: Optional[DMDispatcher] = None,
+                 snapshot_path=LOBBY_SNAPSHOT_PATH, journal_path=LOBBY_JOURNAL_PATH,
+                 state_backend: Optional[LobbyStateBackend] = None):
+        self.guild_id = guild_id
+        self.config = config or GuildConfig(guild_id)
         self.lobby_manager = LobbyManager() 
         self.lobby_to_view: dict[int, discord.ui.View] = {} # lobby id -> view
-        self.lobby_to_msg: dict[int, discord.Message] = {} # lobby id -> message NOTE: you must fetch the message from an interaction response so the webhook doesn't expire
-        self.spam_tasks = {}
+        self.lobby_to_msg: dict[int, LobbyMessage] = {} # lobby id -> message handle; it deals with the interaction webhook expiring
+        self.scheduler = LobbyScheduler() # every lobby timer runs from here, keyed by (lobby id, TimerKind)
+        self.mailboxes = LobbyMailboxes() # handlers decorated with @serialized run one at a time per lobby
+        self.message_stats = MessageUpdateStats()
+        self.outbound = outbound or OutboundQueue() # Discord calls other than interaction responses, lobby message updates first
+        self.dms = dms or DMDispatcher(self.outbound) # lobby notifications DM'd in the background
+        self.lobby_msg_render: dict[int, tuple[discord.ui.View, discord.Embed]] = {} # lobby id -> (view, embed) the message currently shows
+        self.auto_close_at: dict[int, tuple[int, LobbyState]] = {} # lobby id -> (utc deadline, state the auto close applies to)
+        self.bumpers: dict[int, ChannelBumper] = {} # channel id -> the one board of open lobbies kept at its bottom
+        # lobbies mirrored to a backend other processes can share, if there is one
+        self.state_sync = LobbyStateSync(state_backend, guild_id, self.lobby_manager, self._reload_lobby) if state_backend else None
+
+        self.snapshot_store = LobbySnapshotStore(snapshot_path)
+        self.journal_path = journal_path
+        self.journal: Optional[LobbyJournal] = None # opened by restore, after the journal tail has been replayed
+        self._snapshot_writer = ThreadPoolExecutor(max_workers=1) # one writer so snapshots land in order
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._restored = False
+        self.client: Optional[discord.Client] = None # set once the bot is ready, for work that has no interaction
     
+    @traced()
     async def create_lobby(self, interaction: discord.Interaction, time: str, 
                           lobby_size: int = 5, game: str = "Valorant"):
         """Create a new lobby"""
@@ -56,12 +109,19 @@ class LobbyController:
         if not parsed_time:
             return  # error message already sent in parse_time_input
         
+        # with a shared backend the id comes from it, so another process can't create a lobby with the same id
+        lobby_id = await self.state_sync.allocate_id() if self.state_sync else None
         lobby = self.lobby_manager.create_lobby(
             owner=owner,
             time=parsed_time,
             max_players=lobby_size,
-            game=game
+            game=game,
+            lobby_id=lobby_id
         )
+        if lobby is None:
+            # a second /lobby from the same owner got here while the first was parsing its time
+            await interaction.response.send_message("You already have an active lobby! If this is a mistake, run /close.", ephemeral=True, delete_after=FIVE_MINS)
+            return
         
         # automatically close lobby after 6 hours
         if parsed_time == ASAP_TIME:
@@ -70,20 +130,21 @@ class LobbyController:
             timeout = parsed_time - int(datetime.now().timestamp()) + 10800 # 3 hours for listed time lobbies
         
         # create view and setup lobby
-        view = WaitingLobbyView(timeout=timeout, lobby=lobby, controller=self)
+        view = WaitingLobbyView(lobby)
         self.lobby_to_view[lobby.id] = view
         
-        # setup spam updates if in bump channel
-        if interaction.channel_id == BUMP_LOBBY_CHANNEL_ID:
-            self._setup_spam_updates(lobby, interaction.channel)
-        
         # send initial message
-
         await self._update_lobby_message(lobby=lobby, view=view, interaction=interaction)
+
+        # list it on the channel's board if in bump channel
+        if interaction.channel_id == self.config.bump_channel_id:
+            self._bumper(interaction.channel).add(lobby.id)
         
         # setup auto-close
-        asyncio.create_task(self._auto_close_lobby(lobby, timeout, LobbyState.WAITING))
+        self._schedule_auto_close(lobby, timeout, LobbyState.WAITING)
     
+    @traced()
+    @serialized
     async def handle_join_lobby(self, interaction: discord.Interaction, lobby: Lobby, 
                                user: discord.Member, is_filler: bool = False):
         """Handle user joining lobby as player or filler"""
@@ -102,6 +163,8 @@ class LobbyController:
         else:
             await self._handle_add_result(interaction, result, is_filler)
     
+    @traced()
+    @serialized
     async def handle_leave_lobby(self, interaction: discord.Interaction, lobby: Lobby, user: discord.Member):
         """Handle user leaving lobby"""
         if lobby.is_completed():
@@ -110,9 +173,51 @@ class LobbyController:
         
         await self._handle_participant_dropout(interaction, lobby, user)
     
+    # ---------------------
+    # Lobby message buttons
+    # ---------------------
+    async def handle_lobby_button(self, interaction: discord.Interaction) -> bool:
+        """
+        Routes a lobby message button click to its handler, looking the lobby up by the id in the button's custom_id.
+        Returns False for interactions that aren't lobby buttons.
+        """
+        if interaction.type != discord.InteractionType.component:
+            return False
+        parsed = parse_lobby_custom_id(interaction.data.get("custom_id", ""))
+        if parsed is None:
+            return False
+        action, lobby_id = parsed
+        bind_log_context(lobby_id=lobby_id, user_id=interaction.user.id, guild_id=self.guild_id)
+        logger.info(f"Lobby {lobby_id}: {interaction.user.name}({interaction.user.id}) pressed {action} button.")
+
+        lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
+        handler = self._button_handlers.get(action)
+        if lobby is None or handler is None:
+            await interaction.response.send_message("This lobby is already completed! 🙊", ephemeral=True, delete_after=FIVE_MINS)
+            return True
+        with trace(f"button {action}", lobby=lobby_id, user=interaction.user.id), BUTTON_SECONDS.labels(action).time():
+            await handler(self, interaction, lobby)
+        return True
+
+    _button_handlers = {
+        "play": lambda self, interaction, lobby: self.handle_join_lobby(interaction, lobby, interaction.user, is_filler=False),
+        "fill": lambda self, interaction, lobby: self.handle_join_lobby(interaction, lobby, interaction.user, is_filler=True),
+        "leave": lambda self, interaction, lobby: self.handle_leave_lobby(interaction, lobby, interaction.user),
+        "ready_check": lambda self, interaction, lobby: self.handle_start_ready_check(interaction, lobby),
+        "start": lambda self, interaction, lobby: self.handle_start_lobby(interaction, lobby, forced=False),
+        "close": lambda self, interaction, lobby: self.handle_close_lobby(interaction, lobby),
+        "dropout": lambda self, interaction, lobby: self.handle_dropout_active(interaction, lobby, interaction.user),
+        "end": lambda self, interaction, lobby: self.handle_end_lobby(interaction, lobby),
+        "ready": lambda self, interaction, lobby: self.handle_ready(interaction, lobby),
+        "not_ready": lambda self, interaction, lobby: self.handle_not_ready(interaction, lobby),
+        "cancel_ready": lambda self, interaction, lobby: self.handle_end_ready_check(interaction, lobby),
+    }
+
     # ---------------------
     # Ready Check
     # ---------------------
+    @traced()
+    @serialized
     async def handle_start_ready_check(self ,interaction: discord.Interaction, lobby: Lobby):
         """ Handle starting ready check from a waiting lobby state """
         if lobby.is_completed():
@@ -123,50 +228,59 @@ class LobbyController:
             await interaction.response.send_message("You can't start ready check for this lobby, you're not playing in it! 😡", ephemeral=True, delete_after=FIVE_MINS)
             return False
 
+        # answer the click before the ping, which can wait on the channel's rate limit for longer than Discord waits
+        await interaction.response.defer()
         lobby.start_ready_check()
         # ping all players
         msg = ""
         for player in lobby.get_players:
             msg += f"<@{player.id}>"
-        await interaction.channel.send(msg, delete_after=ONE_HOUR)
+        await self._post(interaction.channel, msg, delete_after=ONE_HOUR)
         # create new view
-        ready_check_view = ReadyCheckLobbyView(READY_CHECK_DURATION, lobby, self, int((datetime.now(timezone.utc)).timestamp()) + READY_CHECK_DURATION)
+        ready_check_view = ReadyCheckLobbyView(lobby, int((datetime.now(timezone.utc)).timestamp()) + READY_CHECK_DURATION)
         self.lobby_to_view[lobby.id] = ready_check_view
-        await self._update_lobby_message(lobby=lobby, view=ready_check_view, interaction=interaction)
+        self._journal("ready_check", lobby.id, ready_check_view.timeout_time_utc)
+        await self._update_lobby_message(lobby=lobby, view=ready_check_view, interaction=interaction, repost=True)
 
-        asyncio.create_task(self._ready_check_timeout(lobby, READY_CHECK_DURATION))
+        self.scheduler.schedule(lobby.id, TimerKind.READY_CHECK, READY_CHECK_DURATION, lambda: self._ready_check_timeout(lobby.id))
 
         end_time = int((datetime.now(timezone.utc)).timestamp()) + READY_CHECK_DURATION
         
-        for player in lobby.get_players:
-            dm_embed = make_lobby_notif_embed(lobby, f"'s ready check has started!\nThe deadline to respond is <t:{end_time}:R>", interaction.guild_id, interaction.channel_id)
-        
-            try:
-                user = interaction.client.get_user(player.id) or await interaction.client.fetch_user(player.id)
-                await user.send(embed=dm_embed)
-            except Exception as e:
-                    logger.exception(f"Unexpected error while DMing user {player.id} -- {e}")
+        dm_embed = make_lobby_notif_embed(lobby, f"'s ready check has started!\nThe deadline to respond is <t:{end_time}:R>", interaction.guild_id, interaction.channel_id)
+        self.dms.send(interaction.client, (player.id for player in lobby.get_players), dm_embed)
     
-    async def _ready_check_timeout(self, lobby: Lobby, timeout: int):
-        await asyncio.sleep(timeout)
-        
-        if lobby.state != LobbyState.READY_CHECK or lobby.is_completed():
+    @serialized
+    async def _ready_check_timeout(self, lobby_id: int):
+        # timers hold the id, not the lobby, since a sync from the state backend can replace the object meanwhile
+        lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
+        if lobby is None or lobby.state != LobbyState.READY_CHECK or lobby.is_completed():
             return
         
         if lobby.all_ready(True):
             lobby.start_from_ready_check()
             logger.info(f"Starting {lobby.id} due to successful ready check timeout.")
-            await self.lobby_to_msg[lobby.id].channel.send(
+            await self._post(
+                self.lobby_to_msg[lobby.id].channel,
                 "Ready Check timing out...\nAny pending or declined players are being replaced with ready fillers.", 
                 delete_after=ONE_HOUR
                 )
             await self._handle_after_starting_lobby(lobby)
         else:
             logger.info(f"Returning {lobby.id} to waiting due to unsuccessful ready check timeout.")
+            # the lobby might close here, taking its message with it
+            channel = self.lobby_to_msg[lobby.id].channel
             await self._end_ready_check(None, lobby)
-            await self.lobby_to_msg[lobby.id].channel.send("Ready Check timing out...\nNot enough players were ready! Lobby is returning to waiting for more players.", delete_after=ONE_HOUR)
+            if lobby.is_completed():
+                return
+            await self._post(channel, "Ready Check timing out...\nNot enough players were ready! Lobby is returning to waiting for more players.", delete_after=ONE_HOUR)
 
+    @traced()
+    @serialized
     async def handle_ready(self, interaction: discord.Interaction, lobby: Lobby):
+        # a click that was queued behind the one that started the lobby would otherwise start it again
+        if lobby.state != LobbyState.READY_CHECK:
+            await interaction.response.send_message("No one asked if you're ready! 🤣", ephemeral=True, delete_after=FIVE_MINS)
+            return
         res = lobby.ready_up(interaction.user)
 
         if res == ReadyResult.NOT_IN_LOBBY:
@@ -182,20 +296,20 @@ class LobbyController:
                 await interaction.followup.send("You've successfully readied up!", ephemeral=True)
 
     async def _end_ready_check(self, interaction: discord.Interaction, lobby: Lobby):
+        self.scheduler.cancel(lobby.id, TimerKind.READY_CHECK)
         res = lobby.end_ready_check()
         if res == LobbyRemoveResult.LOBBY_EMPTY:
-            await interaction.channel.send(f"{lobby.owner.name}'s lobby is closing as there are no players or fillers ready to play.", delete_after=ONE_HOUR)
+            channel = interaction.channel if interaction else self.lobby_to_msg[lobby.id].channel
+            await self._post(channel, f"{lobby.owner.name}'s lobby is closing as there are no players or fillers ready to play.", delete_after=ONE_HOUR)
             await self._close_lobby_internal(lobby.owner.id, interaction)
             return
         
-        if lobby.time == ASAP_TIME:
-            timeout = 21600  # 6 hours
-        else:
-            timeout = lobby.time - int(datetime.now().timestamp()) + 10800 # 3 hours for listed time lobbies
-        waiting_view = WaitingLobbyView(timeout=timeout, lobby=lobby, controller=self)
+        waiting_view = WaitingLobbyView(lobby)
         self.lobby_to_view[lobby.id] = waiting_view
         await self._update_lobby_message(lobby=lobby, view=waiting_view, interaction=interaction)
         
+    @traced()
+    @serialized
     async def handle_not_ready(self, interaction: discord.Interaction, lobby: Lobby) -> bool:
         res = lobby.unready(interaction.user)
 
@@ -209,11 +323,11 @@ class LobbyController:
         
         elif res == ReadyResult.SUCCESS_PLAYER:
             # if there are no backup players, end the ready check and return to waiting state
-            if len(lobby.get_fillers) == 0:
+            if lobby.num_fillers == 0:
                 await self._end_ready_check(interaction, lobby)
                 # if there are still players (i.e. we didn't just close the lobby)
-                if lobby.get_players:
-                    await interaction.channel.send(f"Not enough players were ready after {interaction.user} said they were not ready.\nLobby is returning to waiting state.", delete_after=ONE_HOUR)
+                if lobby.num_players:
+                    await self._post(interaction.channel, f"Not enough players were ready after {interaction.user} said they were not ready.\nLobby is returning to waiting state.", delete_after=ONE_HOUR)
             elif lobby.all_ready():
                 lobby.start_from_ready_check()
                 await self._handle_after_starting_lobby(lobby, interaction)
@@ -224,27 +338,24 @@ class LobbyController:
                 msg = f"Player {interaction.user.name} is not ready! This lobby needs a filler!\n"
                 for filler in lobby.get_fillers:
                     msg += f"<@{filler.id}>"
-                await interaction.channel.send(msg, delete_after=ONE_HOUR)
+                await self._post(interaction.channel, msg, delete_after=ONE_HOUR)
                 # dm all fillers
-                for player in lobby.get_fillers:
-                    if not player.is_pending_ready():
-                        continue
-                    dm_embed = make_lobby_notif_embed(lobby, " is about to start and needs fillers!", interaction.guild_id, interaction.channel_id)
-                    try:
-                        user = interaction.client.get_user(player.id) or await interaction.client.fetch_user(player.id)
-                        await user.send(embed=dm_embed)
-                    except Exception as e:
-                        logger.exception(f"Unexpected error while DMing user {player.id} -- {e}")
+                dm_embed = make_lobby_notif_embed(lobby, " is about to start and needs fillers!", interaction.guild_id, interaction.channel_id)
+                self.dms.send(interaction.client, (player.id for player in lobby.get_pending_fillers()), dm_embed)
         elif res == ReadyResult.SUCCESS_FILLER:
             await self._update_lobby_message(lobby=lobby, interaction=interaction)
 
+    @traced()
+    @serialized
     async def handle_end_ready_check(self, interaction: discord.Interaction, lobby: Lobby):
         if not lobby.in_lobby(interaction.user.id):
             await interaction.response.send_message("You can't end ready check for this lobby, you're not playing in it! 😡", ephemeral=True, delete_after=FIVE_MINS)
             return False
         await self._end_ready_check(interaction, lobby)
-        await interaction.channel.send(f"{interaction.user.name} has cancelled Ready Check!", delete_after=ONE_HOUR)
+        await self._post(interaction.channel, f"{interaction.user.name} has cancelled Ready Check!", delete_after=ONE_HOUR)
 
+    @traced()
+    @serialized
     async def handle_start_lobby(self, interaction: discord.Interaction, lobby: Lobby, forced: bool) -> bool:
         """Handle starting a lobby"""
         if lobby.is_completed():
@@ -276,10 +387,13 @@ class LobbyController:
             force_start_view.messaged = await interaction.original_response()
             return True
     
+    @traced()
+    @serialized
     async def handle_force_start_deny(self, lobby: Lobby, interaction: discord.Interaction = None) -> bool:
         """Handle denying force start. Returns True if handled, False otherwise."""
         if lobby.is_completed():
-            await interaction.response.send_message("This lobby is already completed! 🙊", ephemeral=True, delete_after=FIVE_MINS)
+            if interaction:
+                await interaction.response.send_message("This lobby is already completed! 🙊", ephemeral=True, delete_after=FIVE_MINS)
             return False
         
         if interaction and not lobby.in_lobby(interaction.user.id):
@@ -290,9 +404,11 @@ class LobbyController:
         if interaction:
             await interaction.response.send_message("❌ Did not force start. The lobby is still waiting for more players.", delete_after=ONE_HOUR)
         else:
-            await self.lobby_to_msg[lobby.id].channel.send(f"⏰ Force start expired. The lobby is still waiting for more players.", delete_after=ONE_HOUR)
+            await self._post(self.lobby_to_msg[lobby.id].channel, f"⏰ Force start expired. The lobby is still waiting for more players.", delete_after=ONE_HOUR)
         return True
 
+    @traced()
+    @serialized
     async def handle_close_lobby(self, interaction: discord.Interaction, lobby: Lobby=None):
         """Handle closing a lobby -- anyone who is not the owner is asked again to confirm """
         # if there's no explicit lobby passed in, get it by owner
@@ -302,6 +418,7 @@ class LobbyController:
             if not lobby:
                 await interaction.response.send_message("You do not have an active lobby. 😒", ephemeral=True, delete_after=FIVE_MINS)
                 return
+            return await self.handle_close_lobby(interaction, lobby)
         
         if lobby.is_completed():
             await interaction.response.send_message("This lobby is already completed! 🙊", ephemeral=True, delete_after=FIVE_MINS)
@@ -318,6 +435,8 @@ class LobbyController:
         
         await self._close_lobby_internal(lobby.owner.id, interaction)
     
+    @traced()
+    @serialized
     async def handle_close_confirmation(self, msg: discord.Message, user_id: int, interaction: discord.Interaction, lobby: Lobby, close: bool):
         if user_id != interaction.user.id:
             await interaction.response.send_message(f"This is not your interaction!", ephemeral=True, delete_after=FIVE_MINS)
@@ -328,6 +447,8 @@ class LobbyController:
         else:
             await msg.delete() 
 
+    @traced()
+    @serialized
     async def handle_dropout_active(self, interaction: discord.Interaction, lobby: Lobby, user: discord.Member):
         """Handle dropout lobby from active lobby"""
         if lobby.is_completed():
@@ -362,6 +483,8 @@ class LobbyController:
     #     else:
     #         await interaction.response.send_message("A filler wasn't needed yet! 😡", ephemeral=True)
     
+    @traced()
+    @serialized
     async def handle_end_lobby(self, interaction: discord.Interaction, lobby: Lobby):
         """Handle ending an active lobby"""
         if lobby.is_completed():
@@ -379,14 +502,17 @@ class LobbyController:
         
         await self._close_lobby_internal(lobby.owner.id, interaction)
     
+    @traced()
+    @serialized
     async def handle_show_specific_lobby(self, interaction: discord.Interaction, lobby_id: int, **kwargs):
         """Show a specific lobby"""
         lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
         if lobby:
-            await self._update_lobby_message(lobby=lobby, interaction=interaction)
+            await self._update_lobby_message(lobby=lobby, interaction=interaction, repost=True)
         else:
             await interaction.response.send_message("Lobby not found!", ephemeral=True, delete_after=FIVE_MINS)
     
+    @traced()
     async def show_lobbies(self, interaction: discord.Interaction):
         """Show all active lobbies in a dropdown"""
         all_lobbies = self.lobby_manager.get_all_lobbies()
@@ -403,6 +529,7 @@ class LobbyController:
         view = LobbySelectView(120, timezone, all_lobbies, self, self.handle_show_specific_lobby)
         await interaction.response.send_message(view=view, ephemeral=True, delete_after=FIVE_MINS)
 
+    @traced()
     async def bump_lobby(self, interaction: discord.Interaction, user: discord.Member):
         """Bump a user's lobby"""
         lobby = self.lobby_manager.get_lobby_by_owner(user.id)
@@ -410,8 +537,9 @@ class LobbyController:
             await interaction.response.send_message(f"{user.name} did not have an active lobby 😔", ephemeral=True, delete_after=FIVE_MINS)
             return
         
-        await self._update_lobby_message(lobby=lobby, interaction=interaction)
+        await self.handle_show_specific_lobby(interaction, lobby.id)
     
+    @traced()
     async def add_player_to_lobby(self, interaction: discord.Interaction, addee: discord.Member, forced: bool):
         """Force add a player to someone's lobby"""
         player = interaction.user
@@ -420,11 +548,7 @@ class LobbyController:
             await interaction.response.send_message(f"{player.name} was not a part of any lobbies 😔", ephemeral=True, delete_after=FIVE_MINS)
             return
         elif len(lobbies) == 1:
-            result = lobbies[0].add_player(addee, forced=forced)
-            if result == LobbyAddResult.SUCCESS:
-                await self._update_lobby_message(lobby=lobbies[0], interaction=interaction)
-            else:
-                await self._handle_add_result(interaction, result)
+            await self.handle_force_add_to_specific_lobby(interaction, lobbies[0].id, player=addee, forced=forced)
         else:
             timezone = await get_time_zone(interaction.user.id)
             if timezone == "":
@@ -434,11 +558,13 @@ class LobbyController:
             view = LobbySelectView(120, timezone, lobbies, self, self.handle_force_add_to_specific_lobby, player=addee)
             await interaction.response.send_message(view=view, ephemeral=True, delete_after=FIVE_MINS)
                 
+    @traced()
+    @serialized
     async def handle_force_add_to_specific_lobby(self, interaction: discord.Interaction, lobby_id: int, **kwargs):
-        """Force-add a player to a specific lobby. Expects 'player': discord.Member in kwargs. """
+        """Force-add a player to a specific lobby. Expects 'player': discord.Member in kwargs, and optionally 'forced' (default True). """
         lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
         if lobby:
-            result = lobby.add_player(kwargs.get('player'), True)
+            result = lobby.add_player(kwargs.get('player'), kwargs.get('forced', True))
             if result == LobbyAddResult.SUCCESS:
                 await self._update_lobby_message(lobby=lobby, interaction=interaction)
             else:
@@ -446,6 +572,7 @@ class LobbyController:
         else:
             await interaction.response.send_message("Lobby not found!", ephemeral=True, delete_after=FIVE_MINS)
 
+    @traced()
     async def remove_participant_from_lobby(self, interaction: discord.Interaction, removee: discord.Member):
         """Force remove a player to someone's lobby"""
         player = interaction.user
@@ -454,8 +581,7 @@ class LobbyController:
             await interaction.response.send_message(f"{player.name} was not a part of any lobbies 😔", ephemeral=True, delete_after=FIVE_MINS)
             return
         elif len(lobbies) == 1:
-            await self._handle_participant_dropout(interaction, lobbies[0], removee) 
-            await interaction.channel.send(f"{interaction.user.name} has forcefully removed {removee.name} from this lobby!", delete_after=ONE_HOUR)
+            await self.handle_force_remove_from_specific_lobby(interaction, lobbies[0].id, player=removee)
         else:
             timezone = await get_time_zone(interaction.user.id)
             if timezone == "":
@@ -465,62 +591,127 @@ class LobbyController:
             view = LobbySelectView(120, timezone, lobbies, self, self.handle_force_remove_from_specific_lobby, player=removee)
             await interaction.response.send_message(view=view, ephemeral=True, delete_after=FIVE_MINS)
 
+    @traced()
+    @serialized
     async def handle_force_remove_from_specific_lobby(self, interaction: discord.Interaction, lobby_id: int, **kwargs):
         """Force-add a player to a specific lobby. Expects 'player': discord.Member in kwargs. """
         lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
         if lobby:
             removee = kwargs.get('player')
             await self._handle_participant_dropout(interaction, lobby, removee)
-            await interaction.channel.send(f"{interaction.user.name} has forcefully removed {removee.name} from this lobby!", delete_after=ONE_HOUR)
+            await self._post(interaction.channel, f"{interaction.user.name} has forcefully removed {removee.name} from this lobby!", delete_after=ONE_HOUR)
         else:
             await interaction.response.send_message("Lobby not found!", ephemeral=True, delete_after=FIVE_MINS)
 
+    @traced()
+    @timed(LOBBY_UPDATE_SECONDS.labels("request"))
     async def _update_lobby_message(
             self, 
             lobby: Lobby,
             view: discord.ui.View=None,
-            interaction: discord.Interaction=None):
-        """Update the lobby message"""
+            interaction: discord.Interaction=None,
+            repost: bool=False):
+        """
+        Update the lobby message. By default the change is coalesced with any others in the next EDIT_COALESCE_WINDOW
+        and the message is edited in place. repost deletes it and sends it again at the bottom of the channel.
+        """
         if interaction and not interaction.response.is_done():
             await interaction.response.defer()
-        current_view = view or self.lobby_to_view[lobby.id]
+        if view:
+            self.lobby_to_view[lobby.id] = view
+        self.message_stats.requested()
+
+        # slash commands have to be answered with a message of their own
+        if interaction and interaction.type == discord.InteractionType.application_command:
+            repost = True
+        if repost or lobby.id not in self.lobby_to_msg:
+            await self._repost_lobby_message(lobby, interaction)
+        elif not self.scheduler.get(lobby.id, TimerKind.EDIT):
+            self.scheduler.schedule(lobby.id, TimerKind.EDIT, EDIT_COALESCE_WINDOW, lambda: self._flush_lobby_message(lobby.id))
+
+    @serialized
+    async def _flush_lobby_message(self, lobby_id: int):
+        """Edit the lobby message to match the lobby, once per coalescing window"""
+        lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
+        if lobby is None or lobby.is_completed() or lobby.id not in self.lobby_to_msg:
+            return
+        view = self.lobby_to_view[lobby.id]
+        embed = view.create_lobby_embed()
+        if self._message_shows(lobby.id, view, embed):
+            # whatever changed was undone before the edit went out (e.g. join then leave)
+            self.message_stats.skipped()
+            return
+        self._refresh_view_buttons(lobby, view)
+        message = self.lobby_to_msg[lobby.id]
+        # not awaited, so the lobby's other handlers don't wait on rate limits; an edit still queued is replaced by this one
+        self.outbound.submit(
+            Priority.LOBBY_UPDATE, ("channel", message.channel.id),
+            lambda: self._edit_lobby_message(lobby, message, view, embed),
+            key=("edit", message.id))
 
-        # disable play button if lobby is full
-        # lowkey i hate how this is done but every other solution seemed worse
-        if hasattr(current_view, 'play_button') and lobby.is_full():
-            current_view.play_button.disabled = True
-        elif hasattr(current_view, 'play_button'):
-            current_view.play_button.disabled = False
+    @traced()
+    @timed(LOBBY_UPDATE_SECONDS.labels("edit"))
+    async def _edit_lobby_message(self, lobby: Lobby, message: LobbyMessage, view: discord.ui.View, embed: discord.Embed):
+        """Run by the outbound queue once the edit's turn comes"""
+        self.message_stats.made(1, edit=True)
+        try:
+            await message.edit(embed=embed, view=view)
+        except discord.NotFound:
+            # someone deleted the message, so put it back; not from here, since the repost needs this route
+            self.scheduler.schedule(lobby.id, TimerKind.EDIT, 0, lambda: self._restore_lobby_message(lobby.id, message))
+            return
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to edit lobby message for lobby {lobby.id}: {e}")
+            return
+        if self.lobby_to_msg.get(lobby.id) is message:
+            self.lobby_msg_render[lobby.id] = (view, embed)
+
+    @serialized
+    async def _restore_lobby_message(self, lobby_id: int, message: LobbyMessage):
+        """Repost a lobby message that was deleted, unless it was replaced in the meantime"""
+        lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
+        if lobby is not None and not lobby.is_completed() and self.lobby_to_msg.get(lobby.id) is message:
+            await self._repost_lobby_message(lobby)
+
+    def _message_shows(self, lobby_id: int, view: discord.ui.View, embed: discord.Embed) -> bool:
+        """Returns if the lobby message was last sent with exactly this view and rendered embed"""
+        shown = self.lobby_msg_render.get(lobby_id)
+        return shown is not None and shown[0] is view and shown[1] is embed
+
+    @traced()
+    @timed(LOBBY_UPDATE_SECONDS.labels("repost"))
+    async def _repost_lobby_message(self, lobby: Lobby, interaction: discord.Interaction=None):
+        """Delete the lobby message and send it again, as a followup to interaction if there is one"""
+        # the repost renders the latest state, so a pending edit has nothing left to do
+        self.scheduler.cancel(lobby.id, TimerKind.EDIT)
+        current_view = self.lobby_to_view[lobby.id]
+        self._refresh_view_buttons(lobby, current_view)
         
         embed = current_view.create_lobby_embed()
+        calls = 0
         
         if lobby.id in self.lobby_to_msg:
-            try:
-                old_msg = self.lobby_to_msg[lobby.id]
-                await old_msg.delete()
-            except discord.HTTPException as e:
-                if e.code == 50027:  # Invalid Webhook Token
-                    # Refetch as regular message again and delete
-                    logger.warning(f"Webhook expired for lobby message {old_msg.id}, refetching as regular message.")
-                    regular_msg = await old_msg.channel.fetch_message(old_msg.id)
-                    await regular_msg.delete()
-                else:
-                    logger.warning(f"Failed to delete old lobby message: {e}")
-            except Exception as e:
-                logger.warning(f"Failed to delete old lobby message: {e}")
+            # the new message matters more than the old one going away, so the delete can wait
+            calls += 1
+            self._delete_message(self.lobby_to_msg[lobby.id], Priority.CLEANUP)
         
         if interaction:
-            sent = await interaction.followup.send(embed=embed, view=current_view)
-            fetched = await sent.channel.fetch_message(sent.id)
+            sent = await interaction.followup.send(embed=embed, view=current_view, wait=True)
         else:
             if lobby.id in self.lobby_to_msg:
                 channel = self.lobby_to_msg[lobby.id].channel
             else:
                 logger.error(f"No previous emssage foudn for lobby {lobby.id} and no interaction provided")
                 return
-            sent = await channel.send(embed=embed, view=current_view)
-            fetched = await sent.channel.fetch_message(sent.id)
-        self.lobby_to_msg[lobby.id] = fetched
+            sent = await self.outbound.call(Priority.LOBBY_UPDATE, ("channel", channel.id),
+                                            lambda: channel.send(embed=embed, view=current_view))
+        self.message_stats.made(calls + 1, edit=False)
+        self._set_lobby_message(lobby.id, sent)
+        self.lobby_msg_render[lobby.id] = (current_view, embed)
+
+    def _refresh_view_buttons(self, lobby: Lobby, view: discord.ui.View):
+        """Disable the play button if the lobby is full"""
+        view.refresh_buttons()
     
     async def _handle_add_result(self, interaction: discord.Interaction, result: LobbyAddResult, is_filler: bool = False):
         """Handle the result of adding a player/filler"""
@@ -540,23 +731,19 @@ class LobbyController:
             await self._update_lobby_message(lobby=lobby, interaction=interaction)
             if lobby.is_active():
                 # handle when a player drops out of an active lobby
-                if not lobby._fillers:
-                    await self.lobby_to_msg[lobby.id].channel.send("There are no fillers! This lobby needs fillers! 🐀🐁")
+                if not lobby.num_fillers:
+                    await self._post(self.lobby_to_msg[lobby.id].channel, "There are no fillers! This lobby needs fillers! 🐀🐁")
                 else:
                     # Invite all fillers
                     mentions = " ".join(f"<@{filler.id}>" for filler in lobby.get_fillers)
                     channel_embed = make_lobby_invite_embed(lobby)
-                    await self.lobby_to_msg[lobby.id].channel.send(
+                    await self._post(
+                        self.lobby_to_msg[lobby.id].channel,
                         content=mentions,
                         embed=channel_embed
                     )
-                    for player in lobby.get_fillers:
-                        dm_embed = make_lobby_invite_embed(lobby, interaction.guild_id, interaction.channel_id)
-                        try:
-                            user = interaction.client.get_user(player.id) or await interaction.client.fetch_user(player.id)
-                            await user.send(embed=dm_embed)
-                        except Exception as e:
-                            logger.exception(f"Unexpected error while DMing user {player.id} -- {e}")
+                    dm_embed = make_lobby_invite_embed(lobby, interaction.guild_id, interaction.channel_id)
+                    self.dms.send(interaction.client, (player.id for player in lobby.get_fillers), dm_embed)
         elif result == LobbyRemoveResult.SUCCESS_FILLER:
             await self._update_lobby_message(lobby=lobby, interaction=interaction)
         elif result == LobbyRemoveResult.LOBBY_EMPTY:
@@ -577,17 +764,12 @@ class LobbyController:
     
     async def _close_lobby_internal(self, owner_id: int, interaction: Optional[discord.Interaction] = None):
         """Internal method to close a lobby"""
-        lobby_id = self.lobby_manager.get_lobby_by_owner(owner_id).id
+        lobby = self.lobby_manager.get_lobby_by_owner(owner_id)
         success = self.lobby_manager.close_lobby(owner_id)
-        # delete lobby message, if it exists
-        await self.lobby_to_msg[lobby_id].delete()
+        if lobby:
+            self._release_lobby(lobby.id)
         
         if success:
-            # cancel spam task if exists
-            if owner_id in self.spam_tasks:
-                self.spam_tasks[owner_id].cancel()
-                del self.spam_tasks[owner_id]
-            
             message = "Lobby successfully closed. 🔒"
             ephemeral = False
         else:
@@ -597,115 +779,398 @@ class LobbyController:
         if interaction:
             await interaction.response.send_message(content=message, ephemeral=ephemeral, delete_after=ONE_HOUR)
         # If no interaction (auto-close), we would send to the lobby channel
-    
-    def _setup_spam_updates(self, lobby: Lobby, channel):
-        """Setup spam updates for bump channel"""
-        async def spam_update_task():
-            while lobby._state != LobbyState.COMPLETED:
-                await asyncio.sleep(300) # wait 5 minutes between updates
-                
-                # Check if last message is from bot
-                async for message in channel.history(limit=1):
-                    if message.author.bot:
-                        break
-                    else:
-                        # Update the message
-                        embed = self.lobby_to_view[lobby.id].create_lobby_embed()
-                        try:
-                            old_msg = self.lobby_to_msg[lobby.id]
-                            await old_msg.delete()
-                            new_msg = await channel.send(embed=embed, view=self.lobby_to_view[lobby.id])
-                            self.lobby_to_msg[lobby.id] = new_msg
-                        except Exception as e:
-                            logger.warning(f"Failed to update lobby message: {e}")
-                    break
-        
-        task = asyncio.create_task(spam_update_task())
-        self.spam_tasks[lobby.owner.id] = task
-    
-    async def _auto_close_lobby(self, lobby: Lobby, timeout: int, curr_lobby_state: LobbyState):
+
+    def _release_lobby(self, lobby_id: int):
+        """
+        The one teardown path for a closed lobby: drops its view, message handle, render and auto close deadline,
+        cancels its timers, takes it off its channel's board and deletes its message. Anything added to the
+        controller per lobby has to be released here, or resource_counts() will report it as leaked.
+        """
+        self.scheduler.cancel(lobby_id)
+        self.auto_close_at.pop(lobby_id, None)
+        self.lobby_msg_render.pop(lobby_id, None)
+        self.lobby_to_view.pop(lobby_id, None)
+        message = self.lobby_to_msg.pop(lobby_id, None)
+        if message:
+            bumper = self.bumpers.get(message.channel.id)
+            if bumper:
+                bumper.discard(lobby_id)
+            self._delete_message(message, Priority.LOBBY_UPDATE)
+
+    def resource_counts(self) -> dict:
+        """
+        Live object counts per controller structure, for spotting leaks. "leaked" counts per-lobby entries whose lobby
+        is no longer open, which should always be 0.
+        """
+        open_ids = {lobby.id for lobby in self.lobby_manager.get_all_lobbies()}
+        per_lobby = {
+            "lobby_to_view": self.lobby_to_view,
+            "lobby_to_msg": self.lobby_to_msg,
+            "lobby_msg_render": self.lobby_msg_render,
+            "auto_close_at": self.auto_close_at,
+        }
+        timer_ids = {handle.lobby_id for handle in self.scheduler.pending()}
+        board_ids = set().union(*(bumper.lobby_ids for bumper in self.bumpers.values()))
+        leaked = {name: len(d.keys() - open_ids) for name, d in per_lobby.items()}
+        leaked["timers"] = len(timer_ids - open_ids)
+        leaked["bump_boards"] = len(board_ids - open_ids)
+        return {
+            "lobbies": len(open_ids),
+            **{name: len(d) for name, d in per_lobby.items()},
+            "timers": len(self.scheduler),
+            "busy_mailboxes": self.mailboxes.stats()["busy_lobbies"],
+            "bumpers": len(self.bumpers),
+            "bump_board_lobbies": len(board_ids),
+            "dm_fanouts": self.dms.stats()["in_flight_fanouts"],
+            "outbound_in_flight": self.outbound.stats()["in_flight"],
+            "leaked": leaked,
+        }
+
+    def _check_leaks(self):
+        leaked = {name: count for name, count in self.resource_counts()["leaked"].items() if count}
+        if leaked:
+            logger.warning(f"Controller is holding resources for closed lobbies: {leaked}")
+
+    # ---------------------
+    # Bump channel board
+    # ---------------------
+    def _bumper(self, channel: discord.abc.Messageable) -> ChannelBumper:
+        bumper = self.bumpers.get(channel.id)
+        if bumper is None:
+            bumper = self.bumpers[channel.id] = ChannelBumper(channel, self._render_bump_board, self.outbound)
+        return bumper
+
+    def note_message(self, message: discord.Message):
+        """Called for every message the bot sees, so the bump channel's board knows when it has been buried"""
+        if message.channel.id == self.config.bump_channel_id:
+            self._bumper(message.channel).note_message(message)
+
+    def _render_bump_board(self, lobby_ids: List[int]) -> Optional[discord.Embed]:
+        """Lists the given lobbies, with links to their lobby messages"""
+        lobbies, jump_urls = [], []
+        for lobby_id in lobby_ids:
+            lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
+            msg = self.lobby_to_msg.get(lobby_id)
+            if lobby is None or lobby.is_completed() or msg is None:
+                continue
+            lobbies.append(lobby)
+            jump_urls.append(f"https://discord.com/channels/{msg.channel.guild.id}/{msg.channel.id}/{msg.id}")
+        return make_lobby_overview_embed(lobbies, jump_urls) if lobbies else None
+
+    def _schedule_auto_close(self, lobby: Lobby, timeout: int, curr_lobby_state: LobbyState):
+        """Schedule an auto-close, replacing any earlier one, and remember the deadline so it survives a restart"""
+        self.auto_close_at[lobby.id] = (int(time.time()) + timeout, curr_lobby_state)
+        self._journal("auto_close", lobby.id, self.auto_close_at[lobby.id][0], curr_lobby_state.name)
+        self.scheduler.schedule(lobby.id, TimerKind.AUTO_CLOSE, timeout, lambda: self._auto_close_lobby(lobby.id, curr_lobby_state))
+
+    @serialized
+    async def _auto_close_lobby(self, lobby_id: int, curr_lobby_state: LobbyState):
         """Auto-close lobby after timeout"""
-        await asyncio.sleep(timeout)
-        if curr_lobby_state != lobby.state:
+        lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
+        if lobby is None or curr_lobby_state != lobby.state:
             return 
         
         if lobby.state != LobbyState.COMPLETED:
             logger.info(f"Auto-closing lobby {lobby.id} due to timeout.")
             msg = f"{lobby.owner.display_name}'s lobby timing out. Closing lobby." if lobby.state != LobbyState.ACTIVE else \
                 f"{lobby.owner.display_name}'s's lobby timing out. You've been playing for 6 hours. Touch some grass. 🌳"
-            await self.lobby_to_msg[lobby.id].channel.send(msg, delete_after=ONE_HOUR)
+            await self._post(self.lobby_to_msg[lobby.id].channel, msg, delete_after=ONE_HOUR)
             await self._close_lobby_internal(lobby.owner.id)
 
+    @traced("voice state update", root=True)
     async def handle_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
-        lobbies = self.lobby_manager.get_lobbies_by_participant(member.id, active=False)
-        if not lobbies:
+        # this runs for every voice event the bot can see, so drop the common cases first:
+        # mutes, deafens and streams that keep the member in the same channel, and members that aren't in any lobby
+        channel_id = voice_channel_id(after)
+        if voice_channel_id(before) == channel_id or not self.lobby_manager.is_participant(member.id):
             return
-        
-        for lobby in lobbies:
-            lobby.edit_participant_voicestate(member.id, after)
+        bind_log_context(user_id=member.id, guild_id=self.guild_id)
+
+        for lobby in self.lobby_manager.get_lobbies_by_participant(member.id):
+            lobby.set_participant_voice_channel(member.id, channel_id)
             
             # only perform following checks if the lobby is active
             if not lobby.is_active():
                 continue
 
             # if the lobby hasn't become 'voice active' yet (i.e. not everyone, at some point in time, has joined voice), then don't check
-            if not all(player.joined_voice for player in lobby.get_players):
+            if lobby.unjoined_count:
                 continue
 
-            if after.channel == None: # meaning no longer connected to a channel
-                channel_to_participant_count = defaultdict(int)
-                
-                participants = lobby.get_participants()
-                for participant in participants:
-                    # this can happen if person A leaves first and then person B causes this check again
-                    if not participant.voice_state:
-                        continue
-                    if participant.voice_state.channel:
-                        channel_to_participant_count[participant.voice_state.channel.id] += 1
-                
-                # if current players is low, make it so everyone has to leave to close the lobby
-                num_curr_players = len(lobby.get_players)
-                threshold = num_curr_players * 0.5 if num_curr_players > 3 else 1
-                still_active = False
-                for num_participants in channel_to_participant_count.values():
-                    if num_participants >= threshold:
-                        still_active = True
-                
-                # otherwise, threshold not met in any channel, close lobby.
-                if not still_active:
-                    logger.info(f"Auto-closing lobby {lobby.id} due to participants not being in voice.")
-                    logger.info(channel_to_participant_count)
-                    logger.info(lobby)
-                    
-                    await self.lobby_to_msg[lobby.id].channel.send(f"{lobby.owner.display_name}'s lobby is closing because most players left voice! 🙀", delete_after=ONE_HOUR)
-                    await self._close_lobby_internal(lobby.owner.id)
+            if channel_id is None and not self._voice_still_active(lobby): # no longer connected to a channel
+                await self._close_if_voice_empty(lobby)
+
+    def _voice_still_active(self, lobby: Lobby) -> bool:
+        """Returns if some voice channel still holds enough of the lobby's participants"""
+        # if current players is low, make it so everyone has to leave to close the lobby
+        num_curr_players = lobby.num_players
+        threshold = num_curr_players * 0.5 if num_curr_players > 3 else 1
+        return lobby.max_voice_occupancy >= threshold
+
+    @serialized
+    async def _close_if_voice_empty(self, lobby: Lobby):
+        """Close an active lobby once no voice channel holds enough of its participants"""
+        # another update may have closed it while this one was waiting
+        if not lobby.is_active():
+            return
+
+        # threshold not met in any channel, close lobby.
+        if not self._voice_still_active(lobby):
+            logger.info(f"Auto-closing lobby {lobby.id} due to participants not being in voice.")
+            logger.info(lobby.voice_channel_counts())
+            logger.info(lobby)
+            
+            await self._post(self.lobby_to_msg[lobby.id].channel, f"{lobby.owner.display_name}'s lobby is closing because most players left voice! 🙀", delete_after=ONE_HOUR)
+            await self._close_lobby_internal(lobby.owner.id)
 
 
     async def _handle_after_starting_lobby(self, lobby: Lobby, interaction: discord.Interaction = None) -> bool:
-        await interaction.response.defer()
+        # interaction is None when the ready check timed out on its own
+        if interaction:
+            await interaction.response.defer()
+        channel = interaction.channel if interaction else self.lobby_to_msg[lobby.id].channel
+        client = interaction.client if interaction else self.client
+        self.scheduler.cancel(lobby.id, TimerKind.READY_CHECK)
         message_parts = [f"<@{player.id}>" for player in lobby.get_players]
         channel_embed = make_lobby_notif_embed(lobby, " is starting now!")
 
         # update lobby to active state
         timeout = 21600 # 6 hours until timeout for active lobby
-        new_view = ActiveLobbyView(timeout=timeout, lobby=lobby, controller=self)
+        new_view = ActiveLobbyView(lobby)
         self.lobby_to_view[lobby.id] = new_view
         
-        await interaction.channel.send(content=' '.join(message_parts), embed=channel_embed, delete_after=ONE_HOUR)
-        await self._update_lobby_message(lobby=lobby, view=new_view, interaction=interaction)
+        await self._post(channel, content=' '.join(message_parts), embed=channel_embed, delete_after=ONE_HOUR)
+        await self._update_lobby_message(lobby=lobby, view=new_view, interaction=interaction, repost=True)
 
-        dm_embed = make_lobby_notif_embed(lobby, " is starting now!", interaction.guild_id, interaction.channel_id)
-        for player in lobby.get_players:
-            try:
-                user = interaction.client.get_user(player.id) or await interaction.client.fetch_user(player.id)
-                await user.send(embed=dm_embed)
-            except Exception as e:
-                logger.exception(f"Unexpected error while DMing user {player.id} -- {e}")
+        dm_embed = make_lobby_notif_embed(lobby, " is starting now!", channel.guild.id, channel.id)
+        self.dms.send(client, (player.id for player in lobby.get_players), dm_embed)
         
         
         # create new auto close task for the active lobby view
-        asyncio.create_task(self._auto_close_lobby(lobby, timeout, LobbyState.ACTIVE))
+        self._schedule_auto_close(lobby, timeout, LobbyState.ACTIVE)
 
         # update every player's voice state as the baseline now that the lobby is active
-        for player in lobby.get_players:
-            player.update_joined_voice()
+        lobby.update_joined_voice()
+
+    # ---------------------
+    # Outbound requests
+    # ---------------------
+    async def _post(self, channel: discord.abc.Messageable, content: str = None, delete_after: float = None, **kwargs) -> discord.Message:
+        """Send a message to a lobby channel once pending lobby message updates have gone out, deleting it after delete_after"""
+        msg = await self.outbound.call(Priority.CHANNEL, ("channel", channel.id), lambda: channel.send(content, **kwargs))
+        if delete_after is not None:
+            asyncio.get_running_loop().call_later(delete_after, self._delete_message, msg, Priority.CLEANUP)
+        return msg
+
+    def _delete_message(self, msg, priority: Priority):
+        """Queue msg's deletion without waiting for it, dropping any edit of it still queued"""
+        self.outbound.discard(("edit", msg.id))
+        deletion = self.outbound.submit(priority, ("channel", msg.channel.id), msg.delete)
+        deletion.add_done_callback(_log_failed_delete)
+
+    # ---------------------
+    # Shared state
+    # ---------------------
+    def _make_view(self, lobby: Lobby, ready_check_ends_at: Optional[int] = None) -> discord.ui.View:
+        """The view for the lobby's current state"""
+        if lobby.state == LobbyState.READY_CHECK:
+            return ReadyCheckLobbyView(lobby, ready_check_ends_at or int(time.time()))
+        elif lobby.state == LobbyState.ACTIVE:
+            return ActiveLobbyView(lobby)
+        return WaitingLobbyView(lobby)
+
+    def _reload_lobby(self, lobby_id: int):
+        """Called by the state sync when the backend holds a newer copy of the lobby than this process"""
+        self.scheduler.schedule(lobby_id, TimerKind.SYNC, 0, lambda: self._apply_stored_lobby(lobby_id))
+
+    @serialized
+    async def _apply_stored_lobby(self, lobby_id: int):
+        """Replace the lobby with the copy in the state backend, or close it if the backend no longer has it"""
+        stored = await self.state_sync.backend.get(self.guild_id, lobby_id)
+        lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
+        if stored is None:
+            self.state_sync.seen(lobby_id, None)
+            if lobby:
+                with self.state_sync.applying():
+                    self.lobby_manager.close_lobby(lobby.owner.id)
+                self._release_lobby(lobby_id)
+            return
+
+        version, data = stored
+        if not self.state_sync.is_newer(lobby_id, version):
+            return
+        with self.state_sync.applying():
+            self.lobby_manager.replace_lobby(Lobby.from_dict(data))
+        self.state_sync.seen(lobby_id, version)
+        lobby = self.lobby_manager.get_lobby_by_id(lobby_id)
+        if lobby and lobby_id in self.lobby_to_msg:
+            # the old view renders the replaced lobby object
+            ends_at = getattr(self.lobby_to_view.get(lobby_id), "timeout_time_utc", None)
+            await self._update_lobby_message(lobby=lobby, view=self._make_view(lobby, ends_at))
+
+    # ---------------------
+    # Snapshots
+    # ---------------------
+    def snapshot(self) -> dict:
+        """Returns everything needed to bring the open lobbies back after a restart"""
+        messages = {}
+        ready_checks = {}
+        for lobby_id, msg in self.lobby_to_msg.items():
+            if self.lobby_manager.get_lobby_by_id(lobby_id):
+                messages[lobby_id] = [msg.channel.id, msg.id]
+        for lobby_id, view in self.lobby_to_view.items():
+            if isinstance(view, ReadyCheckLobbyView):
+                ready_checks[lobby_id] = view.timeout_time_utc
+        return {
+            "saved_at": int(time.time()),
+            "manager": self.lobby_manager.to_dict(),
+            "messages": messages,
+            "auto_close": {lobby_id: [deadline, state.name] for lobby_id, (deadline, state) in self.auto_close_at.items()},
+            "ready_checks": ready_checks,
+        }
+
+    def _journal(self, op: str, lobby_id: int, *args):
+        """Record controller-side state (messages, timers) alongside the lobby mutations the manager journals"""
+        if self.journal:
+            self.journal.append(op, lobby_id, *args)
+
+    def _set_lobby_message(self, lobby_id: int, msg: AnyMessage):
+        self.lobby_to_msg[lobby_id] = LobbyMessage(msg)
+        self._journal("message", lobby_id, msg.channel.id, msg.id)
+
+    def _write_snapshot(self):
+        """Capture state on the event loop, but leave the disk write to the writer thread"""
+        try:
+            snapshot = self.snapshot()
+        except Exception as e:
+            logger.exception(f"Failed to capture lobby snapshot -- {e}")
+            return
+        if self.journal:
+            # everything up to here is in the snapshot, so those journal segments can go once it is on disk
+            snapshot["journal_seq"] = self.journal.roll()
+        asyncio.get_running_loop().run_in_executor(self._snapshot_writer, self._save_snapshot, snapshot)
+
+    def _save_snapshot(self, snapshot: dict):
+        if self.snapshot_store.save(snapshot) and "journal_seq" in snapshot:
+            self.journal.discard_through(snapshot["journal_seq"])
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            self._write_snapshot()
+            self._check_leaks()
+
+    async def restore(self, client: discord.Client):
+        """Restore lobbies from the last snapshot plus the journal tail, and re-attach their views. Only runs on the first on_ready."""
+        self.client = client
+        if self._restored:
+            return
+        self._restored = True
+
+        start = time.perf_counter()
+        data = self.snapshot_store.load() or {}
+        if data:
+            self.lobby_manager.load(data["manager"])
+        messages = {int(k): v for k, v in data.get("messages", {}).items()}
+        auto_close = {int(k): (deadline, LobbyState[state]) for k, (deadline, state) in data.get("auto_close", {}).items()}
+        ready_checks = {int(k): v for k, v in data.get("ready_checks", {}).items()}
+        loaded = time.perf_counter()
+
+        journal = LobbyJournal(self.journal_path)
+        replayed, _ = replay(self.lobby_manager, journal.read(data.get("journal_seq", 0)), {
+            "message": lambda record: messages.__setitem__(record[2], record[3:5]),
+            "auto_close": lambda record: auto_close.__setitem__(record[2], (record[3], LobbyState[record[4]])),
+            "ready_check": lambda record: ready_checks.__setitem__(record[2], record[3]),
+        })
+        replayed_at = time.perf_counter()
+
+        if self.state_sync:
+            # whatever other processes stored wins over what this one last saw
+            await self.state_sync.reconcile()
+
+        # from here on every change is journaled, including anything re-attaching does
+        self.journal = journal
+        if self.state_sync:
+            self.state_sync.journal = journal
+            self.lobby_manager.journal = self.state_sync
+        else:
+            self.lobby_manager.journal = journal
+        lobbies = self.lobby_manager.get_all_lobbies()
+        # one lobby failing to re-attach mustn't stop the rest of the guild, or its snapshots below, from starting
+        results = await asyncio.gather(*(
+            self._reattach_lobby(client, lobby, messages.get(lobby.id), auto_close.get(lobby.id), ready_checks.get(lobby.id))
+            for lobby in lobbies
+        ), return_exceptions=True)
+        for lobby, result in zip(lobbies, results):
+            if isinstance(result, Exception):
+                logger.error(f"Dropping restored lobby {lobby.id}, re-attaching it failed: {result!r}")
+                self._drop_restored_lobby(lobby)
+
+        logger.info(
+            f"Guild {self.guild_id}: restored {len(lobbies)} lobbies: {(loaded - start) * 1000:.1f}ms to load the snapshot, "
+            f"{(replayed_at - loaded) * 1000:.1f}ms to replay {replayed} journal records, "
+            f"{(time.perf_counter() - start) * 1000:.1f}ms including discord calls"
+        )
+        # start from a fresh snapshot so the next restart has nothing to replay
+        self._write_snapshot()
+        self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def _reattach_lobby(self, client: discord.Client, lobby: Lobby, message: Optional[list],
+                              auto_close: Optional[tuple], ready_check_ends_at: Optional[int]):
+        """Point a restored lobby at its old message with a fresh view, and reschedule its timers"""
+        try:
+            if not message:
+                raise ValueError("no message recorded")
+            channel_id, message_id = message
+            channel = client.get_channel(channel_id) or await client.fetch_channel(channel_id)
+        except Exception as e:
+            logger.warning(f"Dropping restored lobby {lobby.id}, its channel is gone: {e}")
+            self._drop_restored_lobby(lobby)
+            return
+
+        now = int(time.time())
+        # the force start prompt didn't survive the restart
+        lobby.reset_pending()
+
+        ends_at = ready_check_ends_at or now
+
+        view = self._make_view(lobby, ends_at)
+        self._refresh_view_buttons(lobby, view)
+        self.lobby_to_view[lobby.id] = view
+
+        # messages from before lobby buttons had stable custom_ids need the new view to work again
+        msg = channel.get_partial_message(message_id)
+        embed = view.create_lobby_embed()
+        edit_failed = False
+        try:
+            await msg.edit(embed=embed, view=view)
+        except discord.NotFound:
+            try:
+                msg = await channel.send(embed=embed, view=view)
+            except discord.HTTPException as e:
+                logger.warning(f"Dropping restored lobby {lobby.id}, its message is gone and it can't be sent again: {e}")
+                self._drop_restored_lobby(lobby)
+                return
+        except Exception as e:
+            logger.warning(f"Failed to re-attach view for restored lobby {lobby.id}, reposting it: {e}")
+            edit_failed = True
+        self._set_lobby_message(lobby.id, msg)
+        self.lobby_msg_render[lobby.id] = (view, embed)
+        if edit_failed:
+            # the old message may be stale or gone, so don't leave the lobby pointed at it; the repost sends a fresh
+            # one and deletes the old one. If it fails too, restore drops the lobby.
+            await self._repost_lobby_message(lobby)
+
+        # timers go last, since they expect the lobby message to be known
+        if auto_close:
+            deadline, state = auto_close
+            self._schedule_auto_close(lobby, max(deadline - now, 0), state)
+        if lobby.state == LobbyState.READY_CHECK:
+            self.scheduler.schedule(lobby.id, TimerKind.READY_CHECK, max(ends_at - now, 0), lambda: self._ready_check_timeout(lobby.id))
+        if channel.id == self.config.bump_channel_id:
+            self._bumper(channel).add(lobby.id)
+
+    def _drop_restored_lobby(self, lobby: Lobby):
+        """Close a restored lobby that can't be shown again, and release whatever re-attaching it already set up"""
+        self.lobby_manager.close_lobby(lobby.owner.id)
+        self._release_lobby(lobby.id)
@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import time
+from logging import getLogger
+from typing import Iterator, List, Optional, Tuple
+
+logger = getLogger(__name__)
+
+GROUP_COMMIT_INTERVAL = 0.05 # seconds; records appended within one interval share a single write + fsync
+_ROLL = object() # marker in the pending queue: start a new segment file
+
+class LobbyJournal:
+    """
+    Append-only journal of lobby mutations.
+
+    append() only puts the record on an in-memory queue, so it is cheap enough to call on every click. A writer thread
+    commits whatever has queued up every GROUP_COMMIT_INTERVAL with one write and one fsync (group commit), so a crash
+    loses at most that much history.
+
+    Records are JSON arrays, [seq, op, lobby_id, *args], one per line. They are split into segment files named after
+    their first seq, so segments that are fully covered by a snapshot can simply be deleted.
+    """
+    def __init__(self, directory: str, commit_interval: float = GROUP_COMMIT_INTERVAL):
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.commit_interval = commit_interval
+        self.seq = self._last_seq_on_disk()
+
+        self.commits = 0
+        self.records_written = 0
+
+        self._pending: list = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._file = None
+        self._writer = threading.Thread(target=self._run, name="lobby-journal", daemon=True)
+        self._writer.start()
+
+    # -----------------------------
+    # Event loop side
+    # -----------------------------
+    def append(self, op: str, lobby_id: int, *args) -> int:
+        """ Queues a record and returns its seq. Arguments must be JSON-serializable and never mutated afterwards. """
+        with self._lock:
+            self.seq += 1
+            self._pending.append((self.seq, op, lobby_id, *args))
+            return self.seq
+
+    def roll(self) -> int:
+        """ Starts a new segment for records after this point. Returns the last seq of the old segment. """
+        with self._lock:
+            self._pending.append(_ROLL)
+            return self.seq
+
+    def close(self) -> None:
+        """ Commits everything still queued and stops the writer thread. """
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+
+    # -----------------------------
+    # Writer thread
+    # -----------------------------
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.commit_interval)
+            self._wake.clear()
+            self._commit()
+        self._commit()
+        if self._file:
+            self._file.close()
+
+    def _commit(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        lines = []
+        try:
+            for record in batch:
+                if record is _ROLL:
+                    self._write(lines)
+                    lines = []
+                    if self._file:
+                        self._file.close()
+                        self._file = None
+                    continue
+                if self._file is None:
+                    self._file = open(self._segment_path(record[0]), "a", encoding="utf-8")
+                lines.append(json.dumps(record, separators=(",", ":")))
+            self._write(lines)
+            self.commits += 1
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"error writing lobby journal: {e}")
+
+    def _write(self, lines: List[str]):
+        if not lines:
+            return
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.records_written += len(lines)
+
+    # -----------------------------
+    # Segments
+    # -----------------------------
+    def _segment_path(self, first_seq: int) -> str:
+        return os.path.join(self.directory, f"journal.{first_seq:012d}.log")
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        """ Returns (first seq, path) for every segment, oldest first. """
+        segments = []
+        for name in os.listdir(self.directory):
+            parts = name.split(".")
+            if len(parts) == 3 and parts[0] == "journal" and parts[2] == "log" and parts[1].isdigit():
+                segments.append((int(parts[1]), os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    def _last_seq_on_disk(self) -> int:
+        segments = self._segments()
+        if not segments:
+            return 0
+        last = segments[-1][0] - 1
+        for record in self._read_segment(segments[-1][1]):
+            last = record[0]
+        return last
+
+    def discard_through(self, seq: int) -> None:
+        """ Deletes segments whose records all have seq <= seq, e.g. once a snapshot covering them is on disk. """
+        segments = self._segments()
+        for (first, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 > seq:
+                break
+            try:
+                os.unlink(path)
+            except OSError as e:
+                logger.warning(f"failed to delete journal segment {path}: {e}")
+
+    @staticmethod
+    def _read_segment(path: str) -> Iterator[list]:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # a torn write from a crash can only be the last line
+                    logger.warning(f"ignoring torn record at end of {path}")
+                    return
+
+    def read(self, after_seq: int = 0) -> Iterator[list]:
+        """ Yields every committed record with seq > after_seq, in order. """
+        for _, path in self._segments():
+            for record in self._read_segment(path):
+                if record[0] > after_seq:
+                    yield record
+
+
+def replay(manager, records, controller_ops: Optional[dict] = None) -> Tuple[int, float]:
+    """
+    Applies records to manager. Records whose op is a key of controller_ops are passed to that callback instead.
+    The manager must not be journaling while replaying. Returns (records applied, seconds taken).
+    """
+    start = time.perf_counter()
+    count = 0
+    for record in records:
+        handler = controller_ops.get(record[1]) if controller_ops else None
+        if handler:
+            handler(record)
+        else:
+            manager.apply(record)
+        count += 1
+    return count, time.perf_counter() - start
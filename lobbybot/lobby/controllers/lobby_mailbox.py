@@ -0,0 +1,146 @@
+import asyncio
+import functools
+import inspect
+from collections import deque
+from logging import getLogger
+from time import perf_counter
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import discord
+
+from lobbybot.log_pipeline import current_log_fields, use_log_fields
+from lobbybot.metrics.tracing import Span, current_span, use_span, record
+
+logger = getLogger(__name__)
+
+MAILBOX_SIZE = 32 # commands allowed to wait per lobby before new ones are turned away
+SLOW_WAIT = 2.0 # seconds; interactions have to be answered within 3
+WAIT_SAMPLES = 1024 # recent queue waits kept for percentiles
+
+class LobbyBusy(Exception):
+    """ Raised when a lobby's mailbox is full. """
+    def __init__(self, lobby_id: int):
+        super().__init__(f"lobby {lobby_id} has too many queued commands")
+        self.lobby_id = lobby_id
+
+class _Mailbox:
+    __slots__ = ("queue", "worker")
+
+    def __init__(self):
+        self.queue: Deque[Tuple[Callable, tuple, dict, asyncio.Future, float, Optional[Span], Optional[dict]]] = deque()
+        self.worker: Optional[asyncio.Task] = None
+
+class LobbyMailboxes:
+    """
+    One mailbox (actor) per lobby. Commands for a lobby run one at a time, in the order they arrived, so a handler can
+    await Discord calls without another click changing the lobby underneath it. Different lobbies run in parallel.
+
+    A lobby only has a mailbox, and a worker task, while it has commands queued or running. A command that submits
+    another command for the lobby it is already running for runs inline instead of deadlocking on itself.
+    """
+    def __init__(self, max_queue: int = MAILBOX_SIZE):
+        self.max_queue = max_queue
+        self._boxes: Dict[int, _Mailbox] = {}
+
+        self.processed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    async def submit(self, lobby_id: int, fn: Callable[..., Awaitable], *args, **kwargs):
+        """ Runs fn(*args, **kwargs) in the lobby's mailbox and returns its result. Raises LobbyBusy if the mailbox is full. """
+        box = self._boxes.get(lobby_id)
+        if box and box.worker is asyncio.current_task():
+            return await fn(*args, **kwargs)
+
+        if box is None:
+            box = self._boxes[lobby_id] = _Mailbox()
+        if len(box.queue) >= self.max_queue:
+            self.rejected += 1
+            raise LobbyBusy(lobby_id)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # the worker is a task of its own, so it has to be told which trace the command belongs to and what to tag its logs with
+        box.queue.append((fn, args, kwargs, future, loop.time(), current_span(), current_log_fields()))
+        if box.worker is None:
+            box.worker = asyncio.create_task(self._drain(lobby_id, box))
+        return await future
+
+    async def _drain(self, lobby_id: int, box: _Mailbox):
+        loop = asyncio.get_running_loop()
+        while box.queue:
+            fn, args, kwargs, future, queued_at, parent_span, log_fields = box.queue.popleft()
+            if future.cancelled():
+                continue
+            wait = loop.time() - queued_at
+            self._record_wait(lobby_id, fn, wait)
+            try:
+                with use_span(parent_span), use_log_fields(log_fields):
+                    now = perf_counter()
+                    record("mailbox wait", now - wait, now)
+                    result = await fn(*args, **kwargs)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            self.processed += 1
+        # nothing is queued, and nothing can be queued before this returns, so the mailbox can go
+        del self._boxes[lobby_id]
+
+    def _record_wait(self, lobby_id: int, fn: Callable, wait: float):
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self._waits.append(wait)
+        if wait > SLOW_WAIT:
+            logger.warning(f"{fn.__name__} for lobby {lobby_id} waited {wait:.2f}s in its mailbox")
+
+    def queue_depth(self, lobby_id: int) -> int:
+        box = self._boxes.get(lobby_id)
+        return len(box.queue) if box else 0
+
+    def stats(self) -> dict:
+        """ Queue wait metrics in milliseconds, plus counts of busy lobbies and queued commands. """
+        waits = sorted(self._waits)
+        def percentile(p):
+            return waits[min(int(len(waits) * p), len(waits) - 1)] * 1000 if waits else 0.0
+        return {
+            "busy_lobbies": len(self._boxes),
+            "queued": sum(len(box.queue) for box in self._boxes.values()),
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "wait_avg_ms": self.total_wait / self.processed * 1000 if self.processed else 0.0,
+            "wait_p50_ms": percentile(0.5),
+            "wait_p95_ms": percentile(0.95),
+            "wait_max_ms": self.max_wait * 1000,
+        }
+
+
+def serialized(method):
+    """
+    Runs a LobbyController method in the mailbox of the lobby it acts on. The lobby comes from a `lobby` or `lobby_id`
+    argument; calls without one run directly. If the mailbox is full, the user is told to try again.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        lobby = bound.arguments.get("lobby")
+        lobby_id = lobby.id if lobby is not None else bound.arguments.get("lobby_id")
+        if lobby_id is None:
+            return await method(self, *args, **kwargs)
+        try:
+            return await self.mailboxes.submit(lobby_id, method, self, *args, **kwargs)
+        except LobbyBusy as e:
+            logger.warning(f"Rejected {method.__name__}: {e}")
+            interaction = bound.arguments.get("interaction")
+            if isinstance(interaction, discord.Interaction) and not interaction.response.is_done():
+                await interaction.response.send_message("This lobby is busy right now, try again in a moment! 🐢", ephemeral=True, delete_after=60)
+    return wrapper
@@ -0,0 +1,65 @@
+import time
+from logging import getLogger
+from typing import Union
+
+import discord
+
+logger = getLogger(__name__)
+
+INVALID_WEBHOOK_TOKEN = 50027
+WEBHOOK_TOKEN_TTL = 15 * 60 # interaction webhook tokens are valid for 15 minutes
+WEBHOOK_TOKEN_MARGIN = 30 # stop trusting the token a little before it actually expires
+
+AnyMessage = Union[discord.Message, discord.WebhookMessage, discord.PartialMessage]
+
+class LobbyMessage:
+    """
+    Handle to a posted lobby message: its channel, its id, and the object to edit or delete it through.
+
+    Messages sent as interaction followups can only be edited through the interaction's webhook token, which expires
+    after 15 minutes. Instead of fetching every message again through the channel right after sending it, the handle
+    keeps using the webhook message while the token is fresh, and switches to a channel-bound partial message once it
+    is about to expire or Discord rejects it (error 50027). Neither switch costs a request.
+    """
+    __slots__ = ("channel", "id", "_message", "_webhook_expires_at")
+
+    def __init__(self, message: AnyMessage):
+        self.channel = message.channel
+        self.id = message.id
+        self._message = message
+        self._webhook_expires_at = None
+        if isinstance(message, discord.WebhookMessage):
+            self._webhook_expires_at = time.monotonic() + WEBHOOK_TOKEN_TTL - WEBHOOK_TOKEN_MARGIN
+
+    @property
+    def via_webhook(self) -> bool:
+        return self._webhook_expires_at is not None
+
+    def _bind_to_channel(self):
+        self._message = self.channel.get_partial_message(self.id)
+        self._webhook_expires_at = None
+
+    def _current(self) -> AnyMessage:
+        if self.via_webhook and time.monotonic() >= self._webhook_expires_at:
+            self._bind_to_channel()
+        return self._message
+
+    async def edit(self, **kwargs):
+        try:
+            return await self._current().edit(**kwargs)
+        except discord.HTTPException as e:
+            if e.code != INVALID_WEBHOOK_TOKEN or not self.via_webhook:
+                raise
+        logger.warning(f"Webhook expired for lobby message {self.id}, editing it through the channel instead.")
+        self._bind_to_channel()
+        return await self._message.edit(**kwargs)
+
+    async def delete(self):
+        try:
+            return await self._current().delete()
+        except discord.HTTPException as e:
+            if e.code != INVALID_WEBHOOK_TOKEN or not self.via_webhook:
+                raise
+        logger.warning(f"Webhook expired for lobby message {self.id}, deleting it through the channel instead.")
+        self._bind_to_channel()
+        return await self._message.delete()
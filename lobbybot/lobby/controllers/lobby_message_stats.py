@@ -0,0 +1,55 @@
+import time
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+REPOST_CALLS = 3 # delete the old message, send the new one, fetch it back: what every lobby update used to cost
+
+class MessageUpdateStats:
+    """
+    Counts lobby message updates against the Discord API calls actually made for them, and logs the calls saved
+    compared to reposting on every update once a minute (when there is traffic).
+    """
+    def __init__(self, interval: int = 60):
+        self.interval = interval
+        self.updates = 0 # update requests, each of which used to cost REPOST_CALLS calls
+        self.calls = 0 # calls made
+        self.edits = 0
+        self.reposts = 0
+        self.skips = 0 # edits dropped because the message already showed the lobby's current version
+        self._window_start = time.monotonic()
+        self._window_updates = 0
+        self._window_calls = 0
+
+    def requested(self) -> None:
+        self.updates += 1
+        self._window_updates += 1
+        self._maybe_log()
+
+    def made(self, calls: int, edit: bool) -> None:
+        self.calls += calls
+        self._window_calls += calls
+        if edit:
+            self.edits += 1
+        else:
+            self.reposts += 1
+
+    def skipped(self) -> None:
+        self.skips += 1
+
+    @property
+    def calls_saved(self) -> int:
+        return self.updates * REPOST_CALLS - self.calls
+
+    def _maybe_log(self):
+        elapsed = time.monotonic() - self._window_start
+        if elapsed < self.interval:
+            return
+        saved = self._window_updates * REPOST_CALLS - self._window_calls
+        logger.info(
+            f"Lobby messages: {self._window_updates} updates took {self._window_calls} API calls, "
+            f"{saved * 60 / elapsed:.1f} calls/min saved ({self.edits} edits, {self.reposts} reposts, {self.skips} no-op edits skipped total)"
+        )
+        self._window_start = time.monotonic()
+        self._window_updates = 0
+        self._window_calls = 0
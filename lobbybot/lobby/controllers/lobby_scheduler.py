@@ -0,0 +1,164 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import time
+from enum import Enum
+from logging import getLogger
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from lobbybot.log_pipeline import log_context
+
+logger = getLogger(__name__)
+
+class TimerKind(Enum):
+    AUTO_CLOSE = "auto_close"
+    READY_CHECK = "ready_check"
+    EDIT = "edit" # coalesced lobby message edit
+    SYNC = "sync" # reload from the shared state backend after another process changed the lobby
+
+TimerCallback = Callable[[], Union[None, Awaitable[None]]]
+
+class TimerHandle:
+    """ A scheduled timer. Only cancel it through LobbyScheduler.cancel, so the scheduler's key index stays right. """
+    __slots__ = ("lobby_id", "kind", "when", "deadline_utc", "callback", "cancelled")
+
+    def __init__(self, lobby_id: int, kind: TimerKind, when: float, deadline_utc: float, callback: TimerCallback):
+        self.lobby_id = lobby_id
+        self.kind = kind
+        self.when = when # loop.time() deadline
+        self.deadline_utc = deadline_utc # wall clock deadline, for display
+        self.callback = callback
+        self.cancelled = False
+
+    def __repr__(self):
+        return f"<TimerHandle lobby={self.lobby_id} kind={self.kind.name} in={self.deadline_utc - time.time():.0f}s>"
+
+class LobbyScheduler:
+    """
+    Runs every lobby timer (auto close, ready check timeout, coalesced edits) from a single task.
+
+    Timers sit in a heap ordered by deadline, and the driver task sleeps until the earliest one. There is at most one
+    timer per (lobby id, kind): scheduling again replaces the old timer, so superseded timers never fire. Cancelled
+    timers are left in the heap and skipped when they reach the top, and the heap is rebuilt if they pile up.
+    """
+    def __init__(self):
+        self._heap: List[Tuple[float, int, TimerHandle]] = []
+        self._by_key: Dict[Tuple[int, TimerKind], TimerHandle] = {}
+        self._counter = itertools.count() # tie breaker, so equal deadlines fire in scheduling order
+        self._cancelled = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._driver: Optional[asyncio.Task] = None
+        self.fired = 0
+
+    def schedule(self, lobby_id: int, kind: TimerKind, delay: float, callback: TimerCallback) -> TimerHandle:
+        """ Runs callback (sync or async) after delay seconds, replacing any timer of the same kind for this lobby. """
+        self.cancel(lobby_id, kind)
+        loop = asyncio.get_running_loop()
+        handle = TimerHandle(lobby_id, kind, loop.time() + max(delay, 0), time.time() + max(delay, 0), callback)
+        self._by_key[(lobby_id, kind)] = handle
+        is_earliest = not self._heap or handle.when < self._heap[0][0]
+        heapq.heappush(self._heap, (handle.when, next(self._counter), handle))
+        self._ensure_driver()
+        if is_earliest:
+            self._wake.set()
+        return handle
+
+    def cancel(self, lobby_id: int, kind: Optional[TimerKind] = None) -> int:
+        """ Cancels the lobby's timer of the given kind, or all of its timers. Returns how many were cancelled. """
+        kinds = [kind] if kind else list(TimerKind)
+        cancelled = 0
+        for k in kinds:
+            handle = self._by_key.pop((lobby_id, k), None)
+            if handle:
+                handle.cancelled = True
+                cancelled += 1
+        self._cancelled += cancelled
+        if self._cancelled > 64 and self._cancelled > len(self._heap) // 2:
+            self._compact()
+        return cancelled
+
+    def get(self, lobby_id: int, kind: TimerKind) -> Optional[TimerHandle]:
+        return self._by_key.get((lobby_id, kind))
+
+    def pending(self, lobby_id: Optional[int] = None) -> List[TimerHandle]:
+        """ Returns the pending timers, optionally only the lobby's, soonest first. """
+        handles = [h for (lid, _), h in self._by_key.items() if lobby_id is None or lid == lobby_id]
+        return sorted(handles, key=lambda h: h.when)
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def stats(self) -> dict:
+        """ Counts for debugging: pending timers per kind, heap size including cancelled entries, timers fired. """
+        per_kind = {kind.name: 0 for kind in TimerKind}
+        for (_, kind) in self._by_key:
+            per_kind[kind.name] += 1
+        return {"pending": len(self._by_key), "by_kind": per_kind, "heap": len(self._heap), "fired": self.fired}
+
+    def close(self) -> None:
+        if self._driver:
+            self._driver.cancel()
+            self._driver = None
+
+    # -----------------------------
+    # Driver
+    # -----------------------------
+    def _ensure_driver(self):
+        if self._driver is None or self._driver.done():
+            self._wake = asyncio.Event()
+            self._driver = asyncio.create_task(self._run())
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+        heapq.heapify(self._heap)
+        self._cancelled = 0
+
+    def _pop_due(self, now: float) -> List[TimerHandle]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, handle = heapq.heappop(self._heap)
+            if handle.cancelled:
+                self._cancelled -= 1
+                continue
+            del self._by_key[(handle.lobby_id, handle.kind)]
+            due.append(handle)
+        return due
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # drop cancelled entries at the top so we don't wake up for them
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+                self._cancelled -= 1
+
+            self._wake.clear()
+            timeout = self._heap[0][0] - loop.time() if self._heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            for handle in self._pop_due(loop.time()):
+                self.fired += 1
+                self._fire(handle)
+
+    def _fire(self, handle: TimerHandle):
+        # the callback's task copies the context, so what it logs is tagged with the lobby too
+        with log_context(lobby_id=handle.lobby_id):
+            try:
+                result = handle.callback()
+            except Exception as e:
+                logger.exception(f"{handle.kind.name} timer for lobby {handle.lobby_id} failed -- {e}")
+                return
+            if inspect.isawaitable(result):
+                # the callback gets its own task so a slow discord call can't hold up other timers
+                asyncio.ensure_future(result).add_done_callback(lambda task, handle=handle: self._log_failure(handle, task))
+
+    @staticmethod
+    def _log_failure(handle: TimerHandle, task: asyncio.Future):
+        if not task.cancelled() and task.exception():
+            logger.error(f"{handle.kind.name} timer for lobby {handle.lobby_id} failed -- {task.exception()!r}")
@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+from logging import getLogger
+from typing import Optional
+
+logger = getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+class LobbySnapshotStore:
+    """ Reads and atomically writes the lobby snapshot file. """
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+
+    def load(self) -> Optional[dict]:
+        """ Returns the last saved snapshot, or None if there is no usable snapshot. """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.info(f"no lobby snapshot found at {self.path}")
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"error loading lobby snapshot: {e}")
+            return None
+
+        if data.get("version") != SNAPSHOT_VERSION:
+            logger.warning(f"ignoring lobby snapshot with unknown version {data.get('version')}")
+            return None
+        return data
+
+    def save(self, snapshot: dict) -> bool:
+        """
+        Writes snapshot to a temp file and swaps it in, so a crash mid-write never leaves a torn file behind.
+        Returns True if the snapshot is on disk.
+        """
+        snapshot = {"version": SNAPSHOT_VERSION, **snapshot}
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".lobby_snapshot", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, separators=(",", ":"))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.error(f"error saving lobby snapshot: {e}")
+            return False
+        return True
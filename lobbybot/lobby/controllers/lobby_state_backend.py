@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+import sqlite3
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError: # not on Windows; notifications still work, just without the file lock
+    fcntl = None
+
+logger = getLogger(__name__)
+
+ChangeCallback = Callable[[int, int, int], None] # (guild id, lobby id, version), called on the event loop
+StoredLobby = Tuple[int, dict] # (version, Lobby.to_dict() output)
+
+NOTIFY_POLL_INTERVAL = 0.05 # seconds between checks of the notification file
+NOTIFY_FILE_MAX = 1 << 20 # bytes before the notification file is truncated
+CHANGES_KEPT = 10000 # change log rows kept for processes catching up
+
+class VersionConflict(Exception):
+    """ Raised when a write expected a different version than the one stored, i.e. someone else wrote first. """
+    def __init__(self, guild_id: int, lobby_id: int, expected: int, actual: int):
+        super().__init__(f"lobby {lobby_id} in guild {guild_id} is at version {actual}, not {expected}")
+        self.guild_id = guild_id
+        self.lobby_id = lobby_id
+        self.expected = expected
+        self.actual = actual
+
+class LobbyStateBackend(ABC):
+    """
+    Where lobby state lives, so several bot processes can share it.
+
+    Every lobby is stored as its to_dict() output with a version. Writes are optimistic: they name the version they
+    expect to replace (0 for a new lobby) and raise VersionConflict if it has moved on. Subscribers are told about
+    every change made through another backend instance (i.e. another process) so they can reload the lobby.
+
+    New lobbies get their ids from the backend too, so two processes creating lobbies in one guild never pick the same
+    id and end up writing over (and then closing) each other's lobby.
+    """
+    @abstractmethod
+    async def start(self, on_change: ChangeCallback) -> None:
+        """ Starts delivering change notifications to on_change. """
+
+    @abstractmethod
+    async def allocate_lobby_id(self, guild_id: int, at_least: int) -> int:
+        """ Reserves a lobby id no process has used in the guild yet, and no lower than at_least. """
+
+    @abstractmethod
+    async def load(self, guild_id: int) -> Dict[int, StoredLobby]:
+        """ Returns every stored lobby of the guild, by lobby id. """
+
+    @abstractmethod
+    async def get(self, guild_id: int, lobby_id: int) -> Optional[StoredLobby]:
+        """ Returns the stored lobby, or None if there isn't one. """
+
+    @abstractmethod
+    async def put(self, guild_id: int, lobby_id: int, data: dict, expected_version: int) -> int:
+        """ Stores data if the lobby is still at expected_version, and returns the new version. """
+
+    @abstractmethod
+    async def delete(self, guild_id: int, lobby_id: int, expected_version: int) -> None:
+        """ Removes the lobby if it is still at expected_version. """
+
+    def close(self) -> None:
+        pass
+
+class InMemoryLobbyBackend(LobbyStateBackend):
+    """
+    Keeps lobbies in this process, which is all a single process needs. Only subscribers sharing this instance are
+    notified, and since every write comes from one of them, they already know about it.
+    """
+    def __init__(self):
+        self._lobbies: Dict[Tuple[int, int], StoredLobby] = {}
+        self._next_ids: Dict[int, int] = {} # guild id -> next free lobby id
+
+    async def start(self, on_change: ChangeCallback) -> None:
+        pass
+
+    async def allocate_lobby_id(self, guild_id: int, at_least: int) -> int:
+        lobby_id = max(self._next_ids.get(guild_id, 0), at_least)
+        self._next_ids[guild_id] = lobby_id + 1
+        return lobby_id
+
+    async def load(self, guild_id: int) -> Dict[int, StoredLobby]:
+        return {lobby_id: stored for (gid, lobby_id), stored in self._lobbies.items() if gid == guild_id}
+
+    async def get(self, guild_id: int, lobby_id: int) -> Optional[StoredLobby]:
+        return self._lobbies.get((guild_id, lobby_id))
+
+    async def put(self, guild_id: int, lobby_id: int, data: dict, expected_version: int) -> int:
+        self._check_version(guild_id, lobby_id, expected_version)
+        self._lobbies[(guild_id, lobby_id)] = (expected_version + 1, data)
+        return expected_version + 1
+
+    async def delete(self, guild_id: int, lobby_id: int, expected_version: int) -> None:
+        self._check_version(guild_id, lobby_id, expected_version)
+        self._lobbies.pop((guild_id, lobby_id), None)
+
+    def _check_version(self, guild_id: int, lobby_id: int, expected_version: int):
+        stored = self._lobbies.get((guild_id, lobby_id))
+        actual = stored[0] if stored else 0
+        if actual != expected_version:
+            raise VersionConflict(guild_id, lobby_id, expected_version, actual)
+
+class SqliteLobbyBackend(LobbyStateBackend):
+    """
+    Shared store for processes on one machine, and a local stand-in for a networked store: a SQLite database holds
+    the lobbies and a change log, and every commit also appends a byte to a notification file under an exclusive file
+    lock. Each process polls that file's size and mtime, which costs a stat() and no database read, and only reads
+    the change log when the file moved.
+
+    Database work runs on one thread per process, off the event loop.
+    """
+    def __init__(self, path: str, poll_interval: float = NOTIFY_POLL_INTERVAL):
+        self.path = os.path.abspath(path)
+        self.notify_path = self.path + ".notify"
+        self.poll_interval = poll_interval
+        self.origin = uuid.uuid4().hex # tags this process's changes, so it isn't notified of its own writes
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lobby-state")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_seq = 0
+        self._watcher: Optional[asyncio.Task] = None
+
+        self.conflicts = 0
+        self.notifications = 0
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # -----------------------------
+    # Database thread
+    # -----------------------------
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS lobbies (
+                    guild_id INTEGER NOT NULL, lobby_id INTEGER NOT NULL, version INTEGER NOT NULL, data TEXT NOT NULL,
+                    PRIMARY KEY (guild_id, lobby_id));
+                CREATE TABLE IF NOT EXISTS changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER NOT NULL, lobby_id INTEGER NOT NULL,
+                    version INTEGER NOT NULL, origin TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS lobby_ids (guild_id INTEGER PRIMARY KEY, next_id INTEGER NOT NULL);
+            """)
+        return self._conn
+
+    def _write(self, guild_id: int, lobby_id: int, data: Optional[dict], expected_version: int) -> int:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT version FROM lobbies WHERE guild_id = ? AND lobby_id = ?", (guild_id, lobby_id)).fetchone()
+            actual = row[0] if row else 0
+            if actual != expected_version:
+                raise VersionConflict(guild_id, lobby_id, expected_version, actual)
+            version = expected_version + 1
+            if data is None:
+                db.execute("DELETE FROM lobbies WHERE guild_id = ? AND lobby_id = ?", (guild_id, lobby_id))
+            else:
+                db.execute("INSERT OR REPLACE INTO lobbies VALUES (?, ?, ?, ?)",
+                           (guild_id, lobby_id, version, json.dumps(data, separators=(",", ":"))))
+            seq = db.execute("INSERT INTO changes (guild_id, lobby_id, version, origin) VALUES (?, ?, ?, ?)",
+                             (guild_id, lobby_id, version, self.origin)).lastrowid
+            if seq % 1000 == 0:
+                db.execute("DELETE FROM changes WHERE seq <= ?", (seq - CHANGES_KEPT,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self._poke()
+        return version
+
+    def _allocate(self, guild_id: int, at_least: int) -> int:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT next_id FROM lobby_ids WHERE guild_id = ?", (guild_id,)).fetchone()
+            # stored lobbies count too, for databases written before ids were allocated here
+            stored = db.execute("SELECT COALESCE(MAX(lobby_id) + 1, 0) FROM lobbies WHERE guild_id = ?", (guild_id,)).fetchone()[0]
+            lobby_id = max(row[0] if row else 0, stored, at_least)
+            db.execute("INSERT OR REPLACE INTO lobby_ids VALUES (?, ?)", (guild_id, lobby_id + 1))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return lobby_id
+
+    def _poke(self):
+        """ Tells every process that something changed, by growing the notification file. """
+        with open(self.notify_path, "ab") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if f.tell() >= NOTIFY_FILE_MAX:
+                    f.truncate(0)
+                f.write(b"\n")
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_changes(self) -> List[Tuple[int, int, int]]:
+        rows = self._db().execute(
+            "SELECT seq, guild_id, lobby_id, version, origin FROM changes WHERE seq > ? ORDER BY seq", (self._last_seq,)).fetchall()
+        if rows:
+            self._last_seq = rows[-1][0]
+        return [(guild_id, lobby_id, version) for _, guild_id, lobby_id, version, origin in rows if origin != self.origin]
+
+    def _latest_seq(self) -> int:
+        return self._db().execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def _load(self, guild_id: int) -> Dict[int, StoredLobby]:
+        rows = self._db().execute("SELECT lobby_id, version, data FROM lobbies WHERE guild_id = ?", (guild_id,)).fetchall()
+        return {lobby_id: (version, json.loads(data)) for lobby_id, version, data in rows}
+
+    def _get(self, guild_id: int, lobby_id: int) -> Optional[StoredLobby]:
+        row = self._db().execute("SELECT version, data FROM lobbies WHERE guild_id = ? AND lobby_id = ?",
+                                 (guild_id, lobby_id)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    # -----------------------------
+    # Event loop side
+    # -----------------------------
+    async def start(self, on_change: ChangeCallback) -> None:
+        if self._watcher is not None:
+            return
+        self._last_seq = await self._run(self._latest_seq)
+        self._watcher = asyncio.create_task(self._watch(on_change))
+
+    async def _watch(self, on_change: ChangeCallback):
+        last_stat = None
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                stat = os.stat(self.notify_path)
+            except FileNotFoundError:
+                continue
+            if (stat.st_size, stat.st_mtime_ns) == last_stat:
+                continue
+            last_stat = (stat.st_size, stat.st_mtime_ns)
+            try:
+                changes = await self._run(self._read_changes)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to read lobby state changes: {e}")
+                last_stat = None
+                continue
+            for guild_id, lobby_id, version in changes:
+                self.notifications += 1
+                try:
+                    on_change(guild_id, lobby_id, version)
+                except Exception as e:
+                    logger.exception(f"Lobby state change handler failed for lobby {lobby_id} -- {e}")
+
+    async def allocate_lobby_id(self, guild_id: int, at_least: int) -> int:
+        return await self._run(self._allocate, guild_id, at_least)
+
+    async def load(self, guild_id: int) -> Dict[int, StoredLobby]:
+        return await self._run(self._load, guild_id)
+
+    async def get(self, guild_id: int, lobby_id: int) -> Optional[StoredLobby]:
+        return await self._run(self._get, guild_id, lobby_id)
+
+    async def put(self, guild_id: int, lobby_id: int, data: dict, expected_version: int) -> int:
+        try:
+            return await self._run(self._write, guild_id, lobby_id, data, expected_version)
+        except VersionConflict:
+            self.conflicts += 1
+            raise
+
+    async def delete(self, guild_id: int, lobby_id: int, expected_version: int) -> None:
+        try:
+            await self._run(self._write, guild_id, lobby_id, None, expected_version)
+        except VersionConflict:
+            self.conflicts += 1
+            raise
+
+    def close(self) -> None:
+        if self._watcher:
+            self._watcher.cancel()
+            self._watcher = None
+        self._executor.shutdown(wait=True)
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+def make_lobby_state_backend(kind: str, path: str) -> LobbyStateBackend:
+    """ "memory" for a single process, "sqlite" to share lobbies between processes on one machine. """
+    if kind == "memory":
+        return InMemoryLobbyBackend()
+    if kind == "sqlite":
+        return SqliteLobbyBackend(path)
+    raise ValueError(f"Unknown lobby state backend: {kind}")
@@ -0,0 +1,131 @@
+import asyncio
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Callable, Dict, Optional, Set, TYPE_CHECKING
+
+from lobbybot.lobby.models import Lobby, LobbyManager
+from .lobby_state_backend import LobbyStateBackend, VersionConflict
+
+if TYPE_CHECKING:
+    from .lobby_journal import LobbyJournal
+
+logger = getLogger(__name__)
+
+class LobbyStateSync:
+    """
+    Mirrors one guild's lobbies into a LobbyStateBackend.
+
+    It takes the place of the LobbyManager's journal: every mutation record is passed on to the real journal, if there
+    is one, and marks the lobby dirty. Dirty lobbies are written once the current event loop iteration is done, so a
+    burst of mutations from one click is a single write. Writes carry the version this process last saw; if another
+    process got there first, on_stale is called so the controller reloads the lobby from the backend.
+    """
+    def __init__(self, backend: LobbyStateBackend, guild_id: int, manager: LobbyManager, on_stale: Callable[[int], None]):
+        self.backend = backend
+        self.guild_id = guild_id
+        self.manager = manager
+        self.on_stale = on_stale
+        self.journal: Optional["LobbyJournal"] = None
+        self._versions: Dict[int, int] = {} # lobby id -> backend version this process last wrote or loaded
+        self._dirty: Set[int] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._applying = False
+
+        self.writes = 0
+        self.conflicts = 0
+        self.remote_changes = 0
+
+    # -----------------------------
+    # Journal interface
+    # -----------------------------
+    def append(self, op: str, lobby_id: int, *args) -> Optional[int]:
+        seq = self.journal.append(op, lobby_id, *args) if self.journal else None
+        if not self._applying:
+            self._mark_dirty(lobby_id)
+        return seq
+
+    def _mark_dirty(self, lobby_id: int):
+        self._dirty.add(lobby_id)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+
+    @contextmanager
+    def applying(self):
+        """ Mutations made inside came from the backend, so they aren't written back to it. """
+        self._applying = True
+        try:
+            yield
+        finally:
+            self._applying = False
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    async def _flush(self):
+        try:
+            while self._dirty:
+                lobby_id = self._dirty.pop()
+                lobby = self.manager.get_lobby_by_id(lobby_id)
+                expected = self._versions.get(lobby_id, 0)
+                try:
+                    if lobby is None:
+                        if expected:
+                            await self.backend.delete(self.guild_id, lobby_id, expected)
+                        self._versions.pop(lobby_id, None)
+                    else:
+                        self._versions[lobby_id] = await self.backend.put(self.guild_id, lobby_id, lobby.to_dict(), expected)
+                    self.writes += 1
+                except VersionConflict as e:
+                    self.conflicts += 1
+                    logger.warning(f"Lost a write race, reloading -- {e}")
+                    self.on_stale(lobby_id)
+                except Exception as e:
+                    logger.exception(f"Failed to store lobby {lobby_id} of guild {self.guild_id} -- {e}")
+        finally:
+            self._flush_task = None
+
+    async def allocate_id(self) -> int:
+        """ An id for a new lobby that no other process sharing the backend will also use. """
+        return await self.backend.allocate_lobby_id(self.guild_id, self.manager.next_id)
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+    def is_newer(self, lobby_id: int, version: int) -> bool:
+        return version > self._versions.get(lobby_id, 0)
+
+    def seen(self, lobby_id: int, version: Optional[int]):
+        """ Records the backend version this process now holds; None if the lobby is gone. """
+        if version is None:
+            self._versions.pop(lobby_id, None)
+        else:
+            self._versions[lobby_id] = version
+
+    def notify(self, lobby_id: int, version: int):
+        """ Called for changes other processes made. """
+        if self.is_newer(lobby_id, version):
+            self.remote_changes += 1
+            self.on_stale(lobby_id)
+
+    async def reconcile(self):
+        """
+        Brings the manager and the backend together after a restore: stored lobbies replace local copies, and local
+        lobbies the backend doesn't have are written to it.
+        """
+        stored = await self.backend.load(self.guild_id)
+        with self.applying():
+            for lobby_id, (version, data) in stored.items():
+                self.manager.replace_lobby(Lobby.from_dict(data))
+                self._versions[lobby_id] = version
+        for lobby in self.manager.get_all_lobbies():
+            if lobby.id not in stored:
+                self._mark_dirty(lobby.id)
+
+    def stats(self) -> dict:
+        return {
+            "tracked": len(self._versions),
+            "dirty": len(self._dirty),
+            "writes": self.writes,
+            "conflicts": self.conflicts,
+            "remote_changes": self.remote_changes,
+        }
@@ -0,0 +1,204 @@
+import asyncio
+from collections import deque
+from enum import IntEnum
+from logging import getLogger
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Optional, Set
+
+from lobbybot.metrics.tracing import Span, current_span, span, use_span
+
+logger = getLogger(__name__)
+
+MAX_IN_FLIGHT = 8 # requests running at once across every route
+ROUTE_CONCURRENCY = 1 # requests running at once per route, which also keeps each channel's requests in order
+
+class Priority(IntEnum):
+    """ Lower goes first. """
+    LOBBY_UPDATE = 0 # lobby message edits and reposts
+    CHANNEL = 1 # pings and notices posted in the lobby channel
+    DM = 2
+    CLEANUP = 3 # deleting messages posted with a lifetime
+
+class _Request:
+    __slots__ = ("priority", "route", "factory", "key", "future", "queued_at", "stale_at", "parent_span")
+
+    def __init__(self, priority: Priority, route: Hashable, factory: Callable[[], Awaitable], key: Optional[Hashable],
+                 future: asyncio.Future, queued_at: float, stale_at: Optional[float], parent_span: Optional[Span]):
+        self.priority = priority
+        self.route = route
+        self.factory = factory
+        self.key = key
+        self.future = future
+        self.queued_at = queued_at
+        self.stale_at = stale_at
+        self.parent_span = parent_span # trace the request was made in, so its Discord call shows up there
+
+class _ClassStats:
+    __slots__ = ("done", "failed", "merged", "shed", "total_wait", "max_wait", "total_latency")
+
+    def __init__(self):
+        self.done = 0
+        self.failed = 0
+        self.merged = 0
+        self.shed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_latency = 0.0
+
+class OutboundQueue:
+    """
+    Orders outgoing Discord requests by priority, so lobby message updates don't wait behind DMs or cleanup deletes.
+
+    Requests are zero-argument callables that start the call, so nothing is sent until the queue picks them. Each
+    request names a route (e.g. ("channel", channel_id)), roughly matching Discord's rate limit buckets, and at most
+    ROUTE_CONCURRENCY requests per route run at once; discord.py still handles the actual 429 waits. A request
+    submitted with the key of one still queued replaces it (e.g. a newer edit of the same lobby message) and shares its
+    future. Requests with stale_after are dropped, resolving to None, if they waited longer than that.
+    """
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, route_concurrency: int = ROUTE_CONCURRENCY):
+        self.max_in_flight = max_in_flight
+        self.route_concurrency = route_concurrency
+        self._queues: Dict[Priority, Deque[_Request]] = {priority: deque() for priority in Priority}
+        self._by_key: Dict[Hashable, _Request] = {}
+        self._route_busy: Dict[Hashable, int] = {}
+        self._next_stale_at: Optional[float] = None # no queued request goes stale before this; may be early, never late
+        self._in_flight: Set[asyncio.Task] = set()
+        self._stats = {priority: _ClassStats() for priority in Priority}
+
+    def submit(self, priority: Priority, route: Hashable, factory: Callable[[], Awaitable], key: Optional[Hashable] = None,
+               stale_after: Optional[float] = None) -> asyncio.Future:
+        """ Queues a request and returns a future for its result. Awaiting the future is optional. """
+        loop = asyncio.get_running_loop()
+        if key is not None and key in self._by_key:
+            queued = self._by_key[key]
+            queued.factory = factory
+            self._stats[queued.priority].merged += 1
+            return queued.future
+
+        now = loop.time()
+        request = _Request(priority, route, factory, key, loop.create_future(), now,
+                           now + stale_after if stale_after is not None else None, current_span())
+        self._queues[priority].append(request)
+        if key is not None:
+            self._by_key[key] = request
+        if request.stale_at is not None and (self._next_stale_at is None or request.stale_at < self._next_stale_at):
+            self._next_stale_at = request.stale_at
+        self._pump()
+        return request.future
+
+    async def call(self, priority: Priority, route: Hashable, factory: Callable[[], Awaitable], **kwargs):
+        """ submit() and wait for the result. """
+        with span(f"outbound {priority.name.lower()}"):
+            return await self.submit(priority, route, factory, **kwargs)
+
+    def discard(self, key: Hashable) -> bool:
+        """ Drops the queued request with this key, if it hasn't started, resolving it to None. Returns if one was dropped. """
+        request = self._by_key.pop(key, None)
+        if request is None:
+            return False
+        self._queues[request.priority].remove(request)
+        self._stats[request.priority].shed += 1
+        if not request.future.done():
+            request.future.set_result(None)
+        return True
+
+    # -----------------------------
+    # Dispatch
+    # -----------------------------
+    def _next_runnable(self) -> Optional[_Request]:
+        now = asyncio.get_running_loop().time()
+        for priority in Priority:
+            queue = self._queues[priority]
+            for i, request in enumerate(queue):
+                if request.stale_at is not None and now > request.stale_at:
+                    continue # shed by _drop_stale
+                if self._route_busy.get(request.route, 0) < self.route_concurrency:
+                    del queue[i]
+                    return request
+        return None
+
+    def _drop_stale(self):
+        # this runs on every pump, and a DM backlog can leave thousands of requests queued, so only scan once
+        # something may actually have gone stale
+        now = asyncio.get_running_loop().time()
+        if self._next_stale_at is None or now <= self._next_stale_at:
+            return
+        next_stale_at = None
+        for priority, queue in self._queues.items():
+            kept = deque()
+            for request in queue:
+                if request.stale_at is not None and now > request.stale_at:
+                    logger.debug(f"Shedding {priority.name} request for {request.route}, it waited {now - request.queued_at:.1f}s")
+                    self._forget_key(request)
+                    self._stats[priority].shed += 1
+                    if not request.future.done():
+                        request.future.set_result(None)
+                else:
+                    kept.append(request)
+                    if request.stale_at is not None and (next_stale_at is None or request.stale_at < next_stale_at):
+                        next_stale_at = request.stale_at
+            self._queues[priority] = kept
+        self._next_stale_at = next_stale_at
+
+    def _forget_key(self, request: _Request):
+        if request.key is not None and self._by_key.get(request.key) is request:
+            del self._by_key[request.key]
+
+    def _pump(self):
+        """ Starts queued requests until the in-flight limit is reached or nothing else can run. """
+        self._drop_stale()
+        while len(self._in_flight) < self.max_in_flight:
+            request = self._next_runnable()
+            if request is None:
+                return
+            self._forget_key(request)
+            self._route_busy[request.route] = self._route_busy.get(request.route, 0) + 1
+            task = asyncio.create_task(self._run(request))
+            self._in_flight.add(task)
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task):
+        self._in_flight.discard(task)
+        self._pump()
+
+    async def _run(self, request: _Request):
+        loop = asyncio.get_running_loop()
+        stats = self._stats[request.priority]
+        started = loop.time()
+        wait = started - request.queued_at
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        try:
+            with use_span(request.parent_span):
+                result = await request.factory()
+        except Exception as e:
+            stats.failed += 1
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            if not request.future.done():
+                request.future.set_result(result)
+        finally:
+            stats.done += 1
+            stats.total_latency += loop.time() - request.queued_at
+            busy = self._route_busy[request.route] - 1
+            if busy:
+                self._route_busy[request.route] = busy
+            else:
+                del self._route_busy[request.route]
+
+    def stats(self) -> dict:
+        """ Per priority class: queue depth, completed/failed/merged/shed counts, and wait and total latency in ms. """
+        result = {}
+        for priority, stats in self._stats.items():
+            result[priority.name] = {
+                "queued": len(self._queues[priority]),
+                "done": stats.done,
+                "failed": stats.failed,
+                "merged": stats.merged,
+                "shed": stats.shed,
+                "wait_avg_ms": stats.total_wait / stats.done * 1000 if stats.done else 0.0,
+                "wait_max_ms": stats.max_wait * 1000,
+                "latency_avg_ms": stats.total_latency / stats.done * 1000 if stats.done else 0.0,
+            }
+        result["in_flight"] = len(self._in_flight)
+        return result
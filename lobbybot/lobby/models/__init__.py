@@ -2,7 +2,8 @@ from .lobby_enums import (
     LobbyAddResult,
     LobbyRemoveResult,
     LobbyState,
-    ReadyResult
+    ReadyResult,
+    ReadyState
 )
 
 from .lobby_manager import (
@@ -12,3 +13,5 @@ from .lobby_manager import (
 from .lobby import Lobby
 
 from .player import Player
+
+from .owner import LobbyOwner
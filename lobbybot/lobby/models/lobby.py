@@ -1,16 +1,26 @@
-from .player import Player
-from .lobby_enums import LobbyAddResult, LobbyRemoveResult, LobbyState, TRANSITIONS, ReadyResult
-from typing import Tuple, List, TYPE_CHECKING
+from .player import Player, voice_channel_id
+from .owner import LobbyOwner
+from .lobby_enums import LobbyAddResult, LobbyRemoveResult, LobbyState, TRANSITIONS, ReadyResult, ReadyState
+from typing import Tuple, List, Dict, Optional, Iterable, TYPE_CHECKING
 import discord
 import time
 if TYPE_CHECKING:
     from discord import VoiceState
-from itertools import chain
+    from .lobby_manager import LobbyManager
+from itertools import chain, islice
+
+_TALLY_SLOT = {ready: i for i, ready in enumerate(ReadyState)}
 
 class Lobby:
+    __slots__ = (
+        "id", "owner", "time", "max_players", "game", "created_at", "started_at",
+        "_state", "_players", "_fillers", "_player_tally", "_filler_tally", "_manager", "version",
+        "_voice_counts", "_channels_by_occupancy", "_max_voice_occupancy", "_unjoined_count",
+    )
+
     def __init__(self, id: int, owner: discord.Member, time: int, max_players: int, game: str, created_at: int):
         self.id = id
-        self.owner = owner
+        self.owner = LobbyOwner.from_member(owner)
         self.time = time
         self.max_players = max_players
         self.game = game
@@ -18,8 +28,168 @@ class Lobby:
         self.started_at = None
 
         self._state = LobbyState.WAITING
-        self._players: List[Player] = [Player(owner.id, voice_state=owner.voice)]
-        self._fillers: List[Player] = []
+        # id -> Player, in join order. a user is only ever in one of the two.
+        self._players: Dict[int, Player] = {}
+        self._fillers: Dict[int, Player] = {}
+        # live per-ReadyState counts for each group (indexed by _TALLY_SLOT), kept in sync by _insert/_pop and Player's ready setters
+        self._player_tally: List[int] = [0] * len(ReadyState)
+        self._filler_tally: List[int] = [0] * len(ReadyState)
+        # bumped on every change that shows up in the lobby message, so views can tell when a render is stale
+        self.version = 0
+        self._reset_voice_counts()
+        self._insert(self._players, Player(owner.id, voice_channel_id=voice_channel_id(owner.voice)))
+
+        self._manager: Optional["LobbyManager"] = None # set by the manager that indexes this lobby
+
+    # -----------------------------
+    # Index hooks
+    # -----------------------------
+    def attach(self, manager: "LobbyManager") -> None:
+        """ Registers the manager whose indexes should follow this lobby's participants and state. """
+        self._manager = manager
+        for participant in self.get_participants():
+            manager._on_participant_added(self, participant.id)
+        manager._on_state_changed(self, None, self._state)
+
+    def detach(self) -> None:
+        """ Stops reporting changes to the manager. """
+        self._manager = None
+
+    def _participant_joined(self, user_id: int) -> None:
+        if self._manager:
+            self._manager._on_participant_added(self, user_id)
+
+    def _participants_left(self, user_ids: Iterable[int]) -> None:
+        """ Reports users that are no longer anywhere in the lobby. Users still in the lobby are ignored. """
+        if not self._manager:
+            return
+        for user_id in user_ids:
+            if not self.in_lobby(user_id):
+                self._manager._on_participant_removed(self, user_id)
+
+    def _record(self, op: str, *args) -> None:
+        """ Appends a journal record for a mutation of this lobby, if the manager is journaling. """
+        if self._manager and self._manager.journal:
+            self._manager.journal.append(op, self.id, *args)
+
+    def _set_state(self, new_state: LobbyState) -> None:
+        old_state = self._state
+        self._state = new_state
+        self.version += 1
+        if self._manager and old_state != new_state:
+            self._manager._on_state_changed(self, old_state, new_state)
+
+    # -----------------------------
+    # Membership bookkeeping
+    # -----------------------------
+    def _tally(self, group: Dict[int, Player]) -> List[int]:
+        return self._player_tally if group is self._players else self._filler_tally
+
+    def _insert(self, group: Dict[int, Player], participant: Player) -> None:
+        """ Adds participant to group (self._players or self._fillers), keeping the ready tallies in sync. """
+        group[participant.id] = participant
+        participant.lobby = self
+        self.version += 1
+        self._tally(group)[_TALLY_SLOT[participant.ready]] += 1
+        self._voice_enter(participant.voice_channel_id)
+        if group is self._players and not participant.joined_voice:
+            self._unjoined_count += 1
+
+    def _pop(self, group: Dict[int, Player], user_id: int) -> Optional[Player]:
+        """ Removes and returns user_id from group, or None if they were not in it. """
+        participant = group.pop(user_id, None)
+        if participant:
+            self.version += 1
+            self._tally(group)[_TALLY_SLOT[participant.ready]] -= 1
+            self._voice_leave(participant.voice_channel_id)
+            if group is self._players and not participant.joined_voice:
+                self._unjoined_count -= 1
+        return participant
+
+    def _recount(self) -> None:
+        """ Rebuilds both tallies and the voice counts from scratch. Only needed after the groups are replaced wholesale. """
+        self.version += 1
+        self._player_tally = [0] * len(ReadyState)
+        self._filler_tally = [0] * len(ReadyState)
+        self._reset_voice_counts()
+        for player in self._players.values():
+            self._player_tally[_TALLY_SLOT[player.ready]] += 1
+            self._voice_enter(player.voice_channel_id)
+            if not player.joined_voice:
+                self._unjoined_count += 1
+        for filler in self._fillers.values():
+            self._filler_tally[_TALLY_SLOT[filler.ready]] += 1
+            self._voice_enter(filler.voice_channel_id)
+
+    def _on_ready_changed(self, participant: Player, old: ReadyState, new: ReadyState) -> None:
+        """ Called by Player whenever its ready state changes. """
+        if participant.id in self._players:
+            tally = self._player_tally
+        elif participant.id in self._fillers:
+            tally = self._filler_tally
+        else:
+            return
+        tally[_TALLY_SLOT[old]] -= 1
+        tally[_TALLY_SLOT[new]] += 1
+        self.version += 1
+
+    def _on_joined_voice(self, participant: Player) -> None:
+        """ Called by Player when its joined_voice turns true. """
+        if participant.id in self._players:
+            self._unjoined_count -= 1
+
+    # -----------------------------
+    # Voice occupancy
+    # -----------------------------
+    def _reset_voice_counts(self) -> None:
+        self._voice_counts: Dict[int, int] = {} # voice channel id -> participants in it
+        self._channels_by_occupancy: Dict[int, int] = {} # participants -> voice channels holding that many
+        self._max_voice_occupancy = 0
+        self._unjoined_count = 0 # players whose joined_voice is still false
+
+    def _voice_enter(self, channel_id: Optional[int]) -> None:
+        if channel_id is None:
+            return
+        count = self._voice_counts.get(channel_id, 0) + 1
+        self._voice_counts[channel_id] = count
+        self._shift_occupancy(count - 1, count)
+
+    def _voice_leave(self, channel_id: Optional[int]) -> None:
+        if channel_id is None:
+            return
+        count = self._voice_counts[channel_id] - 1
+        if count:
+            self._voice_counts[channel_id] = count
+        else:
+            del self._voice_counts[channel_id]
+        self._shift_occupancy(count + 1, count)
+
+    def _shift_occupancy(self, old: int, new: int) -> None:
+        """ Moves one channel from holding old participants to new, which is always one more or one less. """
+        by_occupancy = self._channels_by_occupancy
+        if old:
+            by_occupancy[old] -= 1
+            if not by_occupancy[old]:
+                del by_occupancy[old]
+        if new:
+            by_occupancy[new] = by_occupancy.get(new, 0) + 1
+        # counts only move by one, so the busiest channel is either this one or still holds the old maximum
+        if new > self._max_voice_occupancy or (old == self._max_voice_occupancy and old not in by_occupancy):
+            self._max_voice_occupancy = new
+
+    @property
+    def max_voice_occupancy(self) -> int:
+        """ The most participants in any one voice channel. """
+        return self._max_voice_occupancy
+
+    @property
+    def unjoined_count(self) -> int:
+        """ Players that haven't joined voice since the lobby went active; 0 once it is 'voice active'. """
+        return self._unjoined_count
+
+    def voice_channel_counts(self) -> Dict[int, int]:
+        """ Returns voice channel id -> number of participants in it, for every channel with at least one. """
+        return dict(self._voice_counts)
 
     # -----------------------------
     # State
@@ -40,7 +210,7 @@ class Lobby:
     def transition(self, new_state: LobbyState) -> LobbyState:
         if not self.can_transition(new_state):
             raise ValueError(f"Invalid transition: {self._state} → {new_state}")
-        self._state = new_state
+        self._set_state(new_state)
         return self._state
 
     # -----------------------------
@@ -52,32 +222,41 @@ class Lobby:
 
     def is_player(self, user_id: int) -> bool:
         """ Returns if a user_id is in the player list of the lobby. """
-        return any(player.id == user_id for player in self._players)
+        return user_id in self._players
     
     def is_filler(self, user_id: int) -> bool:
         """ Returns if a user_id is in the filler list of the lobby. """
-        return any(player.id == user_id for player in self._fillers)
+        return user_id in self._fillers
 
     def in_lobby(self, user_id: int) -> bool:
         """ Returns if a user_id is in the lobby at all. """
-        return self.is_player(user_id) or any(player.id == user_id for player in self._fillers)
+        return user_id in self._players or user_id in self._fillers
+
+    def get_participant(self, user_id: int) -> Optional[Player]:
+        """ Returns the Player object for user_id, whether they are a player or a filler. """
+        return self._players.get(user_id) or self._fillers.get(user_id)
 
     def ready_up(self, user: discord.Member) -> ReadyResult:
         """ Readies up user_id. If the player is not in the lobby, add them as a filler. """
-        player = next((p for p in self._players if p == user.id), None)
+        return self.ready_up_by_id(user.id, voice_channel_id(user.voice))
+
+    def ready_up_by_id(self, user_id: int, voice_channel: Optional[int] = None) -> ReadyResult:
+        player = self._players.get(user_id)
         filler = None
         if not player:
-            filler = next((p for p in self._fillers if p == user.id), None)
+            filler = self._fillers.get(user_id)
         
         # add a player  
         if not player and not filler:
-            new_player = Player(user.id, False, user.voice)
-            self._fillers.append(new_player)
+            new_player = Player(user_id, False, voice_channel)
+            self._insert(self._fillers, new_player)
+            self._participant_joined(user_id)
             filler = new_player
         
         if (player and player.is_ready()) or (filler and filler.is_ready()):
             return ReadyResult.ALREADY_READY
     
+        self._record("ready", user_id, voice_channel)
         if player:
             player.ready_up()
             return ReadyResult.SUCCESS_PLAYER
@@ -87,35 +266,53 @@ class Lobby:
         
     def unready(self, user: discord.Member) -> ReadyResult:
         """ Unreadies user_id. """
-        player = next((p for p in self._players if p == user.id), None)
+        return self.unready_by_id(user.id)
+
+    def unready_by_id(self, user_id: int) -> ReadyResult:
+        player = self._players.get(user_id)
         filler = None
         if not player:
-            filler = next((p for p in self._fillers if p == user.id), None)
+            filler = self._fillers.get(user_id)
         if (player and player.is_not_ready()) or (filler and filler.is_not_ready()):
             return ReadyResult.ALREADY_READY
         if player:
+            self._record("unready", user_id)
             player.unready()
             return ReadyResult.SUCCESS_PLAYER
         elif filler:
+            self._record("unready", user_id)
             filler.unready()
             return ReadyResult.SUCCESS_FILLER
         else:
             return ReadyResult.NOT_IN_LOBBY
 
+    def count_players(self, ready: ReadyState) -> int:
+        """ Returns how many players are currently in the given ready state. """
+        return self._player_tally[_TALLY_SLOT[ready]]
+
+    def count_fillers(self, ready: ReadyState) -> int:
+        """ Returns how many fillers are currently in the given ready state. """
+        return self._filler_tally[_TALLY_SLOT[ready]]
+
+    def get_pending_fillers(self) -> List[Player]:
+        """ Returns the fillers that have not responded to the ready check yet. """
+        if not self.count_fillers(ReadyState.PENDING):
+            return []
+        return [f for f in self._fillers.values() if f.is_pending_ready()]
+
     def all_ready(self, treat_pending_as_declined: bool = False) -> bool:
         """ get the number of fillers we are allowed to fill in based on how many players have rejected
         pending_players_are_not_ready tells the function to count pending players as not_ready or not"""
-        players_ready = sum([1 for player in self._players if player.is_ready()])
+        players_ready = self.count_players(ReadyState.READY)
 
+        players_declined = self.count_players(ReadyState.NOT_READY)
         if treat_pending_as_declined:
-            players_declined = sum([1 for player in self._players if player.is_not_ready() or player.is_pending_ready()])
-        else:
-            players_declined = sum([1 for player in self._players if player.is_not_ready()])
+            players_declined += self.count_players(ReadyState.PENDING)
 
         if players_declined == 0:
             return players_ready == len(self._players)
         
-        fillers_ready = sum([1 for filler in self._fillers if filler.is_ready()])
+        fillers_ready = self.count_fillers(ReadyState.READY)
         # otherwise, if we have declined players, we need all other players ready and enough fillers to fill the declined players
         return players_ready == (len(self._players) - players_declined) and fillers_ready >= players_declined
 
@@ -124,52 +321,76 @@ class Lobby:
         Changes a participant's voicestate to new_state if they are in the lobby, and ignores it otherwise. 
         Also, if the lobby is active, this method updates their joined voice status. 
         """
-        participant = next((p for p in self._players if p == player_id), None)
-        if not participant:
-            participant = next((p for p in self._fillers if p == player_id), None)
+        self.set_participant_voice_channel(player_id, voice_channel_id(new_state))
 
+    def set_participant_voice_channel(self, player_id: int, channel_id: Optional[int]):
+        participant = self.get_participant(player_id)
         if participant:
-            participant.update_voice_state(new_state)
+            self._record("voice", player_id, channel_id)
+            if participant.voice_channel_id != channel_id:
+                self._voice_leave(participant.voice_channel_id)
+                self._voice_enter(channel_id)
+            participant.voice_channel_id = channel_id
             if self.is_active():
                 participant.update_joined_voice()
 
-    def get_participants(self):
-        return self._players + self._fillers
+    def update_joined_voice(self):
+        """ Updates every player's joined voice status, e.g. as the baseline when the lobby goes active. """
+        self._record("joined_voice")
+        for player in self._players.values():
+            player.update_joined_voice()
+
+    def get_participants(self) -> List[Player]:
+        return list(chain(self._players.values(), self._fillers.values()))
 
     @property
-    def get_players(self):
-        return self._players
+    def get_players(self) -> List[Player]:
+        return list(self._players.values())
     
     @property
-    def get_fillers(self):
-        return self._fillers
+    def get_fillers(self) -> List[Player]:
+        return list(self._fillers.values())
+
+    @property
+    def num_players(self) -> int:
+        return len(self._players)
+
+    @property
+    def num_fillers(self) -> int:
+        return len(self._fillers)
         
     def edit_time(self, new_time: int) -> None:
         """ Edits the time of the lobby. """
+        self._record("edit_time", new_time)
         self.time = new_time
+        self.version += 1
 
     def add_player(self, player: discord.Member, forced: bool) -> LobbyAddResult:
         """Adds a player to the player list, moving them from fillers if necessary."""
+        return self.add_player_by_id(player.id, forced, voice_channel_id(player.voice))
+
+    def add_player_by_id(self, user_id: int, forced: bool, voice_channel: Optional[int] = None) -> LobbyAddResult:
         if self._state == LobbyState.COMPLETED:
             return LobbyAddResult.LOBBY_COMPLETED
     
         if self._state == LobbyState.READY_CHECK:
             return LobbyAddResult.LOBBY_IN_READY_CHECK
 
-        if self.is_player(player.id):
+        if self.is_player(user_id):
             return LobbyAddResult.ALREADY_IN_LOBBY
 
         if len(self._players) < self.max_players:
+            self._record("add_player", user_id, forced, voice_channel)
             # look for an existing Player object in fillers
-            existing_player = next((f for f in self._fillers if f.id == player.id), None)
+            existing_player = self._pop(self._fillers, user_id)
             if existing_player:
-                self._fillers.remove(existing_player)
                 existing_player.force_added = forced # update forced
-                existing_player.voice_state = player.voice  # keep voice state fresh
-                self._players.append(existing_player)
+                existing_player.voice_channel_id = voice_channel  # keep voice state fresh
+                self._insert(self._players, existing_player)
             else:
                 # create new Player if they weren’t a filler
-                self._players.append(Player(player.id, forced, voice_state=player.voice))
+                self._insert(self._players, Player(user_id, forced, voice_channel))
+                self._participant_joined(user_id)
 
             return LobbyAddResult.SUCCESS
         else:
@@ -177,31 +398,37 @@ class Lobby:
 
     def add_filler(self, player: discord.Member, forced: bool) -> LobbyAddResult:
         """Adds a player to the filler list, moving them from players if necessary."""
+        return self.add_filler_by_id(player.id, forced, voice_channel_id(player.voice))
+
+    def add_filler_by_id(self, user_id: int, forced: bool, voice_channel: Optional[int] = None) -> LobbyAddResult:
         if self._state == LobbyState.COMPLETED:
             return LobbyAddResult.LOBBY_COMPLETED
         
         if self._state == LobbyState.READY_CHECK:
             return LobbyAddResult.LOBBY_IN_READY_CHECK
 
-        if any(f.id == player.id for f in self._fillers):
+        if user_id in self._fillers:
             return LobbyAddResult.ALREADY_IN_LOBBY
 
-        if self.is_player(player.id):
+        self._record("add_filler", user_id, forced, voice_channel)
+        existing_player = self._pop(self._players, user_id)
+        if existing_player:
             # move from players -> fillers
-            existing_player = next((p for p in self._players if p.id == player.id), None)
-            if existing_player:
-                self._players.remove(existing_player)
-                existing_player.force_added = forced
-                existing_player.voice_state = player.voice # keep voice state fresh
-                self._fillers.append(existing_player)
-                return LobbyAddResult.SUCCESS
+            existing_player.force_added = forced
+            existing_player.voice_channel_id = voice_channel # keep voice state fresh
+            self._insert(self._fillers, existing_player)
+            return LobbyAddResult.SUCCESS
         else:
             # brand new filler
-            self._fillers.append(Player(player.id, forced, player.voice))
+            self._insert(self._fillers, Player(user_id, forced, voice_channel))
+            self._participant_joined(user_id)
             return LobbyAddResult.SUCCESS
 
     def remove_participant(self, player: discord.Member) -> LobbyRemoveResult:
         """ Removes a player from the player or filler list. If the player leaving is the last player, the lobby will close. """
+        return self.remove_participant_by_id(player.id)
+
+    def remove_participant_by_id(self, user_id: int) -> LobbyRemoveResult:
         if self._state == LobbyState.COMPLETED:
             return LobbyRemoveResult.LOBBY_COMPLETED
         
@@ -209,14 +436,14 @@ class Lobby:
             return LobbyRemoveResult.LOBBY_IN_READY_CHECK
 
         lobby_result = None
-        if self.is_player(player.id):
-            self._players = [p for p in self._players if p.id != player.id]
+        if self._pop(self._players, user_id):
             lobby_result = LobbyRemoveResult.SUCCESS_PLAYER
-        elif any(f.id == player.id for f in self._fillers):
-            self._fillers = [f for f in self._fillers if f.id != player.id]
+        elif self._pop(self._fillers, user_id):
             lobby_result = LobbyRemoveResult.SUCCESS_FILLER
         else:
             return LobbyRemoveResult.NOT_IN_LOBBY
+        self._record("remove", user_id)
+        self._participants_left((user_id,))
 
         if not self._players and not self._fillers:
             lobby_result = LobbyRemoveResult.LOBBY_EMPTY
@@ -224,31 +451,43 @@ class Lobby:
         return lobby_result
 
     def _get_final_players(self) -> List[Player]:
-        # how many players are we short by?
+        # how many players are we short by? fillers are promoted in the order they joined.
         needed = self.max_players - len(self._players)
         if needed > 0:
-            return self._players + self._fillers[:needed]
-        return self._players
+            return list(chain(self._players.values(), islice(self._fillers.values(), needed)))
+        return list(self._players.values())
+
+    def _promote_fillers(self, fillers: Iterable[Player]) -> None:
+        """ Moves the given fillers to the end of the player list. """
+        for filler in list(fillers):
+            self._pop(self._fillers, filler.id)
+            self._insert(self._players, filler)
 
     # -----------------------------
     # Lifecycle
     # -----------------------------
     def start_ready_check(self):
         """ Starts ready check for this lobby. """
-        self._players = self._get_final_players()
+        self._record("start_ready_check")
+        self._promote_fillers(islice(self._fillers.values(), max(self.max_players - len(self._players), 0)))
 
-        self._state = LobbyState.READY_CHECK
+        self._set_state(LobbyState.READY_CHECK)
 
     def end_ready_check(self):
         """ Ends ready check for this lobby. """
+        self._record("end_ready_check")
         if self._state == LobbyState.READY_CHECK:
             self.transition(LobbyState.WAITING)
 
+        removed = [p.id for p in self.get_participants() if p.is_not_ready()]
         # any declined players should be removed from the lobby
-        self._players = [player for player in self._players if not player.is_not_ready()]
+        self._players = {pid: player for pid, player in self._players.items() if not player.is_not_ready()}
 
         # any declined fillers should be removed from the lobby
-        self._fillers = [filler for filler in self._fillers if not filler.is_not_ready()]
+        self._fillers = {fid: filler for fid, filler in self._fillers.items() if not filler.is_not_ready()}
+        self._recount()
+
+        self._participants_left(removed)
 
         for participant in self.get_participants():
             participant.reset()
@@ -269,42 +508,46 @@ class Lobby:
             # promote fillers if needed
             needed = len(final_players) - len(self._players)
             if needed > 0:
-                fillers_used = self._fillers[:needed]
-                self._players.extend(fillers_used)
-                del self._fillers[:needed]
+                self._promote_fillers(islice(self._fillers.values(), needed))
 
             self.started_at = int(time.time())
+            self._record("start", force, self.started_at)
             return True, final_players
 
         # not enough players, and not forced
         self.transition(LobbyState.PENDING)
+        self._record("start", force, None)
         return False, final_players
 
     def start_from_ready_check(self): 
         if self._state != LobbyState.READY_CHECK:
             return
 
+        previous_ids = [p.id for p in self.get_participants()]
+
         # start with ready players
-        final_players = [p for p in self._players if p.is_ready()]
+        final_players = {pid: p for pid, p in self._players.items() if p.is_ready()}
 
         # promote ready fillers if we still need players
-        needed_players = self.max_players - len(final_players)
-        ready_fillers = [f for f in self._fillers if f.is_ready()]
-        to_promote = ready_fillers[:needed_players]
+        needed_players = max(self.max_players - len(final_players), 0)
+        ready_fillers = (f for f in self._fillers.values() if f.is_ready())
+        to_promote = list(islice(ready_fillers, needed_players))
         for filler in to_promote:
-            self._fillers.remove(filler)
-            final_players.append(filler)
+            del self._fillers[filler.id]
+            final_players[filler.id] = filler
 
         # move unready players to fillers. Remove not_ready players from the player list altogether.
-        pending_players = [p for p in self._players if p.is_pending_ready()]
-        for player in pending_players:
-            self._players.remove(player)
-            self._fillers.append(player)
+        for pid, player in self._players.items():
+            if player.is_pending_ready():
+                self._fillers[pid] = player
 
         self._players = final_players
+        self._recount()
+        self._participants_left(previous_ids)
 
         self.transition(LobbyState.ACTIVE)
         self.started_at = int(time.time())
+        self._record("start_from_ready_check", self.started_at)
 
     def end(self) -> None:
         """Ends the lobby."""
@@ -313,11 +556,93 @@ class Lobby:
     def reset_pending(self) -> None:
         """Return from PENDING → WAITING when force start expires or is declined."""
         if self._state == LobbyState.PENDING:
+            self._record("reset_pending")
             self.transition(LobbyState.WAITING)
 
+    # -----------------------------
+    # Journal replay
+    # -----------------------------
+    def replay(self, op: str, args: list) -> None:
+        """ Re-applies a journal record written by _record. The lobby must not be journaling while replaying. """
+        if op == "add_player":
+            self.add_player_by_id(*args)
+        elif op == "add_filler":
+            self.add_filler_by_id(*args)
+        elif op == "remove":
+            self.remove_participant_by_id(*args)
+        elif op == "ready":
+            self.ready_up_by_id(*args)
+        elif op == "unready":
+            self.unready_by_id(*args)
+        elif op == "voice":
+            self.set_participant_voice_channel(*args)
+        elif op == "joined_voice":
+            self.update_joined_voice()
+        elif op == "edit_time":
+            self.edit_time(*args)
+        elif op == "start_ready_check":
+            self.start_ready_check()
+        elif op == "end_ready_check":
+            self.end_ready_check()
+        elif op == "start":
+            force, started_at = args
+            self.start(force)
+            if started_at is not None:
+                self.started_at = started_at
+        elif op == "start_from_ready_check":
+            self.start_from_ready_check()
+            self.started_at = args[0]
+        elif op == "reset_pending":
+            self.reset_pending()
+        else:
+            raise ValueError(f"Unknown lobby journal op: {op}")
+
+    # -----------------------------
+    # Snapshots
+    # -----------------------------
+    def to_dict(self) -> dict:
+        """ Returns a JSON-serializable snapshot of the lobby. """
+        return {
+            "id": self.id,
+            "owner": self.owner.to_dict(),
+            "time": self.time,
+            "max_players": self.max_players,
+            "game": self.game,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "state": self._state.name,
+            "players": [player.to_dict() for player in self._players.values()],
+            "fillers": [filler.to_dict() for filler in self._fillers.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Lobby":
+        """ Rebuilds a lobby from to_dict() output. The lobby is not attached to any manager. """
+        lobby = cls.__new__(cls)
+        lobby.id = data["id"]
+        lobby.owner = LobbyOwner.from_dict(data["owner"])
+        lobby.time = data["time"]
+        lobby.max_players = data["max_players"]
+        lobby.game = data["game"]
+        lobby.created_at = data["created_at"]
+        lobby.started_at = data["started_at"]
+        lobby._state = LobbyState[data["state"]]
+        lobby._players = {}
+        lobby._fillers = {}
+        lobby._player_tally = [0] * len(ReadyState)
+        lobby._filler_tally = [0] * len(ReadyState)
+        lobby.version = 0
+        lobby._reset_voice_counts()
+        for player in data["players"]:
+            lobby._insert(lobby._players, Player.from_dict(player))
+        for filler in data["fillers"]:
+            lobby._insert(lobby._fillers, Player.from_dict(filler))
+        lobby._manager = None
+        return lobby
+
     def __str__(self, delimiter="\n"):
-        player_list = ", ".join([f"<@{player.id}>" for player in self._players])
-        filler_list = ", ".join([f"<@{filler.id}>" for filler in self._fillers])
+        player_list = ", ".join([f"<@{player_id}>" for player_id in self._players])
+        filler_list = ", ".join([f"<@{filler_id}>" for filler_id in self._fillers])
         parts = [
             f"ID: {self.id}",
             f"Owner: <@{self.owner.id}>",
@@ -25,7 +25,7 @@ class LobbyState(Enum):
 TRANSITIONS = {
     LobbyState.WAITING: {LobbyState.PENDING, LobbyState.READY_CHECK, LobbyState.ACTIVE, LobbyState.COMPLETED},
     LobbyState.PENDING: {LobbyState.WAITING, LobbyState.ACTIVE, LobbyState.COMPLETED},
-    LobbyState.READY_CHECK: {LobbyState.WAITING, LobbyState.ACTIVE},
+    LobbyState.READY_CHECK: {LobbyState.WAITING, LobbyState.ACTIVE, LobbyState.COMPLETED},
     LobbyState.ACTIVE: {LobbyState.COMPLETED},
     LobbyState.COMPLETED: set(),  # terminal state
 }
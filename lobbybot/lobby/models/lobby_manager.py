@@ -1,30 +1,102 @@
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Set, TYPE_CHECKING
+from collections import defaultdict
 from .lobby import Lobby
 from discord import Member
 from datetime import datetime
 from .lobby_enums import LobbyState
+if TYPE_CHECKING:
+    from lobbybot.lobby.controllers.lobby_journal import LobbyJournal
+
 class LobbyManager:
     def __init__(self):
         self._lobbies: Dict[int, Lobby] = {} # owner id -> lobby
         self._id_counter = 0
-    
-    def create_lobby(self, owner: Member, time: int, max_players: int, game: str) -> Lobby:
-        """ Creates a lobby. Returns None if owner already has a lobby. """
+        self.journal: Optional["LobbyJournal"] = None # when set, every lobby mutation is appended to it
+
+        # indexes, kept up to date by the lobbies themselves through the _on_* hooks below
+        self._lobbies_by_id: Dict[int, Lobby] = {} # lobby id -> lobby
+        self._lobbies_by_participant: Dict[int, Set[int]] = defaultdict(set) # user id -> lobby ids
+        self._lobbies_by_state: Dict[LobbyState, Set[int]] = defaultdict(set) # state -> lobby ids
+
+    @property
+    def next_id(self) -> int:
+        """ The id the next lobby created here gets, unless it is given one. """
+        return self._id_counter
+
+    def create_lobby(self, owner: Member, time: int, max_players: int, game: str, lobby_id: Optional[int] = None) -> Lobby:
+        """
+        Creates a lobby. Returns None if owner already has a lobby, or if lobby_id is given and already taken.
+        lobby_id is for ids handed out by a shared state backend; without one the next local id is used.
+        """
         if owner.id in self._lobbies:
             return None
-        
-        lobby = Lobby(self._id_counter, owner, time, max_players, game, int(datetime.now().timestamp()))
-        self._lobbies[owner.id] = lobby
-        self._id_counter += 1
+        if lobby_id is None:
+            lobby_id = self._id_counter
+        elif lobby_id in self._lobbies_by_id:
+            return None
+
+        lobby = Lobby(lobby_id, owner, time, max_players, game, int(datetime.now().timestamp()))
+        self.add_lobby(lobby)
+        if self.journal:
+            self.journal.append("create", lobby.id, lobby.to_dict())
         return lobby
-    
+
+    def to_dict(self) -> dict:
+        """ Returns a JSON-serializable snapshot of every open lobby. """
+        return {
+            "id_counter": self._id_counter,
+            "lobbies": [lobby.to_dict() for lobby in self._lobbies.values()],
+        }
+
+    def load(self, data: dict) -> List[Lobby]:
+        """ Adds every lobby in to_dict() output, indexing them as usual. Returns the lobbies that were added. """
+        added = []
+        for lobby_data in data["lobbies"]:
+            lobby = Lobby.from_dict(lobby_data)
+            if self.add_lobby(lobby):
+                added.append(lobby)
+        self._id_counter = max(data["id_counter"], self._id_counter)
+        return added
+
+    def add_lobby(self, lobby: Lobby) -> bool:
+        """ Adds an existing lobby (e.g. a restored one). Returns False if its owner or id is already taken. """
+        if lobby.owner.id in self._lobbies or lobby.id in self._lobbies_by_id:
+            return False
+        self._lobbies[lobby.owner.id] = lobby
+        self._lobbies_by_id[lobby.id] = lobby
+        lobby.attach(self)
+        self._id_counter = max(self._id_counter, lobby.id + 1)
+        return True
+
+    def replace_lobby(self, lobby: Lobby) -> None:
+        """ Swaps in a newer copy of a lobby (e.g. from a shared state backend), closing whatever it replaces. """
+        old = self._lobbies_by_id.get(lobby.id)
+        if old:
+            self.close_lobby(old.owner.id)
+        if lobby.owner.id in self._lobbies:
+            self.close_lobby(lobby.owner.id)
+        self.add_lobby(lobby)
+        if self.journal:
+            self.journal.append("create", lobby.id, lobby.to_dict())
+
+    def apply(self, record: list) -> None:
+        """ Re-applies one journal record, as written by create_lobby, close_lobby or a Lobby mutation. """
+        _seq, op, lobby_id, *args = record
+        if op == "create":
+            self.add_lobby(Lobby.from_dict(args[0]))
+            return
+        lobby = self._lobbies_by_id.get(lobby_id)
+        if lobby is None:
+            return
+        if op == "close":
+            self.close_lobby(lobby.owner.id)
+        else:
+            lobby.replay(op, args)
+
     def get_lobby_by_id(self, lobby_id: int) -> Optional[Lobby]:
         """ Returns a lobby based on the lobby's id. Returns None if there is no such lobby. """
-        for lobby in self._lobbies.values():
-            if lobby.id == lobby_id:
-                return lobby
-        return None
-    
+        return self._lobbies_by_id.get(lobby_id)
+
     def get_all_lobbies(self) -> List[Lobby]:
         """ Returns a list of all lobbies. """
         return list(lobby for lobby in self._lobbies.values() if not lobby.is_completed())
@@ -32,22 +104,70 @@ class LobbyManager:
     def get_lobby_by_owner(self, owner_id: int) -> Optional[Lobby]:
         """ Returns a lobby based on the owner's id. Returns None if there is no such lobby. """
         return self._lobbies.get(owner_id)
-    
+
     def get_lobbies_by_participant(self, player_id: int, active: bool = False) -> List[Lobby]:
-        """ 
-        Returns a list of lobbies that include player_id as a player or filler.
+        """
+        Returns a list of lobbies that include player_id as a player or filler, oldest first.
         If active = True, only returns lobbies that are LobbyState.ACTIVE
         """
+        lobby_ids = self._lobbies_by_participant.get(player_id)
+        if not lobby_ids:
+            return []
+        lobbies = [self._lobbies_by_id[lobby_id] for lobby_id in sorted(lobby_ids)]
         if active:
-            return [lobby for lobby in self._lobbies.values() if lobby.in_lobby(player_id) and lobby.is_active()]
-        else:
-            return [lobby for lobby in self._lobbies.values() if lobby.in_lobby(player_id)]
-    
+            return [lobby for lobby in lobbies if lobby.is_active()]
+        return lobbies
+
+    def is_participant(self, player_id: int) -> bool:
+        """ Returns if player_id is a player or filler in any lobby. """
+        return player_id in self._lobbies_by_participant
+
+    def get_lobbies_by_state(self, state: LobbyState) -> List[Lobby]:
+        """ Returns all lobbies currently in state, oldest first. """
+        return [self._lobbies_by_id[lobby_id] for lobby_id in sorted(self._lobbies_by_state.get(state, ()))]
+
     def close_lobby(self, owner_id: int) -> bool:
         """ Closes a lobby based on the owner's id. Returns True if successful, and False otherwise. """
-        if owner_id in self._lobbies: 
-            self._lobbies[owner_id].end()
-            del self._lobbies[owner_id]
+        if owner_id in self._lobbies:
+            lobby = self._lobbies.pop(owner_id)
+            if self.journal:
+                self.journal.append("close", lobby.id)
+            lobby.end()
+            lobby.detach()
+            self._unindex(lobby)
             return True
         return False
-    
+
+    # -----------------------------
+    # Index hooks (called by Lobby)
+    # -----------------------------
+    def _on_participant_added(self, lobby: Lobby, user_id: int) -> None:
+        self._lobbies_by_participant[user_id].add(lobby.id)
+
+    def _on_participant_removed(self, lobby: Lobby, user_id: int) -> None:
+        lobby_ids = self._lobbies_by_participant.get(user_id)
+        if lobby_ids is None:
+            return
+        lobby_ids.discard(lobby.id)
+        if not lobby_ids:
+            del self._lobbies_by_participant[user_id]
+
+    def _on_state_changed(self, lobby: Lobby, old_state: Optional[LobbyState], new_state: LobbyState) -> None:
+        if old_state is not None:
+            self._discard_state(lobby.id, old_state)
+        self._lobbies_by_state[new_state].add(lobby.id)
+
+    def _discard_state(self, lobby_id: int, state: LobbyState) -> None:
+        lobby_ids = self._lobbies_by_state.get(state)
+        if lobby_ids is None:
+            return
+        lobby_ids.discard(lobby_id)
+        if not lobby_ids:
+            del self._lobbies_by_state[state]
+
+    def _unindex(self, lobby: Lobby) -> None:
+        """ Drops every index entry that points at lobby. """
+        self._lobbies_by_id.pop(lobby.id, None)
+        for participant in lobby.get_participants():
+            self._on_participant_removed(lobby, participant.id)
+        self._discard_state(lobby.id, lobby.state)
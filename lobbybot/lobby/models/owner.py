@@ -0,0 +1,28 @@
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from discord import Member
+
+class LobbyOwner:
+    """ Snapshot of the lobby owner's display info, taken when the lobby is created. """
+    __slots__ = ("id", "name", "display_name", "avatar_url")
+
+    def __init__(self, id: int, name: str, display_name: str, avatar_url: str):
+        self.id = id
+        self.name = name
+        self.display_name = display_name
+        self.avatar_url = avatar_url
+
+    @classmethod
+    def from_member(cls, member: "Member") -> "LobbyOwner":
+        return cls(member.id, member.name, member.display_name, member.display_avatar.url)
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "display_name": self.display_name, "avatar_url": self.avatar_url}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LobbyOwner":
+        return cls(data["id"], data["name"], data["display_name"], data["avatar_url"])
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
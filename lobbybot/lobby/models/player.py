@@ -2,25 +2,41 @@ from typing import TYPE_CHECKING, Optional
 from .lobby_enums import ReadyState
 if TYPE_CHECKING:
     from discord import VoiceState
+    from .lobby import Lobby
 
+def voice_channel_id(voice_state: Optional["VoiceState"]) -> Optional[int]:
+    """ Returns the id of the voice channel in voice_state, or None if not connected. """
+    if voice_state and voice_state.channel:
+        return voice_state.channel.id
+    return None
 
 class Player:
-    def __init__(self, id: int, force_added: bool = False, voice_state: "VoiceState" = None):
+    # players are created per lobby, per user, so keep them small and free of discord objects
+    __slots__ = ("id", "force_added", "voice_channel_id", "joined_voice", "ready", "lobby")
+
+    def __init__(self, id: int, force_added: bool = False, voice_channel_id: Optional[int] = None):
         self.id = id
         self.force_added = force_added
 
-        self.voice_state: Optional["VoiceState"] = voice_state
+        self.voice_channel_id: Optional[int] = voice_channel_id
         self.joined_voice: bool = False
-        self.ready = ReadyState
+        self.ready = ReadyState.PENDING
+        self.lobby: Optional["Lobby"] = None # set by the lobby this player belongs to
     
+    def _set_ready(self, new_ready: ReadyState):
+        old_ready = self.ready
+        self.ready = new_ready
+        if self.lobby and old_ready != new_ready:
+            self.lobby._on_ready_changed(self, old_ready, new_ready)
+
     def ready_up(self):
-        self.ready = ReadyState.READY
+        self._set_ready(ReadyState.READY)
 
     def reset(self):
-        self.ready = ReadyState.PENDING
+        self._set_ready(ReadyState.PENDING)
 
     def unready(self):
-        self.ready = ReadyState.NOT_READY
+        self._set_ready(ReadyState.NOT_READY)
     
     def is_ready(self) -> bool:
         return self.ready == ReadyState.READY
@@ -32,14 +48,33 @@ class Player:
         return self.ready == ReadyState.NOT_READY
     
     def update_voice_state(self, new_state: Optional["VoiceState"]):
-        self.voice_state = new_state
+        self.voice_channel_id = voice_channel_id(new_state)
     
     def update_joined_voice(self):
         """ 
         joined_voice is a parameter that describes if a player has joined voice while being in an active lobby or not.
         Once it turns true, it should never turn false again.
         """
-        self.joined_voice = self.joined_voice or bool(self.voice_state and self.voice_state.channel)
+        if not self.joined_voice and self.voice_channel_id is not None:
+            self.joined_voice = True
+            if self.lobby:
+                self.lobby._on_joined_voice(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "force_added": self.force_added,
+            "voice_channel_id": self.voice_channel_id,
+            "joined_voice": self.joined_voice,
+            "ready": self.ready.name,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Player":
+        player = cls(data["id"], data["force_added"], data["voice_channel_id"])
+        player.joined_voice = data["joined_voice"]
+        player.ready = ReadyState[data["ready"]]
+        return player
 
     def __eq__(self, other):
         if isinstance(other, Player):
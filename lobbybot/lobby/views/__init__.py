@@ -1,6 +1,7 @@
 from .lobby_views import (
     WaitingLobbyView, 
-    ActiveLobbyView
+    ActiveLobbyView,
+    parse_lobby_custom_id
 )
 from .force_start_view import ForceStartView
 from .lobby_select_view import LobbySelectView
@@ -2,6 +2,7 @@ import discord
 from lobbybot.lobby.models import Lobby
 from typing import TYPE_CHECKING, List
 from lobbybot.images import get_img_store
+from lobbybot.metrics import BUTTON_SECONDS, timed, traced
 if TYPE_CHECKING:
     from lobbybot.lobby.controllers import LobbyController
 
@@ -18,11 +19,15 @@ class CloseConfirmationView(discord.ui.View):
         self.controller = controller
     
     @discord.ui.button(label="✅", style=discord.ButtonStyle.secondary, row=0)
+    @traced("button confirm_close", root=True)
+    @timed(BUTTON_SECONDS.labels("confirm_close"))
     async def confirm_close_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         logger.info(f"confirming non-owner close for lobby {self.lobby.id}")
         await self.controller.handle_close_confirmation(self.msg, self.user_id, interaction, self.lobby, True)
     
     @discord.ui.button(label="❌", style=discord.ButtonStyle.secondary, row=0)
+    @traced("button deny_close", root=True)
+    @timed(BUTTON_SECONDS.labels("deny_close"))
     async def deny_close_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         logger.info(f"denying non-owner close for lobby {self.lobby.id}")
         await self.controller.handle_close_confirmation(self.msg, self.user_id, interaction, self.lobby, False)
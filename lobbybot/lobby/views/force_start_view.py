@@ -1,5 +1,6 @@
 import discord
 from lobbybot.lobby.models import Lobby
+from lobbybot.metrics import BUTTON_SECONDS, timed, traced
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from lobbybot.lobby.controllers import LobbyController
@@ -18,13 +19,15 @@ class ForceStartView(discord.ui.View):
     def get_embed(self):
         embed = discord.Embed(
             title=f"Force Start Lobby {self.lobby.id}?",
-            description=f"{self.lobby.owner.mention} is requesting to force start the lobby with {len(self.lobby.get_players)}/{self.lobby.max_players} players.",
+            description=f"{self.lobby.owner.mention} is requesting to force start the lobby with {self.lobby.num_players}/{self.lobby.max_players} players.",
             color=discord.Color.orange()
         )
         embed.set_footer(text=f"You have {int(self.timeout)} seconds to respond.")
         return embed
 
     @discord.ui.button(label="Force Start", style=discord.ButtonStyle.green)
+    @traced("button force_start", root=True)
+    @timed(BUTTON_SECONDS.labels("force_start"))
     async def force_start_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         logger.info(f"Lobby {self.lobby.id}: {interaction.user.name}({interaction.user.id}) pressed Force Start button.")
         handled = await self.controller.handle_start_lobby(interaction, self.lobby, forced=True)
@@ -35,6 +38,8 @@ class ForceStartView(discord.ui.View):
             await interaction.message.edit(view=self)
     
     @discord.ui.button(label="Wait For More Players", style=discord.ButtonStyle.red)
+    @traced("button deny_force_start", root=True)
+    @timed(BUTTON_SECONDS.labels("deny_force_start"))
     async def deny_force_start_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         logger.info(f"Lobby {self.lobby.id}: {interaction.user.name}({interaction.user.id}) pressed Decline Force Start button.")
         handled = await self.controller.handle_force_start_deny(self.lobby, interaction)
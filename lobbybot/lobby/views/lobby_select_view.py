@@ -2,6 +2,7 @@ import discord
 from lobbybot.lobby.models import Lobby
 from typing import List
 from lobbybot.timezones import ASAP_TIME
+from lobbybot.metrics import BUTTON_SECONDS, timed, traced
 from datetime import datetime
 import pytz
 
@@ -31,6 +32,8 @@ class LobbySelectView(discord.ui.View):
         )
         self.add_item(select)
 
+        @traced("button select_lobby", root=True)
+        @timed(BUTTON_SECONDS.labels("select_lobby"))
         async def select_callback(interaction: discord.Interaction):
             lobby_id = int(select.values[0])
             await on_select(interaction, lobby_id, **self.extra_args)
@@ -1,11 +1,9 @@
 import discord
 from lobbybot.lobby.models import Lobby, LobbyState
 from lobbybot.timezones import ASAP_TIME
-from typing import TYPE_CHECKING
+from typing import Optional, Tuple
 from lobbybot.images import get_img_store
 import random
-if TYPE_CHECKING:
-    from lobbybot.lobby.controllers import LobbyController
 
 import logging
 
@@ -19,18 +17,58 @@ game_aliases = {
 # flatten aliases into a single dict mapping alias -> emoji
 alias_to_emoji = {alias.lower(): emoji for emoji, aliases in game_aliases.items() for alias in aliases}
 
+LOBBY_BUTTON_PREFIX = "lobby"
+
+def lobby_custom_id(action: str, lobby_id: int) -> str:
+    """custom_id of a lobby message button: it names the lobby and the action, so no view has to be kept to handle it"""
+    return f"{LOBBY_BUTTON_PREFIX}:{action}:{lobby_id}"
+
+def parse_lobby_custom_id(custom_id: str) -> Optional[Tuple[str, int]]:
+    """Returns (action, lobby id) for a lobby message button's custom_id, or None if it isn't one"""
+    parts = custom_id.split(":")
+    if len(parts) != 3 or parts[0] != LOBBY_BUTTON_PREFIX or not parts[2].isdigit():
+        return None
+    return parts[1], int(parts[2])
+
 class BaseLobbyView(discord.ui.View):
-    def __init__(self, timeout: int, lobby: Lobby, controller: "LobbyController"):
-        super().__init__(timeout=timeout)
+    """
+    Buttons and embed for a lobby message. Button clicks aren't handled here: every custom_id encodes the lobby id and
+    the action, and LobbyController.handle_lobby_button routes them through the lobby manager. The view is stopped
+    as soon as it is built, so discord.py doesn't keep it (and a timeout) alive for every message it was sent with,
+    and the buttons keep working after a restart.
+    """
+    BUTTONS: Tuple[Tuple[str, str, discord.ButtonStyle, int], ...] = () # (action, label, style, row)
+
+    def __init__(self, lobby: Lobby):
+        super().__init__(timeout=None)
         self.lobby = lobby
-        self.controller = controller
         self.img = get_img_store().get_random_img()
-    
-    def log_button(self, interaction: discord.Interaction, button_name: str):
-        """Log button interactions for debugging"""
-        logger.info(f"Lobby {self.lobby.id}: {interaction.user.name}({interaction.user.id}) pressed {button_name} button.")
-    
+        self._rendered: Optional[Tuple[int, discord.Embed]] = None # (lobby version, embed) of the last render
+        for action, label, style, row in self.BUTTONS:
+            self.add_item(discord.ui.Button(label=label, style=style, row=row, custom_id=lobby_custom_id(action, lobby.id)))
+        self.stop()
+
+    def refresh_buttons(self):
+        """Disable the play button if the lobby is full"""
+        play_id = lobby_custom_id("play", self.lobby.id)
+        for item in self.children:
+            if isinstance(item, discord.ui.Button) and item.custom_id == play_id:
+                item.disabled = self.lobby.is_full()
+
     def create_lobby_embed(self) -> discord.Embed:
+        """
+        Returns the embed for the lobby's current version, only rendering it again if the lobby changed. If a new render
+        comes out the same as the last one (e.g. someone joined and left again), the previous embed object is returned,
+        so callers can skip no-op edits by comparing identity.
+        """
+        if self._rendered is None or self._rendered[0] != self.lobby.version:
+            embed = self._render_embed()
+            if self._rendered and embed.to_dict() == self._rendered[1].to_dict():
+                embed = self._rendered[1]
+            self._rendered = (self.lobby.version, embed)
+        return self._rendered[1]
+
+    def _render_embed(self) -> discord.Embed:
         """Creates a Discord embed for a view"""
         if self.lobby.state == LobbyState.ACTIVE:
             # scheduled_time = f"<t:{self.lobby.time}:t>" if self.lobby.time != ASAP_TIME else "ASAP"
@@ -57,7 +95,7 @@ class BaseLobbyView(discord.ui.View):
 
         embed.set_author(
             name=f"{self.lobby.owner.name}'s {'Active ' if self.lobby.state == LobbyState.ACTIVE else ''}Lobby",
-            icon_url=self.lobby.owner.display_avatar.url
+            icon_url=self.lobby.owner.avatar_url
         )
 
         embed.description = f"🕒 {time_display}"   
@@ -74,68 +112,31 @@ class BaseLobbyView(discord.ui.View):
 
         players_text = "\n".join(player_list) if player_list else "None"
         embed.add_field(
-            name=f"👥 Players ({len(self.lobby.get_players)}/{self.lobby.max_players})",
+            name=f"👥 Players ({self.lobby.num_players}/{self.lobby.max_players})",
             value=players_text,
             inline=True
         )
 
-        fillers_text = "\n".join([f"<@{filler.id}>" for filler in self.lobby._fillers]) if self.lobby._fillers else "None"
+        fillers_text = "\n".join([f"<@{filler.id}>" for filler in self.lobby.get_fillers]) if self.lobby.num_fillers else "None"
         embed.add_field(name="🧩 Fillers", value=fillers_text, inline=True)
 
         embed.set_footer(text=f"Lobby ID: {self.lobby.id}")
         return embed
 
 class WaitingLobbyView(BaseLobbyView):
-    @discord.ui.button(label="Join as Player", style=discord.ButtonStyle.primary, row=0)
-    async def play_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "play")
-        await self.controller.handle_join_lobby(interaction, self.lobby, interaction.user, is_filler=False)
-    
-    @discord.ui.button(label="Join as Filler", style=discord.ButtonStyle.secondary, row=0)
-    async def fill_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "fill")
-        await self.controller.handle_join_lobby(interaction, self.lobby, interaction.user, is_filler=True)
-
-    @discord.ui.button(label="Leave Lobby", style=discord.ButtonStyle.red, row=0)
-    async def leave_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "leave_waiting")
-        await self.controller.handle_leave_lobby(interaction, self.lobby, interaction.user)
-    
-    @discord.ui.button(label="Start Ready Check", style=discord.ButtonStyle.green, row=1)
-    async def ready_check_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "ready_check")
-        await self.controller.handle_start_ready_check(interaction, self.lobby)
-
-    @discord.ui.button(label="Force Start", style=discord.ButtonStyle.gray, row=1)
-    async def start_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "start")
-        await self.controller.handle_start_lobby(interaction, self.lobby, forced=False)
-    
-    @discord.ui.button(label="Close Lobby", style=discord.ButtonStyle.red, row=1)
-    async def close_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "close_waiting")
-        await self.controller.handle_close_lobby(interaction, self.lobby)
+    BUTTONS = (
+        ("play", "Join as Player", discord.ButtonStyle.primary, 0),
+        ("fill", "Join as Filler", discord.ButtonStyle.secondary, 0),
+        ("leave", "Leave Lobby", discord.ButtonStyle.red, 0),
+        ("ready_check", "Start Ready Check", discord.ButtonStyle.green, 1),
+        ("start", "Force Start", discord.ButtonStyle.gray, 1),
+        ("close", "Close Lobby", discord.ButtonStyle.red, 1),
+    )
 
 class ActiveLobbyView(BaseLobbyView):
-    def __init__(self, timeout: int, lobby: Lobby, controller: "LobbyController"):
-        super().__init__(timeout, lobby, controller)
-
-    @discord.ui.button(label="Join as Player", style=discord.ButtonStyle.primary, row=0)
-    async def play_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "play_active")
-        await self.controller.handle_join_lobby(interaction, self.lobby, interaction.user, is_filler=False)
-
-    @discord.ui.button(label="Join as Filler", style=discord.ButtonStyle.secondary, row=0)
-    async def fill_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "fill_active")
-        await self.controller.handle_join_lobby(interaction, self.lobby, interaction.user, is_filler=True)
-
-    @discord.ui.button(label="Leave Lobby", style=discord.ButtonStyle.red, row=0)
-    async def dropout_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "leave_active")
-        await self.controller.handle_dropout_active(interaction, self.lobby, interaction.user)
-
-    @discord.ui.button(label="Close Lobby", style=discord.ButtonStyle.red, row=1)
-    async def end_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "close_active")
-        await self.controller.handle_end_lobby(interaction, self.lobby)
+    BUTTONS = (
+        ("play", "Join as Player", discord.ButtonStyle.primary, 0),
+        ("fill", "Join as Filler", discord.ButtonStyle.secondary, 0),
+        ("dropout", "Leave Lobby", discord.ButtonStyle.red, 0),
+        ("end", "Close Lobby", discord.ButtonStyle.red, 1),
+    )
@@ -18,7 +18,7 @@ def make_lobby_notif_embed(lobby: Lobby, msg: str, guild: Optional[str] = None,
         embed.set_image(url=get_img_store().get_random_img())
     embed.set_author(
         name=f"{lobby.owner.name}'s {lobby.game} lobby",
-        icon_url=lobby.owner.display_avatar.url
+        icon_url=lobby.owner.avatar_url
     )
 
     if lobby.time != ASAP_TIME:
@@ -42,7 +42,7 @@ def make_lobby_invite_embed(lobby: Lobby, guild: Optional[str] = None, channel:
         embed.set_image(url=get_img_store().get_random_img())
     embed.set_author(
         name=f"{lobby.owner.name}'s {lobby.game} lobby",
-        icon_url=lobby.owner.display_avatar.url
+        icon_url=lobby.owner.avatar_url
     )
 
     if lobby.time != ASAP_TIME:
@@ -54,20 +54,18 @@ def make_lobby_invite_embed(lobby: Lobby, guild: Optional[str] = None, channel:
     embed.timestamp = ts
     return embed
 
-def make_lobby_overview_embed(lobbies: List[Lobby], threads: List[discord.Thread]) -> discord.Embed:
-    """Creates an embed listing all active lobbies in this channel with links to their threads"""
+def make_lobby_overview_embed(lobbies: List[Lobby], jump_urls: List[str]) -> discord.Embed:
+    """Creates an embed listing all active lobbies in this channel with links to their lobby messages"""
     embed = discord.Embed(
         title="Active Lobbies",
         description="Here are the currently active lobbies in this channel:",
         color=discord.Color.pink()
     )
 
-    for lobby, thread in zip(lobbies, threads):
-        if thread:
-            embed.add_field(
-                name=f"{lobby.game} by {lobby.owner.display_name}",
-                value=f"[Join Thread]({thread.jump_url})",
-                inline=False
-            )
+    for lobby, jump_url in zip(lobbies, jump_urls):
+        embed.add_field(
+            name=f"{lobby.game} by {lobby.owner.display_name}",
+            value=f"👥 {lobby.num_players}/{lobby.max_players} • [Jump to lobby]({jump_url})",
+            inline=False
+        )
     return embed
-
@@ -1,10 +1,8 @@
 import discord
 from lobbybot.lobby.models import Lobby, Player, LobbyState
 from lobbybot.timezones import ASAP_TIME
-from typing import TYPE_CHECKING, List
+from typing import List
 from lobbybot.images import get_img_store
-if TYPE_CHECKING:
-    from lobbybot.lobby.controllers import LobbyController
 from lobbybot.lobby.views.lobby_views import BaseLobbyView, alias_to_emoji
 
 import logging
@@ -12,11 +10,17 @@ import logging
 logger = logging.getLogger(__name__)
 
 class ReadyCheckLobbyView(BaseLobbyView):
-    def __init__(self, timeout: int, lobby: Lobby, controller: "LobbyController", timeout_time_utc: int):
-        super().__init__(timeout, lobby, controller)
+    BUTTONS = (
+        ("ready", "Ready!", discord.ButtonStyle.primary, 0),
+        ("not_ready", "Not Ready!", discord.ButtonStyle.red, 0),
+        ("cancel_ready", "Cancel Ready Check", discord.ButtonStyle.secondary, 0),
+    )
+
+    def __init__(self, lobby: Lobby, timeout_time_utc: int):
+        super().__init__(lobby)
         self.timeout_time_utc = timeout_time_utc
     
-    def create_lobby_embed(self):
+    def _render_embed(self):
         # Set color for ready check state
         color = discord.Color.orange()
 
@@ -30,7 +34,7 @@ class ReadyCheckLobbyView(BaseLobbyView):
 
         embed.set_author(
             name=f"{self.lobby.owner.name}'s Lobby",
-            icon_url=self.lobby.owner.display_avatar.url
+            icon_url=self.lobby.owner.avatar_url
         )
 
         if self.img:
@@ -66,18 +70,3 @@ class ReadyCheckLobbyView(BaseLobbyView):
 
         embed.set_footer(text=f"Lobby ID: {self.lobby.id} • Players that don't ready up may be replaced by ready fillers.")
         return embed
-
-    @discord.ui.button(label="Ready!", style=discord.ButtonStyle.primary, row=0)
-    async def ready_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "ready")
-        await self.controller.handle_ready(interaction, self.lobby)
-
-    @discord.ui.button(label="Not Ready!", style=discord.ButtonStyle.red, row=0)
-    async def not_ready_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "not_ready")
-        await self.controller.handle_not_ready(interaction, self.lobby)
-    
-    @discord.ui.button(label="Cancel Ready Check", style=discord.ButtonStyle.secondary, row=0)
-    async def cancel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.log_button(interaction, "cancel_ready")
-        await self.controller.handle_end_ready_check(interaction, self.lobby)
@@ -0,0 +1,4 @@
+from .context import FIELDS, log_context, bind_log_context, use_log_fields, current_log_fields
+from .formatters import TEXT_FORMAT, JsonFormatter
+from .handlers import NonBlockingQueueHandler, SizeAndTimeRotatingFileHandler
+from .pipeline import LogPipeline, start_logging, skip_unused_record_fields
@@ -0,0 +1,38 @@
+from contextvars import ContextVar
+from typing import Optional
+
+FIELDS = ("lobby_id", "user_id", "guild_id") # what JSON records carry besides the message
+
+_fields: ContextVar[Optional[dict]] = ContextVar("lobbybot_log_fields", default=None)
+
+class _UseFields:
+    __slots__ = ("fields", "_token")
+
+    def __init__(self, fields: Optional[dict]):
+        self.fields = fields
+
+    def __enter__(self):
+        self._token = _fields.set(self.fields)
+        return self.fields
+
+    def __exit__(self, exc_type, exc, tb):
+        _fields.reset(self._token)
+        return False
+
+def current_log_fields() -> Optional[dict]:
+    """ The lobby/user/guild ids records logged here are tagged with. """
+    return _fields.get()
+
+def log_context(**fields):
+    """ Tags every record logged inside the block with fields (lobby_id, user_id, guild_id), on top of the current ones. """
+    current = _fields.get()
+    return _UseFields({**current, **fields} if current else fields)
+
+def bind_log_context(**fields):
+    """ Like log_context, but for the rest of the current task, for entry points that can't be a with block. """
+    current = _fields.get()
+    _fields.set({**current, **fields} if current else fields)
+
+def use_log_fields(fields: Optional[dict]):
+    """ Runs the block with fields from current_log_fields() elsewhere, e.g. in a worker running a queued command. """
+    return _UseFields(fields)
@@ -0,0 +1,28 @@
+import json
+from logging import Formatter, LogRecord
+
+from .context import FIELDS
+
+TEXT_FORMAT = "%(asctime)s:%(levelname)s:%(name)s: %(message)s"
+
+class JsonFormatter(Formatter):
+    """
+    One JSON object per line: time, level, logger and message, plus lobby_id/user_id/guild_id when the record was
+    logged inside a log context (or passed them as extra=), and the traceback if there is one.
+    """
+    def format(self, record: LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
@@ -0,0 +1,60 @@
+import queue
+import time
+from logging import LogRecord
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+from .context import current_log_fields
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    The only handler on the root logger. Emitting a record only resolves its message and tags it with the current log
+    context, then puts it on the writer thread's queue; formatting and disk writes happen there. When the writer falls
+    more than max_queued records behind, records are dropped and counted rather than blocking the event loop.
+    """
+    def __init__(self, record_queue: queue.SimpleQueue, max_queued: int):
+        super().__init__(record_queue)
+        self.max_queued = max_queued
+        self.dropped = 0
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        # the arguments may change once the caller moves on, so the message is rendered now; tracebacks stay as
+        # exc_info and are formatted by the writer
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        fields = current_log_fields()
+        if fields:
+            for name, value in fields.items():
+                if not hasattr(record, name): # extra= on the call wins over the context
+                    setattr(record, name, value)
+        return record
+
+    def enqueue(self, record: LogRecord):
+        # a SimpleQueue takes no locks in Python, unlike a bounded queue.Queue, so the bound is checked here
+        if self.queue.qsize() >= self.max_queued:
+            self.dropped += 1
+        else:
+            self.queue.put_nowait(record)
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """
+    Appends to filename and rolls it over to filename.1 (keeping backup_count old files, at least one) once it grows
+    past max_bytes, once it has been open for interval seconds, and on startup if a previous run left it non-empty.
+    Either limit can be 0 to turn it off.
+    """
+    def __init__(self, filename, max_bytes: int, interval: float, backup_count: int, encoding: str = "utf-8"):
+        super().__init__(filename, mode="a", maxBytes=max_bytes, backupCount=max(backup_count, 1), encoding=encoding)
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+        if self.stream.tell() > 0:
+            self.doRollover()
+
+    def shouldRollover(self, record: LogRecord) -> bool:
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        # checked before the write, so a file can end up one record over max_bytes; that saves formatting every
+        # record twice just to measure it
+        return bool(self.maxBytes) and self.stream is not None and self.stream.tell() >= self.maxBytes
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
@@ -0,0 +1,110 @@
+import atexit
+import logging
+import queue
+import re
+import sys
+from logging import Formatter, Handler, StreamHandler, getLogger
+from logging.handlers import QueueListener
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from .formatters import TEXT_FORMAT, JsonFormatter
+from .handlers import NonBlockingQueueHandler, SizeAndTimeRotatingFileHandler
+
+QUEUE_SIZE = 10_000 # records waiting for the writer before new ones are dropped
+
+# record fields the logging module works out on every call, by the process-wide switch that turns them off
+CALLER_FIELDS = ("pathname", "filename", "module", "lineno", "funcName") # logging._srcfile; finding the caller walks the stack
+THREAD_FIELDS = ("thread", "threadName") # logging.logThreads
+PROCESS_FIELDS = ("process", "processName") # logging.logProcesses and logging.logMultiprocessing
+
+class LogPipeline:
+    """
+    Logging off the event loop: the root logger gets a NonBlockingQueueHandler, and a background writer thread takes
+    records off its queue and hands them to the real handlers (the rotating log file, the console). stop() writes out
+    whatever is still queued; it also runs at exit.
+
+    With skip_unused_fields, start() also stops the logging module from filling in the record fields none of the
+    handlers' formatters use (see skip_unused_record_fields), and stop() turns them back on.
+    """
+    def __init__(self, handlers: List[Handler], queue_size: int = QUEUE_SIZE, skip_unused_fields: bool = False):
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.handler = NonBlockingQueueHandler(self.queue, queue_size)
+        self.handlers = handlers
+        self.skip_unused_fields = skip_unused_fields
+        self._writer = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self._restore_fields: Optional[Callable[[], None]] = None
+        self.running = False
+
+    def start(self):
+        if self.running:
+            return
+        if self.skip_unused_fields:
+            self._restore_fields = skip_unused_record_fields(handler.formatter for handler in self.handlers)
+        self._writer.start()
+        self.running = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._writer.stop()
+        for handler in self.handlers:
+            handler.flush()
+        if self._restore_fields:
+            self._restore_fields()
+            self._restore_fields = None
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+    def queued(self) -> int:
+        return self.queue.qsize()
+
+def _formats_any(formatters: List[Formatter], fields: Iterable[str]) -> bool:
+    pattern = re.compile(r"\b(?:" + "|".join(fields) + r")\b")
+    return any(pattern.search(formatter._style._fmt) for formatter in formatters)
+
+def skip_unused_record_fields(formatters: Iterable[Optional[Formatter]]) -> Callable[[], None]:
+    """
+    Stops the logging module from working out, on every call, the fields none of formatters use: which file, line
+    and function a record came from, and which thread and process made it. The switches are process-wide, so they
+    also apply to every other logger and handler; callers opt in. Returns a function that puts them back.
+    """
+    formatters = [formatter or logging._defaultFormatter for formatter in formatters]
+    saved = (logging._srcfile, logging.logThreads, logging.logProcesses, logging.logMultiprocessing)
+    if not _formats_any(formatters, CALLER_FIELDS):
+        logging._srcfile = None
+    if not _formats_any(formatters, THREAD_FIELDS):
+        logging.logThreads = False
+    if not _formats_any(formatters, PROCESS_FIELDS):
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+    def restore():
+        logging._srcfile, logging.logThreads, logging.logProcesses, logging.logMultiprocessing = saved
+    return restore
+
+def start_logging(path: Path, level: int, json_records: bool = False, max_bytes: int = 0, rotate_seconds: float = 0,
+                  backup_count: int = 1, queue_size: int = QUEUE_SIZE, console: bool = True,
+                  skip_unused_fields: bool = False) -> LogPipeline:
+    """
+    Sends the root logger's records through a LogPipeline to a rotating log file at path (as JSON lines if json_records)
+    and, if console, to stderr. Returns the running pipeline.
+    """
+    file_handler = SizeAndTimeRotatingFileHandler(path, max_bytes, rotate_seconds, backup_count)
+    file_handler.setFormatter(JsonFormatter() if json_records else Formatter(TEXT_FORMAT))
+    handlers: List[Handler] = [file_handler]
+    if console:
+        console_handler = StreamHandler(sys.stderr)
+        console_handler.setFormatter(Formatter(TEXT_FORMAT))
+        handlers.append(console_handler)
+
+    pipeline = LogPipeline(handlers, queue_size, skip_unused_fields)
+    root = getLogger()
+    root.setLevel(level)
+    root.addHandler(pipeline.handler)
+    pipeline.start()
+    return pipeline
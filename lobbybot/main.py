@@ -1,21 +1,28 @@
 # library imports
 import discord
 import logging
-import re
+import time
 
 from discord.ext import commands
 
 from .timezones import set_time_zone
-from lobbybot.settings import DISCORD_API_SECRET, VERSION
+from lobbybot.settings import DISCORD_API_SECRET, VERSION, SHARD_COUNT, SHARD_IDS, METRICS_HOST, METRICS_PORT, LOG_PATH, LOG_PIPELINE
 from .wordle.wordle_grader import grade_wordle
-from .lobby import LobbyController
+from .lobby import GuildLobbyControllers
 from .images import get_img_store, create_img_store_gallery
+from .links import LINK_REWRITERS
+from .metrics import REGISTRY, MetricsServer, MetricsCommandTree, SamplingProfiler, command_completed, make_http_trace
+from .log_pipeline import bind_log_context
 logger = logging.getLogger(__name__)
 
 def log_cmd_start(interaction: discord.Interaction, name: str):
+    bind_log_context(user_id=interaction.user.id, guild_id=interaction.guild_id)
     logger.info(f"{interaction.user.name}({interaction.user.id}) started {name} command")
 
 async def bot_can_send(interaction: discord.Interaction) -> bool:
+    if interaction.guild is None:
+        await interaction.response.send_message("Lobbies only work in servers!", ephemeral=True)
+        return False
     perms = interaction.channel.permissions_for(interaction.guild.me)
     if not perms.send_messages or not perms.view_channel or not perms.manage_messages:
         await interaction.response.send_message(
@@ -26,14 +33,25 @@ async def bot_can_send(interaction: discord.Interaction) -> bool:
 
 def run():
 
-    lobby_controller = LobbyController()
+    lobbies = GuildLobbyControllers() # one lobby controller per guild
     image_store = get_img_store()
     intents = discord.Intents.default()
     intents.message_content = True
     intents.voice_states = True
     intents.members = True
 
-    bot = commands.Bot(command_prefix="!", intents=intents)
+    bot = commands.AutoShardedBot(command_prefix="!", intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS,
+                                  tree_cls=MetricsCommandTree, http_trace=make_http_trace())
+
+    metrics_server = MetricsServer(REGISTRY, METRICS_HOST, METRICS_PORT)
+    profiler = SamplingProfiler()
+    REGISTRY.gauge("lobbybot_open_lobbies", "Open lobbies across every guild",
+                   function=lambda: sum(len(controller.lobby_manager.get_all_lobbies()) for controller in lobbies))
+    REGISTRY.gauge("lobbybot_outbound_queued", "Discord calls waiting in the outbound queue",
+                   function=lambda: sum(stats["queued"] for stats in lobbies.outbound.stats().values() if isinstance(stats, dict)))
+    REGISTRY.gauge("lobbybot_log_records_queued", "Log records waiting for the writer thread", function=LOG_PIPELINE.queued)
+    REGISTRY.gauge("lobbybot_log_records_dropped", "Log records dropped because the writer thread fell behind",
+                   function=lambda: LOG_PIPELINE.dropped)
 
     @bot.event
     async def on_ready():
@@ -44,18 +62,26 @@ def run():
 
         await bot.tree.sync()
         logger.info("synced!")
+        await metrics_server.start()
+        await lobbies.restore(bot)
         logger.info("Bot is online!")
 
+    @bot.event
+    async def on_guild_join(guild: discord.Guild):
+        logger.info(f"Joined guild: {guild}")
+        await lobbies.get(guild.id).restore(bot)
+
     @bot.event
     async def on_message(message: discord.Message):
-        if message.author.bot:
+        controller = lobbies.find(message.guild.id if message.guild else None)
+        if controller:
+            controller.note_message(message)
+        # links are only rewritten in servers: the bot can't delete the original message in someone's DMs
+        if message.author.bot or message.guild is None:
             return
-        
-        pattern = re.compile(r'https?://(twitter\.com|x\.com)/(.+)/status/(\d+)', re.IGNORECASE)
-
-        if pattern.search(message.content):
-            fixed_content = re.sub(pattern, r'https://fxtwitter.com/\2/status/\3', message.content)
 
+        fixed_content = LINK_REWRITERS.rewrite(message.content, lobbies.config(message.guild.id).link_sites)
+        if fixed_content is not None:
             # Header embed
             embed = discord.Embed(color=discord.Color.blue())
             embed.set_author(
@@ -70,9 +96,22 @@ def run():
             # Then send the link alone, so it embeds normally
             await message.channel.send(fixed_content)
 
+    @bot.event
+    async def on_app_command_completion(interaction: discord.Interaction, command):
+        command_completed(interaction)
+
+    @bot.event
+    async def on_interaction(interaction: discord.Interaction):
+        # lobby message buttons aren't tied to live views, so clicks are routed here by custom_id
+        controller = lobbies.find(interaction.guild_id)
+        if controller:
+            await controller.handle_lobby_button(interaction)
+
     @bot.event
     async def on_voice_state_update(member, before, after):
-        await lobby_controller.handle_voice_state_update(member, before, after)
+        controller = lobbies.find(member.guild.id)
+        if controller:
+            await controller.handle_voice_state_update(member, before, after)
 
     @bot.tree.command(name="ping", description="Pong!")
     async def ping(interaction: discord.Interaction):
@@ -84,6 +123,36 @@ def run():
         log_cmd_start(interaction, "version")
         await interaction.response.send_message(VERSION)
     
+    @bot.tree.command(name="lobbydebug", description="Live object counts held by the lobby controller")
+    @discord.app_commands.default_permissions(administrator=True)
+    async def lobbydebug(interaction: discord.Interaction):
+        log_cmd_start(interaction, "lobbydebug")
+        counts = lobbies.resource_counts()
+        leaked = counts.pop("leaked")
+        lines = [f"{name}: {count}" for name, count in counts.items()]
+        lines.append("leaked: " + (", ".join(f"{name}={count}" for name, count in leaked.items() if count) or "none"))
+        await interaction.response.send_message("```\n" + "\n".join(lines) + "\n```", ephemeral=True)
+
+    @bot.tree.command(name="profiler", description="Starts or stops sampling where the bot spends its time")
+    @discord.app_commands.default_permissions(administrator=True)
+    async def toggle_profiler(interaction: discord.Interaction):
+        log_cmd_start(interaction, "profiler")
+        # a run that hit the time limit by itself is reported here too, instead of being replaced by a new one
+        finished = profiler.finished
+        if not profiler.stop():
+            profiler.start()
+            await interaction.response.send_message(
+                f"Profiler started, sampling every {profiler.interval * 1000:.0f}ms. Run /profiler again to stop it.", ephemeral=True)
+            return
+        path = LOG_PATH / f"profile-{int(time.time())}.collapsed"
+        profiler.write_collapsed(path)
+        lines = [f"{count:6d}  {frame}" for frame, count in profiler.top(15)]
+        how = "stopped by itself" if finished else "stopped"
+        await interaction.response.send_message(
+            f"Profiler {how} after {profiler.samples} samples over {profiler.stopped_at - profiler.started_at:.0f}s. "
+            "Top frames by self time:\n```\n" + "\n".join(lines)[:1800]
+            + "\n```", file=discord.File(path), ephemeral=True)
+
     # TODO: make this help less bad
     # @bot.tree.command(name="help", description="Lists and describes LobbyBot's commands")
     # async def ping(interaction: discord.Interaction):
@@ -105,7 +174,7 @@ def run():
         if not await bot_can_send(interaction):
             return
         log_cmd_start(interaction, "lobby")
-        await lobby_controller.create_lobby(interaction, time, lobby_size, game)
+        await lobbies.get(interaction.guild_id).create_lobby(interaction, time, lobby_size, game)
     
     @bot.tree.command(name="flexnow", description="Starts a new flex lobby")
     async def flexnow(interaction: discord.Interaction, lobby_size: int = 5):
@@ -115,7 +184,7 @@ def run():
         if not await bot_can_send(interaction):
             return
         log_cmd_start(interaction, "flexnow")
-        await lobby_controller.create_lobby(interaction, "now", lobby_size, "flex")
+        await lobbies.get(interaction.guild_id).create_lobby(interaction, "now", lobby_size, "flex")
     
     @bot.tree.command(name="deadlocknow", description="Starts a new deadlock lobby")
     async def deadlocknow(interaction: discord.Interaction, lobby_size: int = 6):
@@ -125,21 +194,21 @@ def run():
         if not await bot_can_send(interaction):
             return
         log_cmd_start(interaction, "deadlocknow")
-        await lobby_controller.create_lobby(interaction, "now", lobby_size, "deadlock")
+        await lobbies.get(interaction.guild_id).create_lobby(interaction, "now", lobby_size, "deadlock")
 
     @bot.tree.command(name="close", description="Closes an existing lobby")
     async def close(interaction: discord.Interaction):
         if not await bot_can_send(interaction):
             return
         log_cmd_start(interaction, "close")
-        await lobby_controller.handle_close_lobby(interaction)
+        await lobbies.get(interaction.guild_id).handle_close_lobby(interaction)
         
     @bot.tree.command(name="show", description="Gives you a list of all the lobbies and lets you bump one of them")
     async def show(interaction: discord.Interaction):
         if not await bot_can_send(interaction):
             return
         log_cmd_start(interaction, "show")
-        await lobby_controller.show_lobbies(interaction)
+        await lobbies.get(interaction.guild_id).show_lobbies(interaction)
 
     @bot.tree.command(name="bump", description="Bump your own (or someone else's) lobby.")
     async def bump(interaction: discord.Interaction, owner: discord.Member=None):
@@ -149,21 +218,21 @@ def run():
         if owner == None:
             owner = interaction.user
 
-        await lobby_controller.bump_lobby(interaction, owner)
+        await lobbies.get(interaction.guild_id).bump_lobby(interaction, owner)
     
     @bot.tree.command(name="forceadd", description="Force adds a user to a lobby you're in")
     async def add(interaction: discord.Interaction, player: discord.Member):
         if not await bot_can_send(interaction):
             return
         log_cmd_start(interaction, "forceadd")
-        await lobby_controller.add_player_to_lobby(interaction, player, forced=True)
+        await lobbies.get(interaction.guild_id).add_player_to_lobby(interaction, player, forced=True)
 
     @bot.tree.command(name="forceremove", description="Force removes a user to a lobby you're in")
     async def force_remove(interaction: discord.Interaction, player: discord.Member):
         if not await bot_can_send(interaction):
             return
         log_cmd_start(interaction, "forceremove")
-        await lobby_controller.remove_participant_from_lobby(interaction, player)
+        await lobbies.get(interaction.guild_id).remove_participant_from_lobby(interaction, player)
 
     @bot.tree.command(name="gradewordle", description="Grades how well you played Wordle (Hard Mode only)")
     async def gradewordle(interaction: discord.Interaction, guesses: str, answer: str = "", try_all_words: bool = False):
@@ -204,7 +273,8 @@ def run():
         embed, view = create_img_store_gallery(interaction)
         await interaction.response.send_message(embed=embed, view=view)
 
-    bot.run(DISCORD_API_SECRET, root_logger=True)
+    # settings already sends the root logger, console included, through the log pipeline
+    bot.run(DISCORD_API_SECRET, log_handler=None)
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,18 @@
+from .registry import MetricsRegistry, Counter, Gauge, Histogram, timed
+from .instruments import (
+    REGISTRY,
+    COMMAND_SECONDS,
+    BUTTON_SECONDS,
+    LOBBY_UPDATE_SECONDS,
+    DM_FANOUT_SECONDS,
+    DM_MESSAGES,
+    WORDLE_SECONDS,
+    API_CALLS,
+    API_RATE_LIMITED,
+    API_SECONDS,
+    SPAN_SECONDS,
+)
+from .tracing import Span, trace, span, traced, start_trace, current_span, use_span, record
+from .profiler import SamplingProfiler
+from .http_server import MetricsServer
+from .discord_metrics import MetricsCommandTree, command_completed, make_http_trace
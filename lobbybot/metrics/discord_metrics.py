@@ -0,0 +1,91 @@
+import re
+import time
+from functools import lru_cache
+
+import aiohttp
+import discord
+from discord import app_commands
+
+from .instruments import COMMAND_SECONDS, API_CALLS, API_RATE_LIMITED, API_SECONDS
+from .tracing import Span, current_span, start_trace
+
+_STARTED = "metrics_started"
+_TRACE = "metrics_trace"
+
+class MetricsCommandTree(app_commands.CommandTree):
+    """
+    CommandTree that times and traces every slash command, from the check before it runs to its completion or error.
+    The start time and trace ride along in interaction.extras; the bot's on_app_command_completion event calls
+    command_completed().
+    """
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras[_STARTED] = time.perf_counter()
+        command = interaction.command
+        interaction.extras[_TRACE] = start_trace(f"/{command.qualified_name if command else 'command'}",
+                                                 user=interaction.user.id)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        _observe_command(interaction, "error")
+        await super().on_error(interaction, error)
+
+def command_completed(interaction: discord.Interaction):
+    _observe_command(interaction, "ok")
+
+def _observe_command(interaction: discord.Interaction, status: str):
+    start = interaction.extras.pop(_STARTED, None)
+    if start is not None and interaction.command is not None:
+        COMMAND_SECONDS.labels(interaction.command.qualified_name, status).observe(time.perf_counter() - start)
+    root = interaction.extras.pop(_TRACE, None)
+    if root is not None:
+        if status != "ok":
+            root.set(status=status)
+        root.finish()
+
+_SNOWFLAKE = re.compile(r"/\d{15,21}(?=/|$)")
+_TOKEN = re.compile(r"/(webhooks|interactions)/(\{id\})/[^/]+")
+
+@lru_cache(maxsize=4096)
+def normalize_route(method: str, path: str) -> str:
+    """ "PATCH /api/v10/channels/123.../messages/456..." -> "PATCH /channels/{id}/messages/{id}", so routes stay few. """
+    if path.startswith("/api/v"):
+        path = path[path.find("/", 5):]
+    path = _SNOWFLAKE.sub("/{id}", path)
+    path = _TOKEN.sub(r"/\1/\2/{token}", path)
+    return f"{method} {path}"
+
+def make_http_trace() -> aiohttp.TraceConfig:
+    """
+    aiohttp trace hooks for the bot's HTTP session (Client(http_trace=...)) that count every Discord API request by
+    route and status, count 429s by route and time each request. Requests made inside a trace also become spans of it.
+    """
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params: aiohttp.TraceRequestStartParams):
+        context.route = normalize_route(params.method, params.url.path)
+        context.start = time.perf_counter()
+        parent = current_span()
+        context.span = Span(context.route, parent) if parent is not None else None
+
+    async def on_request_end(session, context, params: aiohttp.TraceRequestEndParams):
+        status = params.response.status
+        API_SECONDS.labels(context.route).observe(time.perf_counter() - context.start)
+        if context.span is not None:
+            if status >= 400:
+                context.span.set(status=status)
+            context.span.finish()
+        API_CALLS.labels(context.route, str(status)).inc()
+        if status == 429:
+            API_RATE_LIMITED.labels(context.route).inc()
+
+    async def on_request_exception(session, context, params: aiohttp.TraceRequestExceptionParams):
+        API_SECONDS.labels(context.route).observe(time.perf_counter() - context.start)
+        API_CALLS.labels(context.route, "error").inc()
+        if context.span is not None:
+            context.span.set(error=type(params.exception).__name__)
+            context.span.finish()
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
@@ -0,0 +1,30 @@
+"""
+The bot's metrics. Hot paths import these and record straight into them; labels come from a small fixed set
+(command names, button actions, normalized API routes), so the number of series stays bounded.
+"""
+from .registry import MetricsRegistry
+
+REGISTRY = MetricsRegistry()
+
+COMMAND_SECONDS = REGISTRY.histogram(
+    "lobbybot_command_seconds", "Slash command handling time, by command and outcome", ("command", "status"))
+BUTTON_SECONDS = REGISTRY.histogram(
+    "lobbybot_button_seconds", "View button and select handling time, by action", ("action",))
+LOBBY_UPDATE_SECONDS = REGISTRY.histogram(
+    "lobbybot_lobby_update_seconds", "Lobby message update time: request (_update_lobby_message), edit or repost", ("kind",))
+DM_FANOUT_SECONDS = REGISTRY.histogram(
+    "lobbybot_dm_fanout_seconds", "Time for a lobby notification to reach every recipient",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0))
+DM_MESSAGES = REGISTRY.counter(
+    "lobbybot_dm_messages_total", "Lobby notification DMs by result", ("result",))
+WORDLE_SECONDS = REGISTRY.histogram(
+    "lobbybot_wordle_solver_seconds", "Wordle solver time per graded game, by guess pool", ("pool",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+API_CALLS = REGISTRY.counter(
+    "lobbybot_discord_api_calls_total", "Discord HTTP API requests, by route and response status", ("route", "status"))
+API_RATE_LIMITED = REGISTRY.counter(
+    "lobbybot_discord_api_429_total", "Discord HTTP API responses that were 429 Too Many Requests, by route", ("route",))
+API_SECONDS = REGISTRY.histogram(
+    "lobbybot_discord_api_seconds", "Discord HTTP API request time, by route", ("route",))
+SPAN_SECONDS = REGISTRY.histogram(
+    "lobbybot_span_seconds", "Time spent in each traced stage of an interaction, by span name", ("span",))
@@ -0,0 +1,106 @@
+import sys
+import threading
+import time
+from collections import Counter
+from logging import getLogger
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = getLogger(__name__)
+
+SAMPLE_INTERVAL = 0.005 # seconds between stack samples
+MAX_DURATION = 10 * 60 # seconds before a forgotten profiler stops itself
+MAX_DEPTH = 64 # frames kept per sample
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's stack from a background thread every SAMPLE_INTERVAL and counts identical stacks.
+    Unlike cProfile it doesn't hook every call, so it can run against live traffic: the bot only pays for a
+    sys._current_frames() per sample. Stops by itself after MAX_DURATION; the run is kept until stop() collects it.
+
+    Results are written in the collapsed-stack format ("outer;inner;leaf count" per line), which flame graph tools
+    read directly.
+    """
+    def __init__(self, interval: float = SAMPLE_INTERVAL, max_duration: float = MAX_DURATION):
+        self.interval = interval
+        self.max_duration = max_duration
+        self._thread: Optional[threading.Thread] = None # kept until stop() collects the run, even once it has ended
+        self._stop = threading.Event()
+        self._done = threading.Event() # set by the sampling thread as it exits, whoever made it stop
+        self._target: Optional[int] = None
+        self._stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        """ Sampling right now. """
+        return self._thread is not None and not self._done.is_set()
+
+    @property
+    def finished(self) -> bool:
+        """ Stopped by itself (e.g. at MAX_DURATION) and waiting for stop() to collect the run. """
+        return self._thread is not None and self._done.is_set()
+
+    def start(self, thread_id: Optional[int] = None) -> None:
+        """
+        Starts sampling thread_id, by default the calling thread (the event loop's). Does nothing while a run is going
+        or finished but not collected by stop(), so its samples aren't thrown away.
+        """
+        if self._thread is not None:
+            return
+        self._target = thread_id or threading.get_ident()
+        self._stacks = Counter()
+        self.samples = 0
+        self.started_at = time.monotonic()
+        self._stop.clear()
+        self._done.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"Sampling profiler started, every {self.interval * 1000:.0f}ms")
+
+    def stop(self) -> bool:
+        """ Ends the run, if it hasn't ended by itself, and collects it. Returns False if there was no run. """
+        thread = self._thread
+        if thread is None:
+            return False
+        self._stop.set()
+        thread.join()
+        self._thread = None
+        logger.info(f"Sampling profiler stopped after {self.samples} samples")
+        return True
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_duration
+        try:
+            while not self._stop.wait(self.interval):
+                frame = sys._current_frames().get(self._target)
+                if frame is None:
+                    break
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self._stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+                if time.monotonic() > deadline:
+                    logger.info("Sampling profiler hit its time limit")
+                    break
+        finally:
+            self.stopped_at = time.monotonic()
+            self._done.set()
+
+    def top(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """ Functions that were on top of the stack (self time) most often, with their sample counts. """
+        leaves: Counter = Counter()
+        for stack, count in self._stacks.items():
+            if stack:
+                leaves[stack[-1]] += count
+        return leaves.most_common(limit)
+
+    def write_collapsed(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(";".join(stack) + f" {count}\n")
@@ -0,0 +1,183 @@
+"""
+Lightweight span tracing for interactions.
+
+A trace starts at something a user did (a slash command, a button click, a voice state change) with trace(). While it
+runs, span() and @traced mark the stages inside it: controller handlers, mailbox waits, outbound queue waits and every
+Discord API request (from the aiohttp trace hooks). The current span lives in a context variable, so it follows the
+handler across awaits; code outside a trace gets a no-op span and pays next to nothing.
+
+When a trace finishes, every span in it is observed into SPAN_SECONDS by name, and if the whole trace took longer than
+SLOW_INTERACTION_MS its span tree is logged with each stage's offset and duration.
+"""
+import functools
+from contextvars import ContextVar
+from logging import getLogger
+from time import perf_counter
+from typing import List, Optional
+
+from lobbybot.settings import SLOW_INTERACTION_MS
+from .instruments import SPAN_SECONDS
+
+logger = getLogger(__name__)
+
+MAX_CHILDREN = 256 # per span, so a runaway loop inside a trace can't grow it without bound
+
+_current: ContextVar[Optional["Span"]] = ContextVar("lobbybot_span", default=None)
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "end", "children", "parent")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attrs: Optional[dict] = None, start: Optional[float] = None):
+        self.name = name
+        self.attrs = attrs
+        self.start = perf_counter() if start is None else start
+        self.end: Optional[float] = None
+        self.children: List[Span] = []
+        self.parent = parent
+        if parent is not None and len(parent.children) < MAX_CHILDREN:
+            parent.children.append(self)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else perf_counter()) - self.start
+
+    def set(self, **attrs):
+        """ Adds attributes (lobby id, user, ...) shown next to the span in the slow log. """
+        if self.attrs is None:
+            self.attrs = attrs
+        else:
+            self.attrs.update(attrs)
+
+    def finish(self, end: Optional[float] = None):
+        if self.end is not None:
+            return
+        self.end = perf_counter() if end is None else end
+        if self.parent is None:
+            _finish_trace(self)
+
+    def render(self, origin: Optional[float] = None, depth: int = 0) -> List[str]:
+        """ The span tree, one line per span: offset from the start of the trace, duration, name and attributes. """
+        origin = self.start if origin is None else origin
+        attrs = " " + " ".join(f"{key}={value}" for key, value in self.attrs.items()) if self.attrs else ""
+        running = " (still running)" if self.end is None else ""
+        lines = [f"{'  ' * depth}+{(self.start - origin) * 1000:7.1f}ms {self.duration * 1000:8.1f}ms  {self.name}{attrs}{running}"]
+        for child in self.children:
+            lines.extend(child.render(origin, depth + 1))
+        return lines
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+class _NullSpan:
+    """ What span() hands out outside a trace. """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NULL = _NullSpan()
+
+class _ActiveSpan:
+    """ Makes a span current while inside it, and finishes it on the way out. """
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.span.set(error=exc_type.__name__)
+        self.span.finish()
+        _current.reset(self._token)
+        return False
+
+class _UseSpan:
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span: Optional[Span]):
+        self.span = span
+
+    def __enter__(self):
+        self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+def _enabled() -> bool:
+    return SLOW_INTERACTION_MS > 0
+
+def current_span() -> Optional[Span]:
+    """ The span code running here belongs to, if it is inside a trace that hasn't finished. """
+    span = _current.get()
+    return span if span is not None and span.end is None else None
+
+def trace(name: str, **attrs):
+    """ Starts a new trace, whatever the current span is. Use as a context manager. """
+    if not _enabled():
+        return _NULL
+    return _ActiveSpan(Span(name, None, attrs or None))
+
+def span(name: str, **attrs):
+    """ A stage of the current trace. Use as a context manager; outside a trace it does nothing. """
+    parent = current_span()
+    if parent is None:
+        return _NULL
+    return _ActiveSpan(Span(name, parent, attrs or None))
+
+def start_trace(name: str, **attrs) -> Optional[Span]:
+    """
+    For traces that can't be a with block, because they start in one callback and end in another: starts a trace,
+    makes it current for the rest of this task and returns it. The caller has to finish() it.
+    """
+    if not _enabled():
+        return None
+    root = Span(name, None, attrs or None)
+    _current.set(root)
+    return root
+
+def use_span(parent: Optional[Span]):
+    """ Runs the block as part of parent, e.g. in a worker task running something on behalf of a traced handler. """
+    return _UseSpan(parent)
+
+def record(name: str, start: float, end: float):
+    """ Adds a stage that already happened (start and end are perf_counter() times) to the current trace. """
+    parent = current_span()
+    if parent is not None:
+        Span(name, parent, None, start).finish(end)
+
+def traced(name: Optional[str] = None, root: bool = False):
+    """
+    Decorator that wraps each call of a coroutine function in a span named name (the function's name by default).
+    With root, each call starts its own trace, for entry points like view callbacks.
+    """
+    def decorator(fn):
+        span_name = name or fn.__name__
+        begin = trace if root else span
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with begin(span_name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _finish_trace(root: Span):
+    for stage in root.walk():
+        if stage.end is not None:
+            SPAN_SECONDS.labels(stage.name).observe(stage.end - stage.start)
+    if root.duration * 1000 >= SLOW_INTERACTION_MS:
+        logger.warning(f"Slow interaction: {root.name} took {root.duration * 1000:.0f}ms\n" + "\n".join(root.render()))
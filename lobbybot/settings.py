@@ -4,7 +4,8 @@ import logging
 from pathlib import Path
 from dotenv import load_dotenv
 
-logger = logging.getLogger()
+from lobbybot.log_pipeline import start_logging
+
 VERSION = "ready_check v7"
 
 load_dotenv()
@@ -14,12 +15,32 @@ BASE_DIR = Path(__file__).parent
 USERS_PATH = BASE_DIR / os.getenv("USERS_PATH")
 LOG_PATH = BASE_DIR / os.getenv("LOG_PATH")
 RESOURCES_PATH = BASE_DIR / os.getenv("RESOURCES_PATH")
-BUMP_LOBBY_CHANNEL_ID = int(os.getenv("BUMP_LOBBY_CHANNEL_ID"))
+BUMP_LOBBY_CHANNEL_ID = int(os.getenv("BUMP_LOBBY_CHANNEL_ID") or 0) # default bump channel, for guilds not in the guild config
+LOBBY_SNAPSHOT_PATH = BASE_DIR / os.getenv("LOBBY_SNAPSHOT_PATH", RESOURCES_PATH / "lobby_snapshot.json")
+LOBBY_JOURNAL_PATH = BASE_DIR / os.getenv("LOBBY_JOURNAL_PATH", RESOURCES_PATH / "lobby_journal")
+LOBBY_STATE_BACKEND = os.getenv("LOBBY_STATE_BACKEND", "memory") # "sqlite" shares lobbies between processes on one machine
+LOBBY_STATE_DB_PATH = BASE_DIR / os.getenv("LOBBY_STATE_DB_PATH", RESOURCES_PATH / "lobby_state.sqlite3")
+GUILD_CONFIG_PATH = BASE_DIR / os.getenv("GUILD_CONFIG_PATH", RESOURCES_PATH / "guild_config.json")
+# sites whose links get reposted as embed-friendly mirrors, for guilds not in the guild config; see lobbybot/links
+LINK_REWRITE_SITES = frozenset(site.strip() for site in os.getenv("LINK_REWRITE_SITES", "twitter").split(",") if site.strip())
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None # None lets discord pick
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv("SHARD_IDS", "").split(",") if shard_id.strip()] or None # shards this process runs
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 9108) # Prometheus scrape endpoint; 0 turns it off
+SLOW_INTERACTION_MS = float(os.getenv("SLOW_INTERACTION_MS") or 1000) # traces slower than this are logged; 0 turns tracing off
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text") # "json" writes one object per line, tagged with lobby/user/guild ids
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES") or 10 * 1024 * 1024) # infos.log rolls over past this size; 0 turns it off
+LOG_ROTATE_HOURS = float(os.getenv("LOG_ROTATE_HOURS") or 24) # ... and after this long; 0 turns it off
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT") or 10) # rolled over files kept as infos.log.1, .2, ...
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE") or 10_000) # records waiting for the writer thread before new ones are dropped
+LOG_CONSOLE = os.getenv("LOG_CONSOLE", "1") != "0" # also log to stderr
+# don't work out the caller, thread and process of each record when no log format shows them; this is process-wide
+LOG_SKIP_UNUSED_FIELDS = os.getenv("LOG_SKIP_UNUSED_FIELDS", "0") == "1"
 
 
-logger.setLevel(logging.INFO)
-# logger.setLevel(logging.DEBUG)
-handler = logging.FileHandler(filename=f"{LOG_PATH}/infos.log", encoding='utf-8', mode='w')
-handler.setFormatter(logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s'))
-logger.addHandler(handler)
+# records are written by a background thread, so logging never waits on the disk on the event loop
+LOG_PIPELINE = start_logging(LOG_PATH / "infos.log", logging.INFO, # logging.DEBUG
+                             json_records=LOG_FORMAT == "json", max_bytes=LOG_MAX_BYTES,
+                             rotate_seconds=LOG_ROTATE_HOURS * 3600, backup_count=LOG_BACKUP_COUNT,
+                             queue_size=LOG_QUEUE_SIZE, console=LOG_CONSOLE, skip_unused_fields=LOG_SKIP_UNUSED_FIELDS)
 
@@ -2,6 +2,7 @@ from typing import List, Dict, Set, Tuple
 from pathlib import Path
 from collections import Counter, defaultdict
 from ..settings import RESOURCES_PATH
+from ..metrics import WORDLE_SECONDS
 
 import discord
 import logging
@@ -239,7 +240,8 @@ async def grade_wordle(interaction: discord.Interaction, guesses: str, answer: s
 
     await interaction.response.defer()
 
-    scores = solver.evaluate_guesses()
+    with WORDLE_SECONDS.labels("all_words" if try_all_words else "answers").time():
+        scores = solver.evaluate_guesses()
 
     total_score = sum(score[0] for score in scores)/len(scores) if scores else 100
     embed = discord.Embed(title=f"Overall Score: {total_score:.2f}%", color=discord.Color.green())
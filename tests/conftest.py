@@ -0,0 +1,13 @@
+"""
+Importing most of lobbybot imports settings, which wants USERS_PATH, LOG_PATH and RESOURCES_PATH; point them at a
+scratch directory, unless they are already set, and keep the metrics endpoint and console logging off.
+"""
+import os
+import tempfile
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="lobbybot-tests-")
+
+for _name in ("USERS_PATH", "LOG_PATH", "RESOURCES_PATH"):
+    os.environ.setdefault(_name, SCRATCH_DIR)
+os.environ.setdefault("METRICS_PORT", "0")
+os.environ.setdefault("LOG_CONSOLE", "0")
@@ -0,0 +1,49 @@
+import asyncio
+
+from lobbybot.lobby.controllers.dm_dispatcher import DMDispatcher
+from lobbybot.lobby.controllers.outbound_queue import OutboundQueue, Priority
+
+def test_queued_dms_dont_hold_the_dispatchers_slots():
+    async def run():
+        outbound = OutboundQueue(max_in_flight=1)
+        dms = DMDispatcher(outbound, max_concurrent=1)
+        delivered = []
+
+        async def deliver(client, user_id, embed):
+            delivered.append(user_id)
+            return True
+        dms._deliver = deliver
+
+        # the only in-flight slot is taken by a channel post that won't finish until released
+        release = asyncio.Event()
+        blocker = outbound.submit(Priority.CHANNEL, ("channel", 1), release.wait)
+        fan_out = dms.send(None, [10, 11, 12], None)
+        await asyncio.sleep(0.01)
+        queued = outbound.stats()["DM"]["queued"]
+        release.set()
+        await blocker
+        await fan_out
+        return queued, delivered, dms.stats()
+
+    queued, delivered, stats = asyncio.run(run())
+    assert queued == 3 # every DM waits in the queue, not on the dispatcher's semaphore
+    assert delivered == [10, 11, 12]
+    assert stats["sent"] == 3
+
+def test_without_a_queue_the_semaphore_limits_sends():
+    async def run():
+        dms = DMDispatcher(None, max_concurrent=2)
+        in_flight = most = 0
+
+        async def deliver(client, user_id, embed):
+            nonlocal in_flight, most
+            in_flight += 1
+            most = max(most, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return True
+        dms._deliver = deliver
+        await dms.send(None, range(10), None)
+        return most, dms.stats()["sent"]
+
+    assert asyncio.run(run()) == (2, 10)
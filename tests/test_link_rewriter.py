@@ -0,0 +1,54 @@
+import pytest
+
+from lobbybot.links import LINK_REWRITERS, LinkRewriters, Rewriter
+
+@pytest.mark.parametrize("link, expected", [
+    ("https://x.com/PlayVALORANT/status/123", "https://fxtwitter.com/PlayVALORANT/status/123"),
+    ("https://mobile.twitter.com/PlayVALORANT/status/123?s=20", "https://fxtwitter.com/PlayVALORANT/status/123?s=20"),
+    ("https://x.com/i/web/status/123", "https://fxtwitter.com/i/web/status/123"),
+    ("HTTPS://Twitter.com/i/status/123", "https://fxtwitter.com/i/status/123"),
+    ("https://www.instagram.com/reel/Cabc-1/", "https://www.kkinstagram.com/reel/Cabc-1/"),
+    ("https://www.tiktok.com/@clips.daily/video/72", "https://www.vxtiktok.com/@clips.daily/video/72"),
+    ("https://vm.tiktok.com/ZMabc/", "https://vm.vxtiktok.com/ZMabc/"),
+    ("https://old.reddit.com/r/VALORANT/comments/1abc/title/", "https://www.rxddit.com/r/VALORANT/comments/1abc/title/"),
+    ("https://bsky.app/profile/a.bsky.social/post/3k", "https://fxbsky.app/profile/a.bsky.social/post/3k"),
+])
+def test_each_site_is_rewritten_with_its_own_template(link, expected):
+    assert LINK_REWRITERS.rewrite(f"look {link} lol", LINK_REWRITERS.sites) == f"look {expected} lol"
+
+def test_every_link_in_a_message_gets_the_rewriter_that_matched_it():
+    # neighbouring rewriters in the combined pattern, the two tiktok ones included, each pick their own groups
+    content = "https://vm.tiktok.com/ZMa/ https://x.com/a/status/1 https://www.tiktok.com/@b/video/2 https://vt.tiktok.com/ZMc/"
+    assert LINK_REWRITERS.rewrite(content, LINK_REWRITERS.sites) == (
+        "https://vm.vxtiktok.com/ZMa/ https://fxtwitter.com/a/status/1 https://www.vxtiktok.com/@b/video/2 https://vt.vxtiktok.com/ZMc/")
+
+def test_only_the_given_sites_are_rewritten():
+    content = "https://x.com/a/status/1 https://vm.tiktok.com/ZMa/"
+    assert LINK_REWRITERS.rewrite(content, frozenset({"tiktok"})) == "https://x.com/a/status/1 https://vm.vxtiktok.com/ZMa/"
+    assert LINK_REWRITERS.rewrite(content, frozenset({"reddit"})) is None
+    assert LINK_REWRITERS.rewrite(content, frozenset()) is None
+
+@pytest.mark.parametrize("content", [
+    "gg anyone down for valo tonight",
+    "https://tenor.com/view/cat-dance-gif-123",
+    "https://www.youtube.com/watch?v=dQw4w",
+    "twitter.com/a/status/1 without a scheme",
+    "https://x.com/PlayVALORANT with no status",
+])
+def test_messages_without_rewritable_links_are_left_alone(content):
+    assert LINK_REWRITERS.rewrite(content, LINK_REWRITERS.sites) is None
+
+def test_lastindex_picks_the_rewriter_with_nested_and_optional_groups():
+    rewriters = LinkRewriters([
+        Rewriter("a", r"https://a\.example/((x)|(y))(\d+)?", "A[{0}|{1}|{2}|{3}]", ("a.example",)),
+        Rewriter("b", r"https://b\.example/(\w+)", "B[{0}]", ("b.example",)),
+        Rewriter("c", r"https://c\.example/(?:(p)/)?(\d+)", "C[{0}|{1}]", ("c.example",)),
+    ])
+    content = "https://b.example/one https://a.example/y https://c.example/7 https://a.example/x5 https://c.example/p/8"
+    assert rewriters.rewrite(content, rewriters.sites) == "B[one] A[y|None|y|None] C[None|7] A[x|x|None|5] C[p|8]"
+
+def test_each_set_of_sites_is_compiled_once():
+    rewriters = LinkRewriters(LINK_REWRITERS.rewriters)
+    sites = frozenset({"twitter", "tiktok"})
+    assert rewriters._matcher(sites) is rewriters._matcher(frozenset({"tiktok", "twitter"}))
+    assert rewriters._matcher(frozenset({"nowhere"})) is None
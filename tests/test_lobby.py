@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from lobbybot.benchmarks.fakes import FakeMember
+from lobbybot.lobby.models import Lobby, LobbyState
+
+OWNER_ID = 1
+USER_IDS = range(2, 12)
+CHANNEL_IDS = (None, 100, 101, 102)
+
+def check_counts(lobby: Lobby):
+    assert lobby.unjoined_count == sum(not player.joined_voice for player in lobby.get_players)
+    counts = {}
+    for participant in lobby.get_participants():
+        if participant.voice_channel_id is not None:
+            counts[participant.voice_channel_id] = counts.get(participant.voice_channel_id, 0) + 1
+    assert lobby.voice_channel_counts() == counts
+    assert lobby.max_voice_occupancy == max(counts.values(), default=0)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_voice_counts_follow_every_mutation(seed):
+    rng = random.Random(seed)
+    lobby = Lobby(0, FakeMember(OWNER_ID, None), -1, 5, "Valorant", 0)
+    for _ in range(300):
+        user_id = rng.choice(USER_IDS)
+        op = rng.randrange(8)
+        if op == 0:
+            lobby.add_player_by_id(user_id, False, rng.choice(CHANNEL_IDS))
+        elif op == 1:
+            lobby.add_filler_by_id(user_id, False, rng.choice(CHANNEL_IDS))
+        elif op == 2:
+            lobby.remove_participant_by_id(user_id)
+        elif op == 3:
+            lobby.set_participant_voice_channel(rng.choice([OWNER_ID, user_id]), rng.choice(CHANNEL_IDS))
+        elif op == 4 and lobby.state in (LobbyState.WAITING, LobbyState.PENDING):
+            lobby.start(lobby.state == LobbyState.PENDING or rng.random() < 0.5) # a pending lobby only gets force started
+            if lobby.is_active():
+                lobby.update_joined_voice()
+        elif op == 5 and lobby.state == LobbyState.WAITING:
+            lobby.start_ready_check()
+        elif op == 6 and lobby.state == LobbyState.READY_CHECK:
+            for participant in lobby.get_participants():
+                rng.choice((participant.ready_up, participant.unready, lambda: None))()
+            if rng.random() < 0.5:
+                lobby.start_from_ready_check()
+                lobby.update_joined_voice()
+            else:
+                lobby.end_ready_check()
+        elif op == 7:
+            check_counts(Lobby.from_dict(lobby.to_dict()))
+        check_counts(lobby)
+
+def test_lobby_is_voice_active_once_every_player_joined():
+    lobby = Lobby(0, FakeMember(OWNER_ID, None), -1, 2, "Valorant", 0)
+    lobby.add_player_by_id(2, False, 100)
+    lobby.start(False)
+    lobby.update_joined_voice()
+    assert lobby.unjoined_count == 1 # the owner isn't in voice
+
+    lobby.set_participant_voice_channel(OWNER_ID, 100)
+    assert lobby.unjoined_count == 0
+    lobby.set_participant_voice_channel(OWNER_ID, None) # leaving again doesn't undo it
+    assert lobby.unjoined_count == 0
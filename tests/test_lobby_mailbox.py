@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from lobbybot.lobby.controllers.lobby_mailbox import LobbyBusy, LobbyMailboxes, serialized
+
+def test_commands_for_a_lobby_run_one_at_a_time_in_order():
+    async def scenario():
+        mailboxes = LobbyMailboxes()
+        log = []
+
+        async def command(lobby_id, name):
+            log.append(("start", lobby_id, name))
+            await asyncio.sleep(0.001)
+            log.append(("end", lobby_id, name))
+            return name
+        results = await asyncio.gather(*(mailboxes.submit(1, command, 1, name) for name in "abc"),
+                                       mailboxes.submit(2, command, 2, "x"))
+        return results, log, mailboxes.stats()
+
+    results, log, stats = asyncio.run(scenario())
+    assert results == ["a", "b", "c", "x"]
+    lobby_one = [entry for entry in log if entry[1] == 1]
+    assert lobby_one == [(edge, 1, name) for name in "abc" for edge in ("start", "end")]
+    # lobby 2 didn't wait for lobby 1
+    assert log.index(("start", 2, "x")) < log.index(("end", 1, "a"))
+    assert stats["processed"] == 4 and stats["busy_lobbies"] == 0
+
+def test_a_command_can_submit_to_its_own_lobby():
+    async def scenario():
+        mailboxes = LobbyMailboxes()
+
+        async def inner():
+            return "inner"
+
+        async def outer():
+            return "outer+" + await mailboxes.submit(1, inner)
+        return await asyncio.wait_for(mailboxes.submit(1, outer), 1)
+
+    assert asyncio.run(scenario()) == "outer+inner"
+
+def test_full_mailbox_turns_commands_away():
+    async def scenario():
+        mailboxes = LobbyMailboxes(max_queue=2)
+        release = asyncio.Event()
+
+        async def command(name):
+            await release.wait()
+            return name
+        running = asyncio.create_task(mailboxes.submit(1, command, "running"))
+        await asyncio.sleep(0) # the worker takes it off the queue
+        queued = [asyncio.create_task(mailboxes.submit(1, command, name)) for name in ("a", "b")]
+        await asyncio.sleep(0)
+        depth = mailboxes.queue_depth(1)
+        with pytest.raises(LobbyBusy):
+            await mailboxes.submit(1, command, "turned away")
+        other_lobby = asyncio.create_task(mailboxes.submit(2, command, "other lobby"))
+        release.set()
+        results = await asyncio.gather(running, *queued, other_lobby)
+        return depth, results, mailboxes.stats()
+
+    depth, results, stats = asyncio.run(scenario())
+    assert depth == 2
+    assert results == ["running", "a", "b", "other lobby"]
+    assert stats["rejected"] == 1 and stats["processed"] == 4 and stats["busy_lobbies"] == 0
+
+def test_a_failing_command_doesnt_stop_the_mailbox():
+    async def scenario():
+        mailboxes = LobbyMailboxes()
+
+        async def fail():
+            raise ValueError("boom")
+
+        async def succeed():
+            return "ok"
+        return await asyncio.gather(mailboxes.submit(1, fail), mailboxes.submit(1, succeed), return_exceptions=True)
+
+    failed, succeeded = asyncio.run(scenario())
+    assert isinstance(failed, ValueError) and succeeded == "ok"
+
+class FakeLobby:
+    def __init__(self, id: int):
+        self.id = id
+
+class Controller:
+    def __init__(self):
+        self.mailboxes = LobbyMailboxes()
+        self.log = []
+
+    @serialized
+    async def by_lobby(self, lobby, name):
+        self.log.append(("start", name))
+        await asyncio.sleep(0.001)
+        self.log.append(("end", name))
+
+    @serialized
+    async def by_id(self, lobby_id: int, name):
+        await self.by_lobby(FakeLobby(lobby_id), name + " inline") # re-entrant through the decorator
+        self.log.append(("by id", name))
+
+def test_serialized_routes_by_lobby_and_lobby_id():
+    async def scenario():
+        controller = Controller()
+        await asyncio.gather(controller.by_lobby(FakeLobby(1), "a"), controller.by_id(1, "b"), controller.by_lobby(lobby=FakeLobby(1), name="c"))
+        return controller.log
+
+    assert asyncio.run(scenario()) == [("start", "a"), ("end", "a"), ("start", "b inline"), ("end", "b inline"),
+                                       ("by id", "b"), ("start", "c"), ("end", "c")]
@@ -0,0 +1,102 @@
+import asyncio
+
+from lobbybot.lobby.controllers.lobby_scheduler import LobbyScheduler, TimerKind
+
+def run(coroutine_fn):
+    async def wrapper():
+        scheduler = LobbyScheduler()
+        try:
+            return await coroutine_fn(scheduler)
+        finally:
+            scheduler.close()
+    return asyncio.run(wrapper())
+
+def test_cancelled_timers_never_fire():
+    async def scenario(scheduler):
+        fired = []
+        scheduler.schedule(1, TimerKind.AUTO_CLOSE, 0.01, lambda: fired.append("auto close"))
+        scheduler.schedule(1, TimerKind.EDIT, 0.01, lambda: fired.append("edit"))
+        scheduler.schedule(2, TimerKind.EDIT, 0.01, lambda: fired.append("other lobby"))
+        assert scheduler.cancel(1, TimerKind.EDIT) == 1
+        assert scheduler.cancel(1, TimerKind.EDIT) == 0
+        assert scheduler.get(1, TimerKind.EDIT) is None
+        await asyncio.sleep(0.05)
+        return fired, len(scheduler)
+
+    assert run(scenario) == (["auto close", "other lobby"], 0)
+
+def test_cancelling_a_lobby_cancels_every_kind():
+    async def scenario(scheduler):
+        fired = []
+        for kind in TimerKind:
+            scheduler.schedule(1, kind, 0.01, lambda kind=kind: fired.append(kind))
+        scheduler.schedule(2, TimerKind.SYNC, 0.01, lambda: fired.append("other lobby"))
+        cancelled = scheduler.cancel(1)
+        await asyncio.sleep(0.05)
+        return cancelled, fired
+
+    assert run(scenario) == (len(TimerKind), ["other lobby"])
+
+def test_rescheduling_replaces_the_timer():
+    async def scenario(scheduler):
+        fired = []
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        scheduler.schedule(1, TimerKind.READY_CHECK, 0.01, lambda: fired.append(("first", loop.time() - start)))
+        scheduler.schedule(1, TimerKind.READY_CHECK, 0.05, lambda: fired.append(("second", loop.time() - start)))
+        assert len(scheduler) == 1
+        await asyncio.sleep(0.1)
+        return fired, scheduler.stats()
+
+    fired, stats = run(scenario)
+    assert [name for name, _ in fired] == ["second"]
+    assert fired[0][1] >= 0.05
+    assert stats["fired"] == 1 and stats["pending"] == 0
+
+def test_rescheduling_sooner_wakes_the_driver():
+    async def scenario(scheduler):
+        fired = asyncio.Event()
+        scheduler.schedule(1, TimerKind.AUTO_CLOSE, 60, fired.set)
+        await asyncio.sleep(0) # let the driver go to sleep on the 60s timer
+        scheduler.schedule(1, TimerKind.AUTO_CLOSE, 0.01, fired.set)
+        await asyncio.wait_for(fired.wait(), 1)
+        return len(scheduler)
+
+    assert run(scenario) == 0
+
+def test_equal_deadlines_fire_in_scheduling_order_and_async_callbacks_run():
+    async def scenario(scheduler):
+        fired = []
+
+        async def later(lobby_id):
+            await asyncio.sleep(0)
+            fired.append(("async", lobby_id))
+        for lobby_id in range(5):
+            scheduler.schedule(lobby_id, TimerKind.EDIT, 0, lambda lobby_id=lobby_id: fired.append(lobby_id))
+        scheduler.schedule(9, TimerKind.SYNC, 0, lambda: later(9))
+        await asyncio.sleep(0.02)
+        return fired
+
+    assert run(scenario) == [0, 1, 2, 3, 4, ("async", 9)]
+
+def test_cancelled_entries_are_compacted():
+    async def scenario(scheduler):
+        for lobby_id in range(200):
+            scheduler.schedule(lobby_id, TimerKind.AUTO_CLOSE, 60, lambda: None)
+        for lobby_id in range(150):
+            scheduler.cancel(lobby_id)
+        return scheduler.stats()
+
+    stats = run(scenario)
+    assert stats["pending"] == 50
+    assert stats["heap"] < 200
+
+def test_a_failing_timer_doesnt_stop_the_others():
+    async def scenario(scheduler):
+        fired = []
+        scheduler.schedule(1, TimerKind.EDIT, 0, lambda: 1 / 0)
+        scheduler.schedule(2, TimerKind.EDIT, 0.01, lambda: fired.append(2))
+        await asyncio.sleep(0.05)
+        return fired
+
+    assert run(scenario) == [2]
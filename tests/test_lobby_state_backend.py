@@ -0,0 +1,71 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from lobbybot.benchmarks.fakes import FakeMember
+from lobbybot.lobby.controllers.lobby_state_backend import InMemoryLobbyBackend, SqliteLobbyBackend
+from lobbybot.lobby.controllers.lobby_state_sync import LobbyStateSync
+from lobbybot.lobby.models import LobbyManager
+
+GUILD_ID = 42
+LOBBIES_PER_PROCESS = 40
+
+async def _create_lobbies(db_path: str, first_owner: int) -> dict:
+    """ What one bot process does: create lobbies in GUILD_ID with ids from the backend, and write them to it. """
+    backend = SqliteLobbyBackend(db_path)
+    manager = LobbyManager()
+    stale = []
+    sync = LobbyStateSync(backend, GUILD_ID, manager, stale.append)
+    manager.journal = sync
+    try:
+        for i in range(LOBBIES_PER_PROCESS):
+            lobby_id = await sync.allocate_id()
+            assert manager.create_lobby(FakeMember(first_owner + i, None), -1, 5, "Valorant", lobby_id=lobby_id)
+            await asyncio.sleep(0)
+        while sync.writes + sync.conflicts < LOBBIES_PER_PROCESS:
+            await asyncio.sleep(0.01)
+    finally:
+        backend.close()
+    return {"conflicts": sync.conflicts, "stale": stale, "ids": [lobby.id for lobby in manager.get_all_lobbies()]}
+
+def create_lobbies(db_path: str, first_owner: int) -> dict:
+    return asyncio.run(_create_lobbies(db_path, first_owner))
+
+def test_two_processes_get_different_lobby_ids(tmp_path):
+    db_path = str(tmp_path / "lobby_state.sqlite3")
+    owners = (1_000_000, 2_000_000)
+    with ProcessPoolExecutor(len(owners), mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = list(pool.map(create_lobbies, [db_path] * len(owners), owners))
+
+    assert [result["conflicts"] for result in results] == [0, 0]
+    assert [result["stale"] for result in results] == [[], []]
+    ids = [lobby_id for result in results for lobby_id in result["ids"]]
+    assert len(set(ids)) == len(ids) == LOBBIES_PER_PROCESS * len(owners)
+
+    backend = SqliteLobbyBackend(db_path)
+    try:
+        stored = asyncio.run(backend.load(GUILD_ID))
+    finally:
+        backend.close()
+    assert sorted(stored) == sorted(ids)
+    assert {data["owner"]["id"] for _, data in stored.values()} == {owner + i for owner in owners for i in range(LOBBIES_PER_PROCESS)}
+
+def test_allocated_ids_start_past_stored_lobbies_and_at_least(tmp_path):
+    backend = SqliteLobbyBackend(str(tmp_path / "lobby_state.sqlite3"))
+
+    async def allocate():
+        await backend.put(GUILD_ID, 7, {"id": 7}, 0)
+        return [await backend.allocate_lobby_id(GUILD_ID, 0), await backend.allocate_lobby_id(GUILD_ID, 20),
+                await backend.allocate_lobby_id(GUILD_ID, 0), await backend.allocate_lobby_id(GUILD_ID + 1, 0)]
+    try:
+        assert asyncio.run(allocate()) == [8, 20, 21, 0]
+    finally:
+        backend.close()
+
+def test_in_memory_backend_allocates_per_guild():
+    backend = InMemoryLobbyBackend()
+
+    async def allocate():
+        return [await backend.allocate_lobby_id(GUILD_ID, 3), await backend.allocate_lobby_id(GUILD_ID, 0),
+                await backend.allocate_lobby_id(GUILD_ID + 1, 0)]
+    assert asyncio.run(allocate()) == [3, 4, 0]
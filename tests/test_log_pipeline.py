@@ -0,0 +1,46 @@
+import logging
+
+from lobbybot.log_pipeline import TEXT_FORMAT, JsonFormatter, LogPipeline
+
+def make_handler(formatter: logging.Formatter) -> logging.Handler:
+    handler = logging.NullHandler()
+    handler.setFormatter(formatter)
+    return handler
+
+def record_switches() -> tuple:
+    return logging._srcfile, logging.logThreads, logging.logProcesses, logging.logMultiprocessing
+
+def test_importing_settings_leaves_record_fields_alone():
+    import lobbybot.settings # noqa: F401
+    assert logging._srcfile is not None
+    assert logging.logThreads and logging.logProcesses
+
+def test_fields_are_only_skipped_when_asked():
+    before = record_switches()
+    pipeline = LogPipeline([make_handler(logging.Formatter(TEXT_FORMAT))])
+    pipeline.start()
+    try:
+        assert record_switches() == before
+    finally:
+        pipeline.stop()
+
+def test_skipped_fields_come_back_on_stop():
+    before = record_switches()
+    pipeline = LogPipeline([make_handler(logging.Formatter(TEXT_FORMAT)), make_handler(JsonFormatter())], skip_unused_fields=True)
+    pipeline.start()
+    try:
+        assert record_switches() == (None, False, False, False)
+    finally:
+        pipeline.stop()
+    assert record_switches() == before
+
+def test_fields_a_formatter_uses_are_kept():
+    before = record_switches()
+    pipeline = LogPipeline([make_handler(logging.Formatter(TEXT_FORMAT)),
+                            make_handler(logging.Formatter("{funcName}:{lineno} {threadName} {message}", style="{"))],
+                           skip_unused_fields=True)
+    pipeline.start()
+    try:
+        assert record_switches() == (before[0], before[1], False, False)
+    finally:
+        pipeline.stop()
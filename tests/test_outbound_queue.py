@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from lobbybot.lobby.controllers.outbound_queue import OutboundQueue, Priority
+
+def returning(value):
+    async def call():
+        return value
+    return call
+
+def logging_call(log, name):
+    async def call():
+        log.append(name)
+        return name
+    return call
+
+def test_requests_that_waited_too_long_are_shed():
+    async def run():
+        outbound = OutboundQueue(max_in_flight=1)
+        release = asyncio.Event()
+        blocker = outbound.submit(Priority.CHANNEL, ("channel", 1), release.wait)
+        quick = outbound.submit(Priority.DM, ("dm", 1), returning("quick"), stale_after=0.01)
+        patient = outbound.submit(Priority.DM, ("dm", 2), returning("patient"), stale_after=60)
+        forever = outbound.submit(Priority.CLEANUP, ("channel", 2), returning("forever"))
+        await asyncio.sleep(0.05)
+        release.set()
+        await blocker
+        results = await asyncio.gather(quick, patient, forever)
+        later = await outbound.submit(Priority.DM, ("dm", 3), returning("later"), stale_after=0.01)
+        return results, later, outbound.stats()
+
+    results, later, stats = asyncio.run(run())
+    assert results == [None, "patient", "forever"]
+    assert later == "later"
+    assert stats["DM"]["shed"] == 1 and stats["DM"]["done"] == 2
+
+def test_requests_run_by_priority_then_in_order():
+    async def run():
+        outbound = OutboundQueue(max_in_flight=1)
+        release = asyncio.Event()
+        blocker = outbound.submit(Priority.CHANNEL, ("channel", 0), release.wait)
+        log = []
+        futures = [outbound.submit(priority, ("channel", i + 1), logging_call(log, name)) for i, (priority, name) in enumerate([
+            (Priority.CLEANUP, "delete"), (Priority.DM, "dm 1"), (Priority.CHANNEL, "ping"),
+            (Priority.LOBBY_UPDATE, "edit 1"), (Priority.DM, "dm 2"), (Priority.LOBBY_UPDATE, "edit 2"),
+        ])]
+        release.set()
+        await asyncio.gather(blocker, *futures)
+        return log
+
+    assert asyncio.run(run()) == ["edit 1", "edit 2", "ping", "dm 1", "dm 2", "delete"]
+
+def test_a_busy_route_doesnt_hold_up_other_routes():
+    async def run():
+        outbound = OutboundQueue(max_in_flight=2)
+        release = asyncio.Event()
+        blocker = outbound.submit(Priority.LOBBY_UPDATE, ("channel", 1), release.wait)
+        log = []
+        same_route = outbound.submit(Priority.LOBBY_UPDATE, ("channel", 1), logging_call(log, "same channel"))
+        other_route = outbound.submit(Priority.CLEANUP, ("channel", 2), logging_call(log, "other channel"))
+        await other_route
+        waiting = list(log)
+        release.set()
+        await asyncio.gather(blocker, same_route)
+        return waiting, log
+
+    assert asyncio.run(run()) == (["other channel"], ["other channel", "same channel"])
+
+def test_queued_requests_with_the_same_key_are_merged():
+    async def run():
+        outbound = OutboundQueue(max_in_flight=1)
+        release = asyncio.Event()
+        log = []
+        running = outbound.submit(Priority.LOBBY_UPDATE, ("channel", 1), release.wait, key=("edit", 1))
+        await asyncio.sleep(0) # started, so it no longer takes merges
+        first = outbound.submit(Priority.LOBBY_UPDATE, ("channel", 1), logging_call(log, "v1"), key=("edit", 1))
+        second = outbound.submit(Priority.LOBBY_UPDATE, ("channel", 1), logging_call(log, "v2"), key=("edit", 1))
+        other = outbound.submit(Priority.LOBBY_UPDATE, ("channel", 1), logging_call(log, "other lobby"), key=("edit", 2))
+        release.set()
+        await asyncio.gather(running, first, second, other)
+        return first is second, first.result(), log, outbound.stats()["LOBBY_UPDATE"]
+
+    same_future, result, log, stats = asyncio.run(run())
+    assert same_future and result == "v2"
+    assert log == ["v2", "other lobby"]
+    assert stats["merged"] == 1 and stats["done"] == 3
+
+def test_discarded_requests_resolve_to_none():
+    async def run():
+        outbound = OutboundQueue(max_in_flight=1)
+        release = asyncio.Event()
+        blocker = outbound.submit(Priority.CHANNEL, ("channel", 1), release.wait)
+        log = []
+        dropped = outbound.submit(Priority.CLEANUP, ("channel", 2), logging_call(log, "delete"), key=("delete", 1))
+        assert outbound.discard(("delete", 1))
+        assert not outbound.discard(("delete", 1))
+        release.set()
+        await blocker
+        return await dropped, log, outbound.stats()["CLEANUP"]["shed"]
+
+    assert asyncio.run(run()) == (None, [], 1)
+
+def test_failures_reach_the_caller_and_free_the_route():
+    async def run():
+        outbound = OutboundQueue()
+
+        async def fail():
+            raise RuntimeError("500")
+        with pytest.raises(RuntimeError):
+            await outbound.call(Priority.CHANNEL, ("channel", 1), fail)
+        return await outbound.call(Priority.CHANNEL, ("channel", 1), returning("next")), outbound.stats()["CHANNEL"]["failed"]
+
+    assert asyncio.run(run()) == ("next", 1)
@@ -0,0 +1,40 @@
+import time
+
+from lobbybot.metrics.profiler import SamplingProfiler
+
+def _busy(seconds: float):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+def test_run_that_stops_itself_is_kept_until_collected(tmp_path):
+    profiler = SamplingProfiler(interval=0.001, max_duration=0.05)
+    profiler.start()
+    _busy(0.2)
+    assert profiler.finished and not profiler.running
+
+    samples = profiler.samples
+    assert samples > 0
+    profiler.start() # must not throw the finished run away
+    assert profiler.finished and profiler.samples == samples
+
+    assert profiler.stop()
+    assert not profiler.finished and not profiler.running
+    path = tmp_path / "profile.collapsed"
+    profiler.write_collapsed(path)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in path.read_text().splitlines()) == samples
+    assert profiler.top(1)[0][0].startswith("_busy ")
+
+def test_stop_and_start_again():
+    profiler = SamplingProfiler(interval=0.001)
+    assert not profiler.stop()
+    profiler.start()
+    assert profiler.running
+    _busy(0.02)
+    assert profiler.stop()
+    assert not profiler.running and profiler.samples > 0
+    assert not profiler.stop()
+
+    profiler.start()
+    assert profiler.running
+    profiler.stop()